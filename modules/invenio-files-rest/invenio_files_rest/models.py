@@ -51,7 +51,7 @@ import sqlalchemy as sa
 from flask import current_app, flash, redirect, request, url_for
 from flask_login import current_user
 from invenio_db import db
-from invenio_previewer.api import convert_to
+from invenio_previewer.api import convert_to_cache
 from sqlalchemy.dialects import mysql, postgresql
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import validates
@@ -925,6 +925,11 @@ class FileInstance(db.Model, Timestamp):
 
                 pdf_dir = path + '/pdf_dir/' + str(self.id)
                 pdf_filename = '/data.pdf'
+                if self.checksum and \
+                        not os.path.isfile(pdf_dir + pdf_filename):
+                    # PDFs are shared by the files of the same content
+                    pdf_dir = path + '/pdf_dir/' + \
+                        self.checksum.replace(':', '_')
                 file_type = os.path.splitext(self.json['filename'])[1].lower()
                 # Change preview file to pdf
                 self.json['mimetype'] = 'application/pdf'
@@ -945,7 +950,8 @@ class FileInstance(db.Model, Timestamp):
                         with open(target_uri,"wb") as f:
                             f.write(data)
 
-                    convert_to(pdf_dir, target_uri)
+                    convert_to_cache(pdf_dir, target_uri,
+                                     pdf_filename.lstrip('/'))
 
                     if os.path.exists(convert_dir):
                         shutil.rmtree(convert_dir)
@@ -12,6 +12,7 @@
 
 from __future__ import absolute_import, print_function
 
+import copy
 import sys,os
 import uuid
 from os.path import getsize
@@ -932,28 +933,52 @@ def test_fileinstance_send_file(app, db, dummy_location,dummy_s3_location,mocker
         assert int(res.headers['Content-Length']) == len(data)
     
     data = {'url': {'url': 'https://test_server/record/1/files/test_file.docx'}, 'date': [{'dateType': 'Available', 'dateValue': '2023-04-06'}], 'format': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'filename': 'test_file.docx', 'filesize': [{'value': '31 KB'}], 'mimetype': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'accessrole': 'open_access', 'version_id': '174af28a-2a26-428c-ae90-1fae1dffd21c', 'displaytype': 'preview'}
-    def mock_convert(pdf_dir,target_uri):
+    def mock_convert(pdf_dir,target_uri,cache_name):
         if os.path.exists(pdf_dir):
             shutil.rmtree(pdf_dir)
         os.makedirs(pdf_dir)
         with open(target_uri,"rb") as f:
             data = f.read()
-        with open(pdf_dir+"/data.pdf","wb") as f:
+        with open(pdf_dir+"/"+cache_name,"wb") as f:
             f.write(data)
+        return pdf_dir+"/"+cache_name
             
-    mocker.patch("invenio_files_rest.storage.pyfs.PyFSFileStorage.open",return_value=open(os.path.join(os.path.dirname(__file__),"data/test_file.docx"),"rb"))
+    mocker.patch("invenio_files_rest.storage.pyfs.PyFSFileStorage.open",side_effect=lambda *args, **kwargs: open(os.path.join(os.path.dirname(__file__),"data/test_file.docx"),"rb"))
     with app.test_request_context("/record/1/files/test_file.docx"):
-        with patch("invenio_files_rest.models.convert_to",side_effect=mock_convert) as mock_convert:
+        with patch("invenio_files_rest.models.convert_to_cache",side_effect=mock_convert) as mock_convert:
             f = FileInstance(
                 id=1,
                 uri="s3://test_file.docx",
-                json=data,
+                json=copy.deepcopy(data),
                 readable=True
             )
             res = f.send_file("test_file.docx",True,"application/vnd.openxmlformats-officedocument.wordprocessingml.document",False,None,False,True)
-            mock_convert.assert_called_with("/tmp/pdf_dir/1","/tmp/convert_1/test_file.docx")
+            mock_convert.assert_called_with("/tmp/pdf_dir/1","/tmp/convert_1/test_file.docx","data.pdf")
             shutil.rmtree("/tmp/pdf_dir/1")
 
+            # the converted PDF is shared by the files of the same checksum
+            f = FileInstance(
+                id=2,
+                uri="s3://test_file.docx",
+                checksum="md5:test",
+                json=copy.deepcopy(data),
+                readable=True
+            )
+            res = f.send_file("test_file.docx",True,"application/vnd.openxmlformats-officedocument.wordprocessingml.document",False,None,False,True)
+            mock_convert.assert_called_with("/tmp/pdf_dir/md5_test","/tmp/convert_2/test_file.docx","data.pdf")
+            mock_convert.reset_mock()
+            f = FileInstance(
+                id=3,
+                uri="s3://test_file.docx",
+                checksum="md5:test",
+                json=copy.deepcopy(data),
+                readable=True
+            )
+            res = f.send_file("test_file.docx",True,"application/vnd.openxmlformats-officedocument.wordprocessingml.document",False,None,False,True)
+            mock_convert.assert_not_called()
+            assert f.uri == "/tmp/pdf_dir/md5_test/data.pdf"
+            shutil.rmtree("/tmp/pdf_dir/md5_test")
+
 
 def test_fileinstance_validation(app, db, dummy_location):
     """Test validating the FileInstance."""
@@ -61,3 +61,11 @@ OAIHARVESTER_ENABLE_ITEM_VERSIONING = False
 OAIHARVESTER_RETRY_COUNT = 5
 OAIHARVESTER_BACKOFF_FACTOR = 1.0
 
+OAIHARVESTER_PREFETCH_PAGES = 2
+"""Number of ListRecords pages fetched ahead of the ingest."""
+
+OAIHARVESTER_INGEST_WORKERS = 4
+"""Number of worker threads building the mappers of harvested records."""
+
+OAIHARVESTER_COMMIT_BATCH_SIZE = 50
+"""Number of harvested records ingested per database commit."""
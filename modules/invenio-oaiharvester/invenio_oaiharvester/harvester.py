@@ -27,13 +27,13 @@ from json import dumps, loads
 
 import dateutil
 import requests
-import xmltodict
 from bs4 import BeautifulSoup
 from flask import current_app
 from lxml import etree
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
-from weko_records.api import Mapping
+from sqlalchemy.orm import joinedload, load_only
+from weko_records.api import ItemTypes, Mapping
 from weko_records.models import ItemType
 from weko_records.serializers.utils import get_full_mapping, get_mapping
 from weko_records.utils import get_options_and_order_list
@@ -59,6 +59,17 @@ DDI_MAPPING_KEY_URI = 'stdyDscr.citation.holdings.@value'
 TEXT = '#text'
 LANG = '@xml:lang'
 
+XML_NAMESPACE = 'http://www.w3.org/XML/1998/namespace'
+
+HEADER_STATUS_XPATH = etree.XPath('string(*[name()="header"]/@status)')
+HEADER_IDENTIFIER_XPATH = etree.XPath(
+    '*[name()="header"]/*[name()="identifier"]')
+HEADER_DATESTAMP_XPATH = etree.XPath(
+    '*[name()="header"]/*[name()="datestamp"]')
+HEADER_SETSPEC_XPATH = etree.XPath('*[name()="header"]/*[name()="setSpec"]')
+METADATA_TYPE_XPATH = etree.XPath(
+    '*[name()="metadata"]/*[name()=$tag]/*[name()="dc:type"]')
+
 
 def list_sets(url, encoding='utf-8'):
     """Get sets list."""
@@ -134,6 +145,78 @@ def list_records(
     return records, rtoken
 
 
+def element_text(element):
+    """Get the stripped text of an element, or None if it is empty."""
+    text = ''.join(element.itertext()).strip()
+    return text or None
+
+
+def element_name(element):
+    """Get the name of an element with the prefix used in the document."""
+    name = element.tag
+    if name[0] == '{':
+        name = name[name.index('}') + 1:]
+        if element.prefix:
+            name = element.prefix + ':' + name
+    return name
+
+
+def element_item(element, parent_nsmap, prefixes=None):
+    """Convert the content of an lxml element in the way of xmltodict."""
+    item = OrderedDict()
+    nsmap = element.nsmap
+    if nsmap != parent_nsmap:
+        for prefix, uri in nsmap.items():
+            if parent_nsmap.get(prefix) != uri:
+                item['@xmlns:' + prefix if prefix else '@xmlns'] = uri
+        prefixes = None
+    for name, value in element.attrib.items():
+        if name[0] == '{':
+            uri, local_name = name[1:].split('}', 1)
+            if uri == XML_NAMESPACE:
+                name = 'xml:' + local_name
+            else:
+                if prefixes is None:
+                    prefixes = {u: p for p, u in nsmap.items() if p}
+                name = prefixes[uri] + ':' + local_name
+        item['@' + name] = value
+
+    data = [element.text] if element.text else []
+    for child in element:
+        if isinstance(child.tag, str):
+            name = element_name(child)
+            value = element_item(child, nsmap, prefixes)
+            if name not in item:
+                item[name] = value
+            elif isinstance(item[name], list):
+                item[name].append(value)
+            else:
+                item[name] = [item[name], value]
+        if child.tail:
+            data.append(child.tail)
+    text = ''.join(data).strip()
+
+    if not item:
+        return text or None
+    if text:
+        item[TEXT] = text
+    return item
+
+
+def element_to_dict(element):
+    """Convert an lxml element to the structure made by xmltodict.parse.
+
+    Element and attribute names keep their prefixes, attributes are prefixed
+    by '@', text is stored in '#text' and repeated elements become lists.
+    The element does not need to be serialized and parsed again.
+
+    :param element: lxml element.
+    :return: OrderedDict with the element name as the only key.
+    """
+    return OrderedDict(
+        [(element_name(element), element_item(element, {}))])
+
+
 def map_field(schema):
     """Get field map."""
     res = {}
@@ -1562,54 +1645,91 @@ class BaseMapper:
 
     @classmethod
     def update_itemtype_map(cls):
-        """Update itemtype map."""
-        for t in ItemType.query.all():
-            cls.itemtype_map[t.item_type_name.name] = t
+        """Update itemtype map.
+
+        Only the ids of the item types are kept by their names, because the
+        map is shared by the mappers made in other sessions.
+        """
+        item_types = ItemType.query.options(
+            load_only('id', 'name_id'),
+            joinedload(ItemType.item_type_name).load_only('name')).all()
+        for t in item_types:
+            cls.itemtype_map[t.item_type_name.name] = t.id
+
+    @classmethod
+    def get_itemtype(cls, name):
+        """Get the item type of the name from the item type cache.
+
+        The item type is shared by the mappers of all the harvested records,
+        so it is loaded once per process and must not be modified.
+
+        :param name: Name of the item type.
+        :return: Cached item type model or None.
+        """
+        itemtype_id = cls.itemtype_map.get(name)
+        if itemtype_id is None:
+            return None
+        item_type = ItemTypes.get_cached_record(itemtype_id, with_deleted=True)
+        return item_type.model if item_type is not None else None
 
     def __init__(self, xml):
-        """Init."""
-        self.xml = xml
-        self.json = xmltodict.parse(xml)
+        """Init.
+
+        :param xml: record element of the OAI-PMH response, or its string.
+        """
+        if not isinstance(xml, etree._Element):
+            if isinstance(xml, str):
+                xml = xml.encode('utf-8')
+            xml = etree.fromstring(xml)
+        self.record = xml
+        self._json = None
         if not BaseMapper.itemtype_map:
             BaseMapper.update_itemtype_map()
 
         for item in BaseMapper.itemtype_map:
             if 'Others' == item or 'Multiple' == item:
-                self.itemtype = BaseMapper.itemtype_map.get(item)
+                self.itemtype = BaseMapper.get_itemtype(item)
                 break
 
+    @property
+    def json(self):
+        """Get the record as the dict made by xmltodict.parse."""
+        if self._json is None:
+            self._json = element_to_dict(self.record)
+        return self._json
+
+    @json.setter
+    def json(self, value):
+        """Set the record dict."""
+        self._json = value
+
     def is_deleted(self):
         """Check deleted."""
-        return self.json['record']['header'].get('@status') == 'deleted'
+        return HEADER_STATUS_XPATH(self.record) == 'deleted'
 
     def identifier(self):
         """Get identifier."""
-        return self.json['record']['header'].get('identifier')
+        identifiers = HEADER_IDENTIFIER_XPATH(self.record)
+        return element_text(identifiers[0]) if identifiers else None
 
     def datestamp(self):
         """Get datestamp."""
-        datestring = self.json['record']['header'].get('datestamp')
+        datestring = element_text(HEADER_DATESTAMP_XPATH(self.record)[0])
         return dateutil.parser.parse(datestring).date()
 
     def specs(self):
         """Get specs."""
-        s = self.json['record']['header'].get('setSpec')
-        return s if isinstance(s, list) else [s]
+        s = [element_text(spec) for spec in HEADER_SETSPEC_XPATH(self.record)]
+        return s or [None]
 
     def map_itemtype(self, type_tag):
         """Map itemtype."""
-        types = self.json['record']['metadata'][type_tag].get('dc:type')
-        if types is None:
-            return
-
-        types = types if isinstance(types, list) else [types]
-        for t in types:
-            if isinstance(t, OrderedDict):
-                t = t[TEXT]
-            if t.lower() in RESOURCE_TYPE_MAP:
+        for t in METADATA_TYPE_XPATH(self.record, tag=type_tag):
+            t = element_text(t)
+            if t and t.lower() in RESOURCE_TYPE_MAP:
                 resource_type = RESOURCE_TYPE_MAP.get(t.lower())
                 if BaseMapper.itemtype_map.get(resource_type):
-                    self.itemtype = BaseMapper.itemtype_map.get(resource_type)
+                    self.itemtype = BaseMapper.get_itemtype(resource_type)
 
 
 class DCMapper(BaseMapper):
@@ -1627,7 +1747,7 @@ class DCMapper(BaseMapper):
         self.identifiers = []
         res = {'$schema': self.itemtype.id,
                'pubdate': str(self.datestamp())}
-        item_type_mapping = Mapping.get_record(self.itemtype.id)
+        item_type_mapping = Mapping.get_cached_record(self.itemtype.id)
         item_map = get_full_mapping(item_type_mapping, "oai_dc_mapping")
 
         args = [self.itemtype.schema.get('properties'), item_map, res]
@@ -1678,7 +1798,7 @@ class JPCOARMapper(BaseMapper):
         res = {'$schema': self.itemtype.id,
                'pubdate': str(self.datestamp())}
 
-        item_type_mapping = Mapping.get_record(self.itemtype.id)
+        item_type_mapping = Mapping.get_cached_record(self.itemtype.id)
         item_map = get_full_mapping(item_type_mapping, "jpcoar_mapping")
 
         args = [self.itemtype.schema.get('properties'), item_map, res]
@@ -2030,7 +2150,7 @@ class DDIMapper(BaseMapper):
 
     def map_itemtype(self, type_tag):
         """Map itemtype."""
-        self.itemtype = BaseMapper.itemtype_map['Harvesting DDI']
+        self.itemtype = BaseMapper.get_itemtype('Harvesting DDI')
 
     def map(self):
         """Get map."""
@@ -22,10 +22,13 @@
 from __future__ import absolute_import, print_function
 
 import json
+import queue
 import signal
+import threading
 import traceback
 from ast import literal_eval as make_tuple
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import dateutil
@@ -37,8 +40,9 @@ from flask_babelex import gettext as _
 from invenio_db import db
 from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_records.models import RecordMetadata
-from lxml import etree
-from weko_deposit.api import WekoDeposit, WekoRecord
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from weko_deposit.api import WekoDeposit, WekoIndexer, WekoRecord
 from weko_index_tree.models import Index
 from weko_records.models import ItemMetadata
 from weko_records_ui.utils import restore, soft_delete
@@ -156,25 +160,37 @@ def event_counter(event_name, counter):
         counter[event_name] = 1
 
 
-def process_item(record, harvesting, counter, request_info):
-    """Process item."""
+def get_mapper(record, metadata_prefix):
+    """Get the mapper of a harvested record.
+
+    :param record: record element of a ListRecords response.
+    :param metadata_prefix: metadata prefix of the harvesting.
+    :return: mapper instance, or None if the prefix is not supported.
+    """
+    if metadata_prefix == 'oai_dc':
+        mapper_class = DCMapper
+    elif metadata_prefix == 'jpcoar' or metadata_prefix == 'jpcoar_1.0':
+        mapper_class = JPCOARMapper
+    elif metadata_prefix == 'jpcoar_2.0':
+        mapper_class = JPCOARMapper
+    elif metadata_prefix == 'oai_ddi25' or metadata_prefix == 'ddi':
+        mapper_class = DDIMapper
+    else:
+        return None
+    return mapper_class(record)
+
+
+def process_item(record, harvesting, counter, request_info, mapper=None):
+    """Process item.
+
+    :param mapper: mapper built in advance by get_mapper (optional).
+    """
     event_counter('processed_items', counter)
     event = ItemEvents.INIT
 
-    xml = etree.tostring(record, encoding='utf-8').decode()
-    # current_app.logger.debug('[{0}] [{1}] Processing xml: {2}'.format(
-    #    0, 'Harvesting', xml))
-    if harvesting.metadata_prefix == 'oai_dc':
-        mapper = DCMapper(xml)
-    elif harvesting.metadata_prefix == 'jpcoar' or \
-            harvesting.metadata_prefix == 'jpcoar_1.0':
-        mapper = JPCOARMapper(xml)
-    elif harvesting.metadata_prefix == 'jpcoar_2.0':
-        mapper = JPCOARMapper(xml)
-    elif harvesting.metadata_prefix == 'oai_ddi25' or \
-            harvesting.metadata_prefix == 'ddi':
-        mapper = DDIMapper(xml)
-    else:
+    if mapper is None:
+        mapper = get_mapper(record, harvesting.metadata_prefix)
+    if mapper is None:
         return
 
     current_app.logger.debug('[{0}] [{1}] Processing identifier: {2} prefix: {3}'.format(
@@ -220,7 +236,7 @@ def process_item(record, harvesting, counter, request_info):
         if dep.pid.status == PIDStatus.DELETED:
             recid.status = PIDStatus.DELETED
             restore(recid.pid_value)
-        json_data = mapper.map()
+        json_data = getattr(mapper, 'mapped_json', None) or mapper.map()
         if not json_data:
             return
 
@@ -377,6 +393,140 @@ def is_harvest_running(id, task_id):
     return False
 
 
+def build_mapper(app, record, metadata_prefix):
+    """Build the mapper of a record and map it in an ingest worker thread.
+
+    The mapped metadata is kept in ``mapped_json`` of the mapper, so only
+    the DB ingest runs in the harvesting thread.
+    """
+    with app.app_context():
+        mapper = get_mapper(record, metadata_prefix)
+        if mapper is not None and not mapper.is_deleted():
+            mapper.mapped_json = mapper.map()
+        return mapper
+
+
+def put_page(pages, stop, page):
+    """Put a page on the queue until it is accepted or the harvest stops."""
+    while not stop.is_set():
+        try:
+            pages.put(page, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def fetch_pages(app, pages, stop, executor, harvesting_info, rtoken):
+    """Fetch and parse ListRecords pages ahead of the ingest.
+
+    Each page is put on the queue as (records, mappers, rtoken, error),
+    where mappers are the futures of the mappers built and mapped by the
+    workers.
+
+    :param harvesting_info: dict of base_url, from_date, until_date,
+                            metadata_prefix and set_spec.
+    :param rtoken: resumption token to resume from.
+    """
+    with app.app_context():
+        try:
+            while not stop.is_set():
+                records, rtoken = harvester_list_records(
+                    harvesting_info['base_url'],
+                    harvesting_info['from_date'] if not rtoken else None,
+                    harvesting_info['until_date'] if not rtoken else None,
+                    harvesting_info['metadata_prefix'],
+                    harvesting_info['set_spec'],
+                    rtoken)
+                mappers = [executor.submit(build_mapper, app, record,
+                                           harvesting_info['metadata_prefix'])
+                           for record in records]
+                if not put_page(pages, stop, (records, mappers, rtoken, None)):
+                    break
+                if not rtoken:
+                    break
+        except Exception as ex:
+            put_page(pages, stop, (None, None, None, ex))
+
+
+def _track_inserted_record(mapper, connection, target):
+    """Keep the ids of the records inserted in the harvesting transaction."""
+    session = object_session(target)
+    if session is not None and 'oaiharvester_inserted' in session.info:
+        session.info['oaiharvester_inserted'].add(str(target.id))
+
+
+event.listen(RecordMetadata, 'after_insert', _track_inserted_record)
+
+
+def ingest_item(record, mapper, harvesting, counter, request_info):
+    """Ingest a record in a savepoint of the harvesting transaction.
+
+    :param mapper: future of the mapper of the record.
+    :return: True if the record was ingested, False if it failed and None
+             if the whole transaction was rolled back.
+    """
+    savepoint = db.session.begin_nested()
+    try:
+        process_item(record, harvesting, counter, request_info,
+                     mapper=mapper.result())
+        if savepoint.is_active:
+            savepoint.commit()
+        return True
+    except Exception as ex:
+        current_app.logger.debug(traceback.format_exc())
+        current_app.logger.error(
+            'Error occurred while processing harvesting item\n' + str(ex))
+        event_counter('error_items', counter)
+        if savepoint.is_active:
+            savepoint.rollback()
+            return False
+        db.session.rollback()
+        return None
+
+
+def ingest_items(items, harvesting, counter, request_info):
+    """Ingest records in one transaction and commit it.
+
+    When a record leaves the transaction unusable, the records ingested
+    before it are rolled back too. Their counts are taken back, the search
+    documents of the records inserted by them are deleted and they are
+    ingested again.
+
+    :param items: list of the records and the futures of their mappers.
+    """
+    db.session.info['oaiharvester_inserted'] = set()
+    try:
+        pending = list(items)
+        ingested = []
+        committed_counter = dict(counter)
+        while pending:
+            item = pending.pop(0)
+            before = dict(counter)
+            result = ingest_item(item[0], item[1], harvesting, counter,
+                                 request_info)
+            if result is None:
+                failed_counter = {k: counter[k] - before.get(k, 0)
+                                  for k in counter}
+                counter.clear()
+                counter.update({
+                    k: committed_counter.get(k, 0) + failed_counter[k]
+                    for k in failed_counter})
+                committed_counter = dict(counter)
+                inserted = db.session.info['oaiharvester_inserted']
+                db.session.info['oaiharvester_inserted'] = set()
+                indexer = WekoIndexer()
+                for uuid in inserted:
+                    indexer.delete_by_id(uuid)
+                pending = ingested + pending
+                ingested = []
+            elif result:
+                ingested.append(item)
+        db.session.commit()
+    finally:
+        db.session.info.pop('oaiharvester_inserted', None)
+
+
 @ shared_task
 def run_harvesting(id, start_time, user_data, request_info): 
     """Run harvest."""
@@ -445,34 +595,55 @@ def run_harvesting(id, start_time, user_data, request_info):
             nonlocal pause
             pause = True
         signal.signal(signal.SIGTERM, sigterm_handler)
-        while True:
-            records, rtoken = harvester_list_records(
-                harvesting.base_url,
-                harvesting.from_date.__str__() if harvesting.from_date and not rtoken else None,
-                harvesting.until_date.__str__() if harvesting.until_date and not rtoken else None,
-                harvesting.metadata_prefix,
-                harvesting.set_spec,
-                rtoken)
-            current_app.logger.info('[{0}] [{1}]'.format(
-                                    0, 'Processing records'))
-            for record in records:
-                try:
-                    process_item(record, harvesting, counter, request_info)
-                    db.session.commit()
-                except Exception as ex:
-                    current_app.logger.debug(traceback.format_exc())
-                    current_app.logger.error(
-                        'Error occurred while processing harvesting item\n' + str(ex))
-                    db.session.rollback()
-                    event_counter('error_items', counter)
-            harvesting.resumption_token = rtoken
-            db.session.commit()
-            if not rtoken:
-                harvest_log.status = 'Successful'
-                break
-            elif pause is True:
-                harvest_log.status = 'Suspended'
-                break
+
+        harvesting_info = {
+            'base_url': harvesting.base_url,
+            'from_date': harvesting.from_date.__str__() if harvesting.from_date else None,
+            'until_date': harvesting.until_date.__str__() if harvesting.until_date else None,
+            'metadata_prefix': harvesting.metadata_prefix,
+            'set_spec': harvesting.set_spec
+        }
+        batch_size = current_app.config['OAIHARVESTER_COMMIT_BATCH_SIZE']
+        pages = queue.Queue(
+            maxsize=current_app.config['OAIHARVESTER_PREFETCH_PAGES'])
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(
+            max_workers=current_app.config['OAIHARVESTER_INGEST_WORKERS'])
+        fetcher = threading.Thread(
+            target=fetch_pages,
+            args=(current_app._get_current_object(), pages, stop, executor,
+                  harvesting_info, rtoken),
+            daemon=True)
+        fetcher.start()
+        try:
+            while True:
+                records, mappers, rtoken, error = pages.get()
+                if error is not None:
+                    raise error
+                current_app.logger.info('[{0}] [{1}]'.format(
+                                        0, 'Processing records'))
+                items = list(zip(records, mappers))
+                for i in range(0, len(items), batch_size):
+                    ingest_items(items[i:i + batch_size], harvesting,
+                                 counter, request_info)
+                # The token is saved only after its page is ingested, so a
+                # suspended harvest resumes from the first unprocessed page.
+                harvesting.resumption_token = rtoken
+                db.session.commit()
+                if not rtoken:
+                    harvest_log.status = 'Successful'
+                    break
+                elif pause is True:
+                    harvest_log.status = 'Suspended'
+                    break
+        finally:
+            stop.set()
+            while not pages.empty():
+                page = pages.get_nowait()
+                for mapper in page[1] or []:
+                    mapper.cancel()
+            executor.shutdown(wait=False)
+            fetcher.join()
     except Exception as ex:
         db.session.rollback()
         harvest_log.status = 'Failed'
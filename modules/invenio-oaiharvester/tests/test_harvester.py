@@ -13,6 +13,7 @@ from weko_records.serializers.utils import get_full_mapping
 from invenio_oaiharvester.harvester import (
     list_sets,
     list_records,
+    element_to_dict,
     map_field,
     subitem_recs,
     parsing_metadata,
@@ -175,6 +176,16 @@ def test_list_records():
     assert rtoken == None
 
 
+# def element_to_dict(element):
+# .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_harvester.py::test_element_to_dict -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
+def test_element_to_dict():
+    xml_str = '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"><GetRecord><record><header><identifier>oai:weko3.example.org:00000001</identifier><setSpec>1</setSpec><setSpec>2</setSpec></header><metadata><jpcoar:jpcoar xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:jpcoar="https://github.com/JPCOAR/schema/blob/master/1.0/" xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="https://github.com/JPCOAR/schema/blob/master/1.0/"><dc:title xml:lang="ja">test title</dc:title><dc:type rdf:resource="http://purl.org/coar/resource_type/c_2fe3">newspaper</dc:type><jpcoar:creator><jpcoar:creatorName>test</jpcoar:creatorName><!-- comment --></jpcoar:creator><jpcoar:volume/><jpcoar:issue>1<jpcoar:test>2</jpcoar:test> 3</jpcoar:issue></jpcoar:jpcoar></metadata></record></GetRecord></OAI-PMH>'
+    tree = etree.fromstring(xml_str)
+    record = tree.findall("./GetRecord/record", namespaces=tree.nsmap)[0]
+    xml = etree.tostring(record, encoding="utf-8").decode()
+    assert element_to_dict(record) == xmltodict.parse(xml)
+
+
 # def map_field(schema):
 # .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_harvester.py::test_map_field -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
 def test_map_field():
@@ -997,6 +1008,7 @@ def test_map_sets():
 # .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_harvester.py::TestBaseMapper -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
 class TestBaseMapper:
 #     def update_itemtype_map(cls):
+#     def get_itemtype(cls, name):
 #     def __init__(self, xml):
 # .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_harvester.py::TestBaseMapper::test_init -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
     def test_init(self,app,db):
@@ -1030,12 +1042,41 @@ class TestBaseMapper:
         BaseMapper.update_itemtype_map()
         mapper = BaseMapper(xml)
         assert hasattr(mapper, "itemtype") == True
-        assert mapper.itemtype == item_type2
+        assert mapper.itemtype.id == 11
+        # Only the id is shared between sessions.
+        assert BaseMapper.itemtype_map["Multiple"] == 11
+        # The item type is loaded once from the item type cache.
+        with patch("invenio_oaiharvester.harvester.ItemTypes.get_record") as mock_get:
+            assert BaseMapper.get_itemtype("Multiple") is mapper.itemtype
+            BaseMapper(xml)
+            mock_get.assert_not_called()
+        assert BaseMapper.get_itemtype("not exist") is None
 
 #     def is_deleted(self):
 #     def identifier(self):
 #     def datestamp(self):
 #     def specs(self):
+# .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_harvester.py::TestBaseMapper::test_header -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
+    def test_header(self,app,db):
+        xml_str = '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"><ListRecords><record><header status="deleted"><identifier>oai:weko3.example.org:00000001</identifier><datestamp>2023-02-20T06:24:47Z</datestamp><setSpec>1557819692844:1557819733276</setSpec><setSpec>1557820086539</setSpec></header></record><record><header><identifier>oai:weko3.example.org:00000002</identifier><datestamp>2023-02-21T06:24:47Z</datestamp></header><metadata></metadata></record></ListRecords></OAI-PMH>'
+        tree = etree.fromstring(xml_str)
+        records = tree.findall("./ListRecords/record", namespaces=tree.nsmap)
+        # mapper is made from the element without parsing the record again
+        with patch("invenio_oaiharvester.harvester.element_to_dict") as mock_to_dict:
+            mapper = BaseMapper(records[0])
+            assert mapper.is_deleted() == True
+            assert mapper.identifier() == "oai:weko3.example.org:00000001"
+            assert str(mapper.datestamp()) == "2023-02-20"
+            assert mapper.specs() == ["1557819692844:1557819733276", "1557820086539"]
+            mock_to_dict.assert_not_called()
+
+        mapper = BaseMapper(etree.tostring(records[1], encoding="utf-8").decode())
+        assert mapper.is_deleted() == False
+        assert mapper.identifier() == "oai:weko3.example.org:00000002"
+        assert str(mapper.datestamp()) == "2023-02-21"
+        assert mapper.specs() == [None]
+        assert mapper.json["record"]["header"]["identifier"] == "oai:weko3.example.org:00000002"
+
 #     def map_itemtype(self, type_tag):
 # .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_harvester.py::TestBaseMapper::test_map_itemtype -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
     def test_map_itemtype(self,db):
@@ -1069,7 +1110,7 @@ class TestBaseMapper:
         mapper = BaseMapper(xml)
         mapper.map_itemtype("jpcoar:jpcoar")
         assert hasattr(mapper, "itemtype") == True
-        assert mapper.itemtype == item_type1
+        assert mapper.itemtype.id == item_type1.id
 
 # class DCMapper(BaseMapper):
 # .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_harvester.py::TestDCMapper -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
@@ -27,7 +27,7 @@ import signal
 
 import pytest
 import responses
-from mock import patch
+from mock import MagicMock, patch
 from invenio_db import db
 from weko_index_tree.models import Index
 from lxml import etree
@@ -40,7 +40,8 @@ from invenio_oaiharvester.signals import oaiharvest_finished
 from invenio_oaiharvester.tasks import create_indexes, event_counter, \
     get_specific_records, list_records_from_dates, map_indexes, \
     process_item, run_harvesting,link_success_handler,link_error_handler,\
-        is_harvest_running,check_schedules_and_run
+        is_harvest_running,check_schedules_and_run,fetch_pages,ingest_item,ingest_items,\
+        get_mapper,build_mapper
 
 # .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_tasks.py -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
 
@@ -563,7 +564,7 @@ def test_run_harvesting(app, db,mocker):
             assert log.status == "Failed"
             
         import time
-        def mock_process_item(record=None,harvesting=None,counter=None,request_info=None):
+        def mock_process_item(record=None,harvesting=None,counter=None,request_info=None,mapper=None):
             pid = os.getpid()
             os.kill(pid, signal.SIGTERM)
         with patch("invenio_oaiharvester.tasks.process_item",side_effect=mock_process_item):
@@ -572,6 +573,152 @@ def test_run_harvesting(app, db,mocker):
             assert res == ({'task_state': 'SUCCESS', 'start_time': '2022-10-01T00:00:00', 'end_time': res[0]["end_time"], 'total_records': 0, 'execution_time': res[0]['execution_time'], 'task_name': 'harvest', 'repository_name': 'weko', 'task_id': None}, '2022-10-01T23:59:59')
         
 
+# def get_mapper(record, metadata_prefix):
+# .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_tasks.py::test_get_mapper -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
+def test_get_mapper(app):
+    record = etree.fromstring('<record><header><identifier>oai:test:1</identifier></header></record>')
+    with patch("invenio_oaiharvester.harvester.BaseMapper.update_itemtype_map"):
+        assert get_mapper(record, "oai_dc").__class__.__name__ == "DCMapper"
+        assert get_mapper(record, "jpcoar_2.0").__class__.__name__ == "JPCOARMapper"
+        assert get_mapper(record, "ddi").__class__.__name__ == "DDIMapper"
+        assert get_mapper(record, "not_supported") is None
+
+
+# def build_mapper(app, record, metadata_prefix):
+# .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_tasks.py::test_build_mapper -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
+def test_build_mapper(app):
+    from concurrent.futures import ThreadPoolExecutor
+    mapper = MagicMock()
+    mapper.is_deleted.return_value = False
+    mapper.map.return_value = {"$schema": 1}
+    with patch("invenio_oaiharvester.tasks.get_mapper", return_value=mapper):
+        # the record is mapped in the worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(build_mapper, app, "record", "jpcoar_1.0").result()
+        assert result is mapper
+        assert result.mapped_json == {"$schema": 1}
+
+        # deleted records are not mapped
+        mapper = MagicMock()
+        mapper.is_deleted.return_value = True
+        with patch("invenio_oaiharvester.tasks.get_mapper", return_value=mapper):
+            assert build_mapper(app, "record", "jpcoar_1.0") is mapper
+            mapper.map.assert_not_called()
+
+    with patch("invenio_oaiharvester.tasks.get_mapper", return_value=None):
+        assert build_mapper(app, "record", "not_supported") is None
+
+
+# def fetch_pages(app, pages, stop, executor, harvesting_info, rtoken):
+# .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_tasks.py::test_fetch_pages -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
+def test_fetch_pages(app):
+    import queue
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    info = {"base_url": "http://test.org", "from_date": "2022-10-01",
+            "until_date": "2022-10-02", "metadata_prefix": "jpcoar_1.0",
+            "set_spec": None}
+    executor = ThreadPoolExecutor(max_workers=2)
+    # pages are fetched in order until the last resumption token
+    pages = queue.Queue(maxsize=3)
+    results = [(["r1", "r2"], "token1"), (["r3"], None)]
+    with patch("invenio_oaiharvester.tasks.harvester_list_records", side_effect=results) as mock_list, \
+            patch("invenio_oaiharvester.tasks.build_mapper", side_effect=lambda a, r, p: "mapper_" + r):
+        fetch_pages(app, pages, threading.Event(), executor, info, None)
+        assert mock_list.call_args_list[0][0] == ("http://test.org", "2022-10-01", "2022-10-02", "jpcoar_1.0", None, None)
+        assert mock_list.call_args_list[1][0] == ("http://test.org", None, None, "jpcoar_1.0", None, "token1")
+    records, mappers, rtoken, error = pages.get_nowait()
+    assert records == ["r1", "r2"]
+    assert [m.result() for m in mappers] == ["mapper_r1", "mapper_r2"]
+    assert rtoken == "token1"
+    assert error is None
+    records, mappers, rtoken, error = pages.get_nowait()
+    assert records == ["r3"]
+    assert rtoken is None
+    assert pages.empty()
+
+    # error is put on the queue
+    pages = queue.Queue(maxsize=3)
+    with patch("invenio_oaiharvester.tasks.harvester_list_records", side_effect=Exception("test_error")):
+        fetch_pages(app, pages, threading.Event(), executor, info, "token1")
+    records, mappers, rtoken, error = pages.get_nowait()
+    assert str(error) == "test_error"
+
+    # stopped harvest does not fetch
+    stop = threading.Event()
+    stop.set()
+    with patch("invenio_oaiharvester.tasks.harvester_list_records") as mock_list:
+        fetch_pages(app, pages, stop, executor, info, None)
+        mock_list.assert_not_called()
+    executor.shutdown()
+
+
+# def ingest_item(record, mapper, harvesting, counter, request_info):
+# .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_tasks.py::test_ingest_item -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
+def test_ingest_item(app, db):
+    from concurrent.futures import Future
+    mapper = Future()
+    mapper.set_result("test_mapper")
+    counter = {}
+    with patch("invenio_oaiharvester.tasks.process_item") as mock_process:
+        assert ingest_item("test_record", mapper, "harvesting", counter, None) == True
+        mock_process.assert_called_with("test_record", "harvesting", counter, None, mapper="test_mapper")
+    assert counter == {}
+
+    with patch("invenio_oaiharvester.tasks.process_item", side_effect=Exception("test_error")):
+        assert ingest_item("test_record", mapper, "harvesting", counter, None) == False
+    assert counter == {"error_items": 1}
+
+    mapper = Future()
+    mapper.set_exception(Exception("test_error"))
+    with patch("invenio_oaiharvester.tasks.process_item") as mock_process:
+        assert ingest_item("test_record", mapper, "harvesting", counter, None) == False
+        mock_process.assert_not_called()
+    assert counter == {"error_items": 2}
+
+    # the whole transaction is rolled back
+    with patch("invenio_oaiharvester.tasks.process_item", side_effect=Exception("test_error")), \
+            patch("invenio_oaiharvester.tasks.db.session.begin_nested") as mock_savepoint, \
+            patch("invenio_oaiharvester.tasks.db.session.rollback") as mock_rollback:
+        mock_savepoint.return_value.is_active = False
+        mapper = Future()
+        mapper.set_result("test_mapper")
+        assert ingest_item("test_record", mapper, "harvesting", counter, None) is None
+        mock_rollback.assert_called_once()
+    assert counter == {"error_items": 3}
+
+
+# def ingest_items(items, harvesting, counter, request_info):
+# .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_tasks.py::test_ingest_items -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
+def test_ingest_items(app, db):
+    calls = []
+    results = {"a": [True, True], "b": [None], "c": [True]}
+
+    def ingest(record, mapper, harvesting, counter, request_info):
+        calls.append(record)
+        counter["processed_items"] += 1
+        result = results[record].pop(0)
+        if result is None:
+            counter["error_items"] += 1
+            db.session.info["oaiharvester_inserted"].add("uuid_b")
+        elif record == "a":
+            counter["created_items"] += 1
+            db.session.info["oaiharvester_inserted"].add("uuid_a")
+        return result
+
+    counter = {"processed_items": 0, "created_items": 0, "error_items": 0}
+    items = [("a", None), ("b", None), ("c", None)]
+    with patch("invenio_oaiharvester.tasks.ingest_item", side_effect=ingest), \
+            patch("invenio_oaiharvester.tasks.WekoIndexer") as mock_indexer:
+        ingest_items(items, "harvesting", counter, None)
+        # "a" is rolled back with "b" and ingested again
+        assert calls == ["a", "b", "a", "c"]
+        deleted = [args[0] for args, _ in mock_indexer.return_value.delete_by_id.call_args_list]
+        assert sorted(deleted) == ["uuid_a", "uuid_b"]
+    assert counter == {"processed_items": 3, "created_items": 1, "error_items": 1}
+    assert "oaiharvester_inserted" not in db.session.info
+
+
 # .tox/c1/bin/pytest --cov=invenio_oaiharvester tests/test_tasks.py::test_check_schedules_and_run -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiharvester/.tox/c1/tmp
 def test_check_schedules_and_run(app,db,mocker):
     index = Index()
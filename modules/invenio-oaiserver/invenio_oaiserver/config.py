@@ -214,3 +214,44 @@ OAISERVER_MESSAGE_NO_RECORDS_MATCH = "The combination of the values of the " \
 
 OAISERVER_ES_MAX_CLAUSE_COUNT = 1024
 """The number of clauses a Lucene BooleanQuery can have."""
+
+OAISERVER_HARVEST_CACHE_KEY = 'oaiserver_harvest_{}_{}'
+"""Key of the cached index states and DOI exclusions for harvesting.
+
+Formatted with the kind of cached data and its version.
+"""
+
+OAISERVER_HARVEST_CACHE_TIMEOUT = 600
+"""Maximum seconds the index states and DOI exclusions are cached."""
+
+OAISERVER_METADATA_CACHE_KEY = \
+    'oaiserver_metadata_{generation}_{record_id}_{revision_id}_{prefix}_' \
+    '{url_root}'
+"""Key of the cached metadata element of a record.
+
+Formatted with the metadata generation, the record uuid and revision, the
+metadataPrefix and the root URL of the request.
+"""
+
+OAISERVER_METADATA_CACHE_TIMEOUT = 60 * 60 * 24
+"""Seconds the metadata element of a record is cached."""
+
+OAISERVER_METADATA_GENERATION_KEY = 'oaiserver_metadata_generation'
+"""Key of the generation of the cached metadata.
+
+The generation is increased when item type mappings or schemas change.
+"""
+
+OAISERVER_REGISTER_METADATA_CACHE_SIGNALS = True
+"""Fill the metadata cache when records are committed and invalidate it when
+item types, their mappings or schemas change."""
+
+OAISERVER_METADATA_CACHE_PREFILL_MAX = 100
+"""Maximum records of a transaction whose metadata is cached in background.
+
+The metadata of records committed in larger transactions is cached when it
+is requested.
+"""
+
+OAISERVER_METADATA_CACHE_TASK_RATE_LIMIT = '10/m'
+"""Rate limit of the task caching the metadata of committed records."""
@@ -55,6 +55,8 @@ class _AppState(object):
                                                      weak=False)
         if self.app.config['OAISERVER_REGISTER_SET_SIGNALS']:
             self.register_signals_oaiset()
+        if self.app.config['OAISERVER_REGISTER_METADATA_CACHE_SIGNALS']:
+            self.register_signals_metadata_cache()
 
     def register_signals_oaiset(self):
         """Register OAISet signals to update records."""
@@ -65,6 +67,30 @@ class _AppState(object):
         listen(OAISet, 'after_update', after_update_oai_set)
         listen(OAISet, 'after_delete', after_delete_oai_set)
 
+    def register_signals_metadata_cache(self):
+        """Register signals to fill and invalidate the metadata cache."""
+        from weko_records.models import ItemType, ItemTypeMapping, \
+            ItemTypeName
+        from weko_schema_ui.models import OAIServerSchema
+
+        from .receivers import after_change_metadata_schema, \
+            after_commit_record, metadata_records_hook, metadata_schema_hook
+        from .tasks import cache_records_metadata
+
+        cache_records_metadata.rate_limit = \
+            self.app.config['OAISERVER_METADATA_CACHE_TASK_RATE_LIMIT']
+        records_signals.after_record_insert.connect(after_commit_record,
+                                                    weak=False)
+        records_signals.after_record_update.connect(after_commit_record,
+                                                    weak=False)
+        for model in (ItemType, ItemTypeName, ItemTypeMapping,
+                      OAIServerSchema):
+            for identifier in ('after_insert', 'after_update', 'after_delete'):
+                listen(model, identifier, after_change_metadata_schema)
+        # the generation is increased before the records are cached
+        metadata_schema_hook.register()
+        metadata_records_hook.register()
+
     def unregister_signals(self):
         """Unregister signals."""
         # Unregister Record signals
@@ -74,6 +100,7 @@ class _AppState(object):
             records_signals.before_record_update.disconnect(
                 self.update_function)
         self.unregister_signals_oaiset()
+        self.unregister_signals_metadata_cache()
 
     def unregister_signals_oaiset(self):
         """Unregister signals oaiset."""
@@ -85,6 +112,24 @@ class _AppState(object):
             remove(OAISet, 'after_update', after_update_oai_set)
             remove(OAISet, 'after_delete', after_delete_oai_set)
 
+    def unregister_signals_metadata_cache(self):
+        """Unregister signals of the metadata cache."""
+        from weko_records.models import ItemType, ItemTypeMapping, \
+            ItemTypeName
+        from weko_schema_ui.models import OAIServerSchema
+
+        from .receivers import after_change_metadata_schema, \
+            after_commit_record, metadata_records_hook, metadata_schema_hook
+        records_signals.after_record_insert.disconnect(after_commit_record)
+        records_signals.after_record_update.disconnect(after_commit_record)
+        for model in (ItemType, ItemTypeName, ItemTypeMapping,
+                      OAIServerSchema):
+            for identifier in ('after_insert', 'after_update', 'after_delete'):
+                if contains(model, identifier, after_change_metadata_schema):
+                    remove(model, identifier, after_change_metadata_schema)
+        metadata_schema_hook.unregister()
+        metadata_records_hook.unregister()
+
 
 class InvenioOAIServer(object):
     """Invenio-OAIServer extension."""
@@ -13,15 +13,12 @@ from datetime import datetime
 import six
 from elasticsearch_dsl import Q
 from flask import current_app
-from invenio_pidstore.models import PersistentIdentifier, PIDStatus
-from invenio_records.models import RecordMetadata
 from invenio_search import RecordsSearch, current_search_client
-from weko_index_tree.api import Indexes
-from weko_index_tree.models import Index
 from weko_schema_ui.models import PublishStatus
 from werkzeug.utils import cached_property, import_string
 
 from . import current_oaiserver
+from .utils import get_doi_exclusion_ids, get_harvested_index_list
 
 
 def query_string_parser(search_pattern):
@@ -79,54 +76,13 @@ def get_affected_records(spec=None, search_pattern=None):
 
 def get_records(**kwargs):
     """Get records paginated."""
-    def index_ids_has_future_date():
-        """Get indexes."""
-        query = Index.query.filter(
-            Index.public_state.is_(True),
-            Index.public_date > datetime.now(),
-            Index.harvest_public_state.is_(True)
-        )
-        indexes = []
-        indexes = query.yield_per(1000)
-        index_ids = [index.id for index in indexes]
-        return index_ids
-
-    def get_records_has_doi():
-        """Get object_uuid of PersistentIdentifier."""
-        # Get object_uuid of PersistentIdentifier
-        query = PersistentIdentifier.query.filter(
-            PersistentIdentifier.pid_type == 'doi',
-            PersistentIdentifier.status == PIDStatus.REGISTERED
-        )
-        pids = query.all() or []
-        object_uuids = [pid.object_uuid for pid in pids]
-        # Get RecordMetadata
-        query = RecordMetadata.query.filter(
-            RecordMetadata.id.in_(object_uuids)
-        )
-        records = query.all() or []
-        return records
-
-    def add_condition_doi_and_future_date(query):
-        """Add condition which do not get DOI."""
-        index_ids = index_ids_has_future_date()
-        records = get_records_has_doi()
-        for record in records:
-            paths = record.json.get('path', [])
-            for path in paths:
-                if path in index_ids:
-                    query = query.post_filter(
-                        'bool',
-                        **{'must_not': [
-                            {'term': {'_id': str(record.id)}}]})
-
     page_ = kwargs.get('resumptionToken', {}).get('page', 1)
     size_ = current_app.config['OAISERVER_PAGE_SIZE']
     scroll = current_app.config['OAISERVER_RESUMPTION_TOKEN_EXPIRE_TIME']
     scroll_id = kwargs.get('resumptionToken', {}).get('scroll_id')
 
     if not scroll_id:
-        indexes = Indexes.get_harverted_index_list()
+        indexes = get_harvested_index_list()
 
         search = OAIServerSearch(
             index=current_app.config['INDEXER_DEFAULT_INDEX'],
@@ -187,7 +143,16 @@ def get_records(**kwargs):
             search = search.query(
                 'bool', **{'must': [{'bool': {'should': query_filter}}]})
 
-        add_condition_doi_and_future_date(search)
+        if 'set' not in kwargs:
+            # Records with DOI in non public indexes are not harvested
+            exclusion_ids = get_doi_exclusion_ids()
+            max_clause_count = current_app.config.get(
+                'OAISERVER_ES_MAX_CLAUSE_COUNT', 1024)
+            must_not = [
+                {'terms': {'_id': exclusion_ids[i:i + max_clause_count]}}
+                for i in range(0, len(exclusion_ids), max_clause_count)]
+            if must_not:
+                search = search.filter('bool', must_not=must_not)
 
         current_app.logger.debug("query:{}".format(search.query.to_dict()))
 
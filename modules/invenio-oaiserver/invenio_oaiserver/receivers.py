@@ -12,8 +12,14 @@ from __future__ import absolute_import, print_function
 
 from time import sleep
 
+from flask import current_app, has_app_context
+from invenio_db import db
+from sqlalchemy.orm import object_session
+from weko_records.api import TransactionHook
+
 from .percolator import _delete_percolator, _new_percolator, get_record_sets
-from .tasks import update_affected_records
+from .tasks import cache_records_metadata, update_affected_records
+from .utils import update_metadata_generation
 
 
 class OAIServerUpdater(object):
@@ -59,3 +65,43 @@ def after_delete_oai_set(mapper, connection, target):
     update_affected_records.delay(
         spec=target.spec
     )
+
+
+def after_commit_metadata_schema(session, changes):
+    """Invalidate cached metadata after the schema changes are committed."""
+    if has_app_context():
+        update_metadata_generation()
+
+
+def after_commit_records(session, record_ids):
+    """Cache the metadata of the committed records in background."""
+    if not has_app_context():
+        return
+    record_ids = sorted(record_ids)
+    if len(record_ids) > current_app.config[
+            'OAISERVER_METADATA_CACHE_PREFILL_MAX']:
+        # Bulk updates are cached on the first request instead.
+        return
+    cache_records_metadata.delay(record_ids)
+
+
+# Changes are kept until the outermost transaction is committed, SAVEPOINTs
+# released or rolled back by Record.commit and the item type APIs are ignored.
+metadata_schema_hook = TransactionHook(
+    'oaiserver_metadata_changed', after_commit_metadata_schema)
+metadata_records_hook = TransactionHook(
+    'oaiserver_metadata_records', after_commit_records)
+
+
+def after_commit_record(sender, record=None, **kwargs):
+    """Mark a committed record to cache its metadata after the DB commit."""
+    if record is not None and record.get('_oai', {}).get('id'):
+        metadata_records_hook.add(db.session, str(record.id))
+
+
+def after_change_metadata_schema(mapper, connection, target):
+    """Mark the session to invalidate cached metadata on commit.
+
+    Item types, their names, mappings and schemas decide the metadata.
+    """
+    metadata_schema_hook.add(object_session(target))
@@ -9,16 +9,18 @@
 """OAI-PMH 2.0 response generator."""
 import copy
 import pickle
+import time
 import traceback
 from datetime import MINYEAR, datetime, timedelta
 
 from flask import current_app, request, url_for
 from flask_babelex import get_locale, to_user_timezone, to_utc
 from invenio_communities import config as invenio_communities_config
+from invenio_cache import current_cache
 from invenio_communities.models import Community
 from invenio_db import db
 from invenio_pidstore.errors import PIDDoesNotExistError
-from invenio_pidstore.models import PIDStatus
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_records.models import RecordMetadata
 from lxml import etree
 from lxml.etree import Element, ElementTree, SubElement
@@ -35,8 +37,8 @@ from .provider import OAIIDProvider
 from .query import get_records
 from .resumption_token import serialize
 from .utils import HARVEST_PRIVATE, OUTPUT_HARVEST, PRIVATE_INDEX, \
-    datetime_to_datestamp, get_index_state, handle_license_free, \
-    is_output_harvest, serializer
+    datetime_to_datestamp, get_index_state, get_metadata_cache_key, \
+    handle_license_free, is_output_harvest, serializer
 
 NS_OAIPMH = 'http://www.openarchives.org/OAI/2.0/'
 NS_OAIPMH_XSD = 'http://www.openarchives.org/OAI/2.0/OAI-PMH.xsd'
@@ -386,6 +388,63 @@ def is_exists_doi(param_record):
     return False
 
 
+def get_page_records(items):
+    """Get OAI identifiers and records of a page of ListRecords.
+
+    The identifiers and the records of all items are loaded with one query
+    each instead of two queries per item.
+
+    :param items: Items of the page returned by get_records.
+    :returns: OAI identifiers by pid value and records by uuid.
+    """
+    pid_values = [str(r['json']['_source']['_oai']['id']) for r in items
+                  if r['json']['_source'].get('_oai', {}).get('id')]
+    if not pid_values:
+        return {}, {}
+    pids = PersistentIdentifier.query.filter(
+        PersistentIdentifier.pid_type == OAIIDProvider.pid_type,
+        PersistentIdentifier.pid_provider == OAIIDProvider.pid_provider,
+        PersistentIdentifier.pid_value.in_(pid_values)
+    ).all()
+    records = WekoRecord.get_records(
+        [pid.object_uuid for pid in pids if pid.object_uuid])
+    return {pid.pid_value: pid for pid in pids}, \
+        {str(record.id): record for record in records}
+
+
+def get_record_metadata(pid, record, metadata_prefix):
+    """Get the metadata element of a record.
+
+    The serialized element is cached per record revision and metadataPrefix,
+    so unchanged records are not serialized again.
+
+    :param pid: The OAI identifier of the record.
+    :param record: The record.
+    :param metadata_prefix: The metadataPrefix.
+    :returns: The metadata element.
+    """
+    cache_key = get_metadata_cache_key(record, metadata_prefix)
+    if cache_key:
+        data = current_cache.get(cache_key)
+        if data:
+            return etree.fromstring(data)
+
+    # Only the top level is copied, changed values are replaced
+    etree_record = copy.copy(record)
+    if not etree_record.get('system_identifier_doi', None):
+        etree_record['system_identifier_doi'] = get_identifier(record)
+
+    # Merge licensetype and licensefree
+    etree_record = handle_license_free(etree_record)
+    root = serializer(metadata_prefix)(pid, {'_source': etree_record})
+
+    if cache_key:
+        current_cache.set(
+            cache_key, etree.tostring(root),
+            timeout=current_app.config['OAISERVER_METADATA_CACHE_TIMEOUT'])
+    return root
+
+
 def getrecord(**kwargs):
     """Create OAI-PMH response for verb GetRecord."""
     # current_app.logger.debug("kwargs:{0}".format(kwargs))
@@ -395,7 +454,6 @@ def getrecord(**kwargs):
     if not identify or not identify.outPutSetting:
         return error([('idDoesNotExist', 'No matching identifier')])
 
-    record_dumper = serializer(kwargs['metadataPrefix'])
     pid_object = OAIIDProvider.get(pid_value=kwargs['identifier']).pid
     record = WekoRecord.get_record_by_uuid(pid_object.object_uuid)
     set_identifier(record, record)
@@ -451,15 +509,7 @@ def getrecord(**kwargs):
     e_metadata = SubElement(e_record,
                             etree.QName(NS_OAIPMH, 'metadata'))
 
-    etree_record = pickle.loads(pickle.dumps(record, -1))
-
-    if not etree_record.get('system_identifier_doi', None):
-        etree_record['system_identifier_doi'] = get_identifier(record)
-
-    # Merge licensetype and licensefree
-    etree_record = handle_license_free(etree_record)
-
-    root = record_dumper(pid_object, {'_source': etree_record})
+    root = get_record_metadata(pid_object, record, kwargs['metadataPrefix'])
 
     e_metadata.append(root)
     return e_tree
@@ -487,11 +537,18 @@ def listidentifiers(**kwargs):
     if not result.total:
         return error(get_error_code_msg(), **kwargs)
 
-    for r in result.items:
+    items = list(result.items)
+    pids, records = get_page_records(items)
+    for r in items:
         try:
             pid = oaiid_fetcher(r['id'], r['json']['_source'])
-            pid_object = OAIIDProvider.get(pid_value=pid.pid_value).pid
-            record = WekoRecord.get_record_by_uuid(pid_object.object_uuid)
+            pid_object = pids.get(pid.pid_value)
+            if pid_object is None:
+                raise PIDDoesNotExistError(OAIIDProvider.pid_type,
+                                           pid.pid_value)
+            record = records.get(str(pid_object.object_uuid))
+            if record is None:
+                raise NoResultFound()
             set_identifier(record, record)
 
             path_list = record.get('path') if 'path' in record else []
@@ -560,7 +617,7 @@ def listidentifiers(**kwargs):
 
 def listrecords(**kwargs):
     """Create OAI-PMH response for verb ListRecords."""
-    record_dumper = serializer(kwargs['metadataPrefix'])
+    start_time = time.time()
     e_tree, e_listrecords = verb(**kwargs)
 
     identify = OaiIdentify.get_all()
@@ -586,11 +643,18 @@ def listrecords(**kwargs):
     if not result.total:
         return error(get_error_code_msg(), **kwargs)
 
-    for r in result.items:
+    items = list(result.items)
+    pids, records = get_page_records(items)
+    for r in items:
         try:
             pid = oaiid_fetcher(r['id'], r['json']['_source'])
-            pid_object = OAIIDProvider.get(pid_value=pid.pid_value).pid
-            record = WekoRecord.get_record_by_uuid(pid_object.object_uuid)
+            pid_object = pids.get(pid.pid_value)
+            if pid_object is None:
+                raise PIDDoesNotExistError(OAIIDProvider.pid_type,
+                                           pid.pid_value)
+            record = records.get(str(pid_object.object_uuid))
+            if record is None:
+                raise NoResultFound()
             set_identifier(record, record)
             path_list = record.get('path') if 'path' in record else []
             _is_output = is_output_harvest(path_list, index_state) \
@@ -644,15 +708,8 @@ def listrecords(**kwargs):
                 )
                 e_metadata = SubElement(e_record, etree.QName(NS_OAIPMH,
                                                               'metadata'))
-                etree_record = pickle.loads(pickle.dumps(record, -1))
-                if not etree_record.get('system_identifier_doi', None):
-                    etree_record['system_identifier_doi'] = get_identifier(
-                        record)
-
-                # Merge licensetype and licensefree
-                etree_record = handle_license_free(etree_record)
-                e_metadata.append(record_dumper(
-                    pid, {'_source': etree_record}))
+                e_metadata.append(get_record_metadata(
+                    pid, record, kwargs['metadataPrefix']))
 
         except PIDDoesNotExistError:
             current_app.logger.error(
@@ -668,7 +725,8 @@ def listrecords(**kwargs):
         return error(get_error_code_msg(), **kwargs)
 
     current_app.logger.debug(
-        "number of records :{}".format(len(e_listrecords)))
+        "number of records :{} / page size :{} in {:.3f}s".format(
+            len(e_listrecords), result.per_page, time.time() - start_time))
     resumption_token(e_listrecords, result, **kwargs)
     return e_tree
 
@@ -8,6 +8,7 @@
 
 """Task for OAI."""
 
+import pickle
 from time import sleep
 
 from celery import group, shared_task
@@ -76,3 +77,35 @@ def update_affected_records(spec=None, search_pattern=None):
         update_records_sets.s(list(filter(None, chunk)))
         for chunk in zip_longest(*[iter(record_ids)] * chunk_size)
     )()
+
+
+@shared_task(ignore_result=True)
+def cache_records_metadata(record_ids):
+    """Serialize and cache the metadata of records for every metadataPrefix.
+
+    :param record_ids: List of record UUID.
+    """
+    from weko_deposit.api import WekoRecord
+    from weko_schema_ui.schema import get_oai_metadata_formats
+
+    from .provider import OAIIDProvider
+    from .response import get_record_metadata, set_identifier
+    from .utils import get_metadata_generation
+
+    if get_metadata_generation() is None:
+        # Metadata can not be cached
+        return
+    with current_app.test_request_context(
+            current_app.config.get('THEME_SITEURL', '/')):
+        metadata_prefixes = list(get_oai_metadata_formats(current_app))
+        for record in WekoRecord.get_records(record_ids):
+            try:
+                pid = OAIIDProvider.get(pid_value=record['_oai']['id']).pid
+                set_identifier(record, record)
+                for metadata_prefix in metadata_prefixes:
+                    get_record_metadata(
+                        pid, pickle.loads(pickle.dumps(record, -1)),
+                        metadata_prefix)
+            except Exception as e:
+                current_app.logger.error(
+                    'Failed to cache metadata of {}: {}'.format(record.id, e))
@@ -13,11 +13,19 @@ from __future__ import absolute_import, print_function
 from datetime import datetime
 from functools import partial
 
-from flask import current_app
+from flask import current_app, request
+from flask_babelex import to_utc
+from invenio_cache import current_cache
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+from invenio_records.models import RecordMetadata
 from lxml import etree
 from lxml.builder import E
 from lxml.etree import Element
+from sqlalchemy import func
 from weko_index_tree.api import Indexes
+from weko_index_tree.utils import get_index_tree_generation
+from weko_redis.redis import RedisConnection
 from weko_schema_ui.schema import get_oai_metadata_formats
 from werkzeug.utils import import_string
 
@@ -182,6 +190,8 @@ def handle_license_free(record_metadata):
 
     Delete licensetype when licensetype equal 'license_free'
     but licensefree is empty.
+    Nested values are not changed, the changed file values are replaced
+    by their copies in record_metadata.
 
     :param record_metadata: Record's Metadata.
     :returns: Directed edit.
@@ -196,26 +206,64 @@ def handle_license_free(record_metadata):
     if _license_dict:
         _license_type_free = _license_dict[0].get('value')
 
-    for val in record_metadata.values():
+    for key, val in list(record_metadata.items()):
         if isinstance(val, dict) and \
                 val.get('attribute_type') == _attribute_type:
-            for attr in val.get(_attribute_value_mlt, {}):
+            attrs = val.get(_attribute_value_mlt, {})
+            if not any(attr.get(_license_type) == _license_type_free
+                       for attr in attrs):
+                continue
+            new_attrs = []
+            for attr in attrs:
                 if attr.get(_license_type) == _license_type_free:
+                    attr = dict(attr)
                     if attr.get(_license_free):
                         attr[_license_type] = attr.get(_license_free)
                         del attr[_license_free]
                     else:
                         del attr[_license_type]
+                new_attrs.append(attr)
+            record_metadata[key] = dict(val, **{_attribute_value_mlt: new_attrs})
 
     return record_metadata
 
 
-def get_index_state():
+def _get_harvest_cache(kind, version, create):
+    """Get data for harvesting from the cache or create it.
+
+    :param kind: Kind of the cached data.
+    :param version: Version of the data, None not to use the cache.
+    :param create: Function returning the data and its timeout in seconds.
+    :returns: The data.
+    """
+    if version is None:
+        return create()[0]
+    cache_key = current_app.config['OAISERVER_HARVEST_CACHE_KEY'].format(
+        kind, version)
+    data = current_cache.get(cache_key)
+    if data is None:
+        data, timeout = create()
+        if timeout > 0:
+            current_cache.set(cache_key, data, timeout=timeout)
+    return data
+
+
+def _make_index_state():
+    """Make harvest visibility of all indexes.
+
+    :returns: The index state and seconds until the next index public date.
+    """
     from weko_records_ui.utils import is_future
     index_state = {}
+    timeout = current_app.config['OAISERVER_HARVEST_CACHE_TIMEOUT']
+    now = datetime.utcnow()
     ids = Indexes.get_all_indexes()
     for index in ids:
         index_id = str(index.id)
+        if index.public_date and is_future(index.public_date):
+            # The state changes when the public date comes
+            timeout = min(timeout, int(
+                (to_utc(index.public_date) - now).total_seconds()))
         if not index.harvest_public_state:
             index_state[index_id] = {
                 'parent': None,
@@ -234,7 +282,119 @@ def get_index_state():
                 'parent': str(index.parent),
                 'msg': OUTPUT_HARVEST
             }
-    return index_state
+    return index_state, timeout
+
+
+def get_index_state():
+    """Get harvest visibility of all indexes.
+
+    The state is cached per generation of the index tree.
+    """
+    return _get_harvest_cache(
+        'index_state', get_index_tree_generation(), _make_index_state)
+
+
+def get_harvested_index_list():
+    """Get ids of the indexes which are public for harvesting."""
+    return _get_harvest_cache(
+        'index_list', get_index_tree_generation(),
+        lambda: (Indexes.get_harverted_index_list(),
+                 current_app.config['OAISERVER_HARVEST_CACHE_TIMEOUT']))
+
+
+def get_doi_exclusion_ids():
+    """Get ids of the records with DOI which must not be harvested.
+
+    A record with a registered DOI is not harvested when its indexes are not
+    public. The ids are cached per generation of the index tree and per
+    state of the DOI and its records.
+    """
+    def _make_exclusion_ids():
+        index_state, timeout = _make_index_state()
+        query = db.session.query(
+            RecordMetadata.id, RecordMetadata.json
+        ).join(
+            PersistentIdentifier,
+            PersistentIdentifier.object_uuid == RecordMetadata.id
+        ).filter(
+            PersistentIdentifier.pid_type == 'doi',
+            PersistentIdentifier.status == PIDStatus.REGISTERED
+        )
+        ids = []
+        for record_id, record_json in query.yield_per(1000):
+            path_list = [str(path) for path in
+                         (record_json or {}).get('path', [])]
+            if path_list and \
+                    is_output_harvest(path_list, index_state) != OUTPUT_HARVEST:
+                ids.append(str(record_id))
+        return ids, timeout
+
+    generation = get_index_tree_generation()
+    version = None
+    if generation is not None:
+        count, pid_updated, record_updated = db.session.query(
+            func.count(PersistentIdentifier.id),
+            func.max(PersistentIdentifier.updated),
+            func.max(RecordMetadata.updated)
+        ).join(
+            RecordMetadata,
+            RecordMetadata.id == PersistentIdentifier.object_uuid
+        ).filter(
+            PersistentIdentifier.pid_type == 'doi',
+            PersistentIdentifier.status == PIDStatus.REGISTERED
+        ).one()
+        version = '{}_{}_{}_{}'.format(
+            generation, count,
+            pid_updated.timestamp() if pid_updated else 0,
+            record_updated.timestamp() if record_updated else 0)
+    return _get_harvest_cache('doi_exclusion', version, _make_exclusion_ids)
+
+
+def get_metadata_generation():
+    """Get the generation of the cached metadata.
+
+    The generation is increased each time item type mappings or schemas are
+    changed, and is part of the keys of the cached metadata.
+    """
+    try:
+        redis_connection = RedisConnection()
+        datastore = redis_connection.connection(
+            db=current_app.config['CACHE_REDIS_DB'])
+        value = datastore.get(
+            current_app.config['OAISERVER_METADATA_GENERATION_KEY'])
+        return int(value) if value else 0
+    except Exception as ex:
+        current_app.logger.error(ex)
+        return None
+
+
+def update_metadata_generation():
+    """Increase the generation of the cached metadata."""
+    try:
+        redis_connection = RedisConnection()
+        datastore = redis_connection.connection(
+            db=current_app.config['CACHE_REDIS_DB'])
+        datastore.incr(current_app.config['OAISERVER_METADATA_GENERATION_KEY'])
+    except Exception as ex:
+        current_app.logger.error(ex)
+
+
+def get_metadata_cache_key(record, metadata_prefix):
+    """Get the key of the cached metadata element of a record.
+
+    :param record: The record.
+    :param metadata_prefix: The metadataPrefix.
+    :returns: The key, or None if the metadata must not be cached.
+    """
+    generation = get_metadata_generation()
+    if generation is None or record.revision_id is None:
+        return None
+    return current_app.config['OAISERVER_METADATA_CACHE_KEY'].format(
+        generation=generation,
+        record_id=record.id,
+        revision_id=record.revision_id,
+        prefix=metadata_prefix,
+        url_root=request.url_root)
 
 
 def is_output_harvest(path_list, index_state):
@@ -1,3 +1,4 @@
+from mock import MagicMock
 
 from invenio_oaiserver.models import OAISet
 from invenio_oaiserver.proxies import current_oaiserver
@@ -5,7 +6,13 @@ from invenio_oaiserver.receivers import (
     OAIServerUpdater,
     after_update_oai_set,
     after_delete_oai_set,
-    after_insert_oai_set
+    after_insert_oai_set,
+    after_commit_record,
+    after_change_metadata_schema,
+    after_commit_metadata_schema,
+    after_commit_records,
+    metadata_records_hook,
+    metadata_schema_hook
 )
 # .tox/c1/bin/pytest --cov=invenio_oaiserver tests/test_receivers.py -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiserver/.tox/c1/tmp
 
@@ -74,4 +81,77 @@ def test_after_delete_oai_set(app,db,mocker):
             return "test_spec"
     mocker.patch("invenio_oaiserver.receivers._delete_percolator")
     mocker.patch("invenio_oaiserver.receivers.update_affected_records.delay")
-    after_delete_oai_set(None,None,Target())
\ No newline at end of file
+    after_delete_oai_set(None,None,Target())
+# def after_commit_record(sender, record=None, **kwargs):
+# .tox/c1/bin/pytest --cov=invenio_oaiserver tests/test_receivers.py::test_after_commit_record -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiserver/.tox/c1/tmp
+def test_after_commit_record(app,db):
+    class Record(dict):
+        id = "test_uuid"
+    db.session.info.pop("oaiserver_metadata_records", None)
+    # not _oai.id
+    after_commit_record(app, record=Record())
+    assert "oaiserver_metadata_records" not in db.session.info
+
+    after_commit_record(app, record=Record(_oai={"id": "oai:test:1"}))
+    assert db.session.info["oaiserver_metadata_records"] == {"test_uuid": True}
+    db.session.info.pop("oaiserver_metadata_records")
+
+# def after_change_metadata_schema(mapper, connection, target):
+# def after_commit_metadata_schema(session, changes):
+# def after_commit_records(session, record_ids):
+# .tox/c1/bin/pytest --cov=invenio_oaiserver tests/test_receivers.py::test_after_commit_metadata -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiserver/.tox/c1/tmp
+def test_after_commit_metadata(app,db,mocker):
+    with app.app_context():
+        mock_update = mocker.patch("invenio_oaiserver.receivers.update_metadata_generation")
+        mock_delay = mocker.patch("invenio_oaiserver.receivers.cache_records_metadata.delay")
+        mocker.patch("invenio_oaiserver.receivers.object_session", return_value=db.session)
+        # registered by the extension, listening again is ignored
+        metadata_schema_hook.register()
+        metadata_records_hook.register()
+        # The generation is increased only after the outermost commit.
+        with db.session.begin_nested():
+            after_change_metadata_schema(None,None,None)
+            metadata_records_hook.add(db.session, "uuid2")
+            metadata_records_hook.add(db.session, "uuid1")
+        mock_update.assert_not_called()
+        mock_delay.assert_not_called()
+        db.session.commit()
+        mock_update.assert_called_once()
+        mock_delay.assert_called_once_with(["uuid1", "uuid2"])
+        assert "oaiserver_metadata_changed" not in db.session.info
+        assert "oaiserver_metadata_records" not in db.session.info
+
+        # A caught SAVEPOINT rollback keeps the changes.
+        mock_update.reset_mock()
+        after_change_metadata_schema(None,None,None)
+        try:
+            with db.session.begin_nested():
+                raise ValueError
+        except ValueError:
+            pass
+        db.session.commit()
+        mock_update.assert_called_once()
+
+        # Rolled back changes are forgotten.
+        mock_update.reset_mock()
+        mock_delay.reset_mock()
+        after_change_metadata_schema(None,None,None)
+        metadata_records_hook.add(db.session, "uuid1")
+        db.session.rollback()
+        assert "oaiserver_metadata_changed" not in db.session.info
+        assert "oaiserver_metadata_records" not in db.session.info
+        db.session.commit()
+        mock_update.assert_not_called()
+        mock_delay.assert_not_called()
+
+        # Too many records are not cached in background.
+        app.config["OAISERVER_METADATA_CACHE_PREFILL_MAX"] = 1
+        after_commit_records(db.session, {"uuid2": True, "uuid1": True})
+        mock_delay.assert_not_called()
+        after_commit_metadata_schema(db.session, {None: True})
+        mock_update.assert_called_once()
+
+        # The rate limit of the task is configured by the app.
+        from invenio_oaiserver.tasks import cache_records_metadata
+        assert cache_records_metadata.rate_limit == \
+            app.config["OAISERVER_METADATA_CACHE_TASK_RATE_LIMIT"]
@@ -35,6 +35,8 @@ from invenio_oaiserver.response import (
     NS_DC, NS_OAIDC, NS_OAIPMH,NS_JPCOAR,
     is_private_index,
     getrecord, 
+    get_page_records,
+    get_record_metadata,
     listrecords,
     is_pubdate_in_future, 
     listidentifiers, 
@@ -752,11 +754,12 @@ def test_listidentifiers(es_app,records,item_type,mock_execute,db,mocker):
         )
         with patch("invenio_oaiserver.response.get_records",return_value=MockPagenation(dummy_data)):
             # raise PIDDoesNotExistError
-            with patch("invenio_oaiserver.response.OAIIDProvider.get",side_effect=PIDDoesNotExistError("test pid_type","test pid_value")):
+            with patch("invenio_oaiserver.response.PersistentIdentifier.query") as mock_query:
+                mock_query.filter.return_value.all.return_value = []
                 res=listidentifiers(**kwargs)
                 assert res.xpath("/x:OAI-PMH/x:error",namespaces=NAMESPACES)[0].attrib["code"] == "noRecordsMatch"
             # raise NoResultFound
-            with patch("invenio_oaiserver.response.WekoRecord.get_record_by_uuid",side_effect=NoResultFound()):
+            with patch("invenio_oaiserver.response.WekoRecord.get_records",return_value=[]):
                 res=listidentifiers(**kwargs)
                 assert res.xpath("/x:OAI-PMH/x:error",namespaces=NAMESPACES)[0].attrib["code"] == "noRecordsMatch"
 
@@ -1053,15 +1056,71 @@ def test_listrecords(es_app,records,item_type,mock_execute,db,mocker):
         )
         with patch("invenio_oaiserver.response.get_records",return_value=MockPagenation(dummy_data)):
             # raise PIDDoesNotExistError
-            with patch("invenio_oaiserver.response.OAIIDProvider.get",side_effect=PIDDoesNotExistError("test pid_type","test pid_value")):
+            with patch("invenio_oaiserver.response.PersistentIdentifier.query") as mock_query:
+                mock_query.filter.return_value.all.return_value = []
                 res=listrecords(**kwargs)
                 assert res.xpath("/x:OAI-PMH/x:error",namespaces=NAMESPACES)[0].attrib["code"] == "noRecordsMatch"
             # raise NoResultFound
-            with patch("invenio_oaiserver.response.WekoRecord.get_record_by_uuid",side_effect=NoResultFound()):
+            with patch("invenio_oaiserver.response.WekoRecord.get_records",return_value=[]):
                 res=listrecords(**kwargs)
                 assert res.xpath("/x:OAI-PMH/x:error",namespaces=NAMESPACES)[0].attrib["code"] == "noRecordsMatch"
 
 
+# def get_page_records(items):
+# .tox/c1/bin/pytest --cov=invenio_oaiserver tests/test_response.py::test_get_page_records -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiserver/.tox/c1/tmp
+def test_get_page_records(app,records,db):
+    assert get_page_records([]) == ({}, {})
+
+    items = [
+        {"id": str(records[i][2].id),
+         "json": {"_source": {"_oai": {"id": str(records[i][0])}}}}
+        for i in range(3)
+    ]
+    items.append({"id": "not_exist",
+                  "json": {"_source": {"_oai": {"id": "not_exist"}}}})
+    pids, recs = get_page_records(items)
+    assert sorted(pids.keys()) == sorted(str(records[i][0]) for i in range(3))
+    for i in range(3):
+        pid_object = pids[str(records[i][0])]
+        assert pid_object.object_uuid == records[i][2].id
+        assert recs[str(pid_object.object_uuid)]["publish_date"] == records[i][2]["publish_date"]
+        assert isinstance(recs[str(pid_object.object_uuid)], WekoRecord)
+
+
+# def get_record_metadata(pid, record, metadata_prefix):
+# .tox/c1/bin/pytest --cov=invenio_oaiserver tests/test_response.py::test_get_record_metadata -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiserver/.tox/c1/tmp
+def test_get_record_metadata(app,mocker):
+    record = {"system_identifier_doi": "DOI", "item_1": {"attribute_name": "Title"}}
+    element = Element("root")
+    SubElement(element, "title").text = "test"
+    mock_dumper = mocker.MagicMock(return_value=element)
+    mocker.patch("invenio_oaiserver.response.serializer", return_value=mock_dumper)
+    mock_cache = mocker.patch("invenio_oaiserver.response.current_cache")
+
+    # not cached
+    mock_cache.get.return_value = None
+    with patch("invenio_oaiserver.response.get_metadata_cache_key", return_value="test_key"):
+        assert get_record_metadata("pid", record, "jpcoar_1.0") == element
+    mock_dumper.assert_called_once_with("pid", {"_source": record})
+    mock_cache.set.assert_called_once_with(
+        "test_key", etree.tostring(element), timeout=60 * 60 * 24)
+
+    # cached
+    mock_dumper.reset_mock()
+    mock_cache.get.return_value = etree.tostring(element)
+    with patch("invenio_oaiserver.response.get_metadata_cache_key", return_value="test_key"):
+        result = get_record_metadata("pid", record, "jpcoar_1.0")
+    assert etree.tostring(result) == etree.tostring(element)
+    mock_dumper.assert_not_called()
+
+    # cache is not available
+    mock_cache.reset_mock()
+    with patch("invenio_oaiserver.response.get_metadata_cache_key", return_value=None):
+        assert get_record_metadata("pid", record, "jpcoar_1.0") == element
+    mock_cache.get.assert_not_called()
+    mock_cache.set.assert_not_called()
+
+
 # def envelope(**kwargs):
 # .tox/c1/bin/pytest --cov=invenio_oaiserver tests/test_response.py::test_envelope -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiserver/.tox/c1/tmp
 def test_envelope(app):
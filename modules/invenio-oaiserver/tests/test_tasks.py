@@ -4,7 +4,7 @@ from flask import current_app
 from invenio_records.models import RecordMetadata
 from invenio_oaiserver.models import OAISet
 
-from invenio_oaiserver.tasks import _records_commit,update_records_sets, update_affected_records
+from invenio_oaiserver.tasks import _records_commit,update_records_sets, update_affected_records, cache_records_metadata
 # .tox/c1/bin/pytest --cov=invenio_oaiserver tests/test_tasks.py -vv -s --cov-branch --cov-report=term --cov-report=html --basetemp=/code/modules/invenio-oaiserver/.tox/c1/tmp
 
 
@@ -57,4 +57,23 @@ def test_update_affected_records(app,db,without_oaiset_signals,mocker):
     
     db.session.add(oai)
     db.session.commit()
-    update_affected_records.delay(oai.spec,oai.search_pattern)
\ No newline at end of file
+    update_affected_records.delay(oai.spec,oai.search_pattern)
+
+# def cache_records_metadata(record_ids):
+# .tox/c1/bin/pytest --cov=invenio_oaiserver tests/test_tasks.py::test_cache_records_metadata -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiserver/.tox/c1/tmp
+def test_cache_records_metadata(app,mocker):
+    from weko_deposit.api import WekoRecord
+    ids = [uuid.uuid4()]
+    mocker.patch("weko_deposit.api.WekoRecord.get_records", return_value=[WekoRecord({"_oai": {"id": "oai:test:1"}})])
+    mocker.patch("invenio_oaiserver.provider.OAIIDProvider.get")
+    mocker.patch("invenio_oaiserver.response.set_identifier")
+    mock_metadata = mocker.patch("invenio_oaiserver.response.get_record_metadata")
+    # metadata can not be cached
+    mocker.patch("invenio_oaiserver.utils.get_metadata_generation", return_value=None)
+    cache_records_metadata(ids)
+    mock_metadata.assert_not_called()
+
+    mocker.patch("invenio_oaiserver.utils.get_metadata_generation", return_value=1)
+    mocker.patch("weko_schema_ui.schema.get_oai_metadata_formats", return_value={"jpcoar_1.0": {}, "oai_dc": {}})
+    cache_records_metadata(ids)
+    assert [args[2] for args, _ in mock_metadata.call_args_list] == ["jpcoar_1.0", "oai_dc"]
@@ -1,5 +1,6 @@
 
-from mock import patch
+from mock import MagicMock, patch
+import uuid
 import copy
 import pytest
 from datetime import datetime
@@ -15,7 +16,10 @@ from invenio_oaiserver.utils import (
     eprints_description,
     handle_license_free,
     get_index_state,
-    is_output_harvest
+    get_doi_exclusion_ids,
+    get_metadata_cache_key,
+    is_output_harvest,
+    _get_harvest_cache
 )
 
 from tests.helpers import create_record2
@@ -132,8 +136,11 @@ def test_handle_license_free(app):
         "item_1617186331708": {"attribute_name": "Title"}
     }
     data1 = copy.deepcopy(data)
+    files = data1["item_1617605131499"]
     result = handle_license_free(data1)
     assert result == test
+    # nested values are not changed
+    assert files == data["item_1617605131499"]
     current_app.config.update(WEKO_RECORDS_UI_LICENSE_DICT=[])
     handle_license_free(data)
     
@@ -181,6 +188,88 @@ def test_get_index_state(app, db):
     result = get_index_state()
     assert result == test
 
+#def _get_harvest_cache(kind, version, create):
+# .tox/c1/bin/pytest --cov=invenio_oaiserver tests/test_utils.py::test_get_harvest_cache -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiserver/.tox/c1/tmp
+def test_get_harvest_cache(app):
+    create = MagicMock(return_value=({"1": "data"}, 100))
+    # version is None
+    with patch("invenio_oaiserver.utils.current_cache") as mock_cache:
+        assert _get_harvest_cache("index_state", None, create) == {"1": "data"}
+        mock_cache.get.assert_not_called()
+
+    # not cached
+    with patch("invenio_oaiserver.utils.current_cache") as mock_cache:
+        mock_cache.get.return_value = None
+        assert _get_harvest_cache("index_state", 1, create) == {"1": "data"}
+        mock_cache.set.assert_called_once_with(
+            "oaiserver_harvest_index_state_1", {"1": "data"}, timeout=100)
+
+    # cached
+    create.reset_mock()
+    with patch("invenio_oaiserver.utils.current_cache") as mock_cache:
+        mock_cache.get.return_value = {"2": "cached"}
+        assert _get_harvest_cache("index_state", 1, create) == {"2": "cached"}
+        create.assert_not_called()
+
+    # public date is coming, not cached
+    create = MagicMock(return_value=({"1": "data"}, 0))
+    with patch("invenio_oaiserver.utils.current_cache") as mock_cache:
+        mock_cache.get.return_value = None
+        assert _get_harvest_cache("index_state", 1, create) == {"1": "data"}
+        mock_cache.set.assert_not_called()
+
+#def get_doi_exclusion_ids():
+# .tox/c1/bin/pytest --cov=invenio_oaiserver tests/test_utils.py::test_get_doi_exclusion_ids -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiserver/.tox/c1/tmp
+def test_get_doi_exclusion_ids(app, db):
+    from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+    from invenio_records.models import RecordMetadata
+    from weko_index_tree.models import Index
+
+    index1 = Index(
+        parent=0,
+        position=1,
+        index_name_english="test_index1",
+        index_link_name_english="test_index_link1",
+        harvest_public_state=True,
+        public_state=True,
+        browsing_role="3,-99"
+    )
+    index2 = Index(# public date is future
+        parent=0,
+        position=2,
+        index_name_english="test_index2",
+        index_link_name_english="test_index_link2",
+        harvest_public_state=True,
+        public_state=True,
+        public_date=datetime(2100, 1, 1),
+        browsing_role="3,-99"
+    )
+    db.session.add_all([index1, index2])
+    records = []
+    for i, path in enumerate([["1"], ["2"], ["1", "2"]]):
+        rec_uuid = uuid.uuid4()
+        PersistentIdentifier.create(
+            "doi", "https://doi.org/0000{}".format(i), object_type="rec",
+            object_uuid=rec_uuid, status=PIDStatus.REGISTERED)
+        db.session.add(RecordMetadata(id=rec_uuid, json={"path": path}))
+        records.append(rec_uuid)
+    db.session.commit()
+
+    with patch("invenio_oaiserver.utils.get_index_tree_generation", return_value=None):
+        assert get_doi_exclusion_ids() == [str(records[1])]
+
+#def get_metadata_cache_key(record, metadata_prefix):
+# .tox/c1/bin/pytest --cov=invenio_oaiserver tests/test_utils.py::test_get_metadata_cache_key -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiserver/.tox/c1/tmp
+def test_get_metadata_cache_key(app):
+    record = MagicMock(id="test_uuid", revision_id=2)
+    with app.test_request_context():
+        with patch("invenio_oaiserver.utils.get_metadata_generation", return_value=3):
+            assert get_metadata_cache_key(record, "jpcoar_1.0") == \
+                "oaiserver_metadata_3_test_uuid_2_jpcoar_1.0_http://app/"
+        # redis is not available
+        with patch("invenio_oaiserver.utils.get_metadata_generation", return_value=None):
+            assert get_metadata_cache_key(record, "jpcoar_1.0") is None
+
 #def is_output_harvest(path_list, index_state):
 #    def _check(index_id):
 # .tox/c1/bin/pytest --cov=invenio_oaiserver tests/test_utils.py::test_is_output_harvest -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-oaiserver/.tox/c1/tmp
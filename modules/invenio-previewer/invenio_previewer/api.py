@@ -28,9 +28,11 @@ from __future__ import absolute_import, print_function
 
 import errno
 import os
+import queue
 import re
 import shutil
 import subprocess
+import threading
 from os.path import basename, splitext
 from time import sleep
 
@@ -100,6 +102,30 @@ class PreviewFile(object):
         return self.file.file.storage().open()
 
 
+_converter_slots = None
+_converter_slots_pid = None
+_converter_slots_lock = threading.Lock()
+
+
+def get_converter_slots():
+    """Get the queue of the converter slots of this process.
+
+    Each slot has its own LibreOffice user profile which is kept between
+    conversions, so that LibreOffice does not have to create it at each
+    start and the conversions of the slots can run at the same time.
+    """
+    global _converter_slots, _converter_slots_pid
+    with _converter_slots_lock:
+        if _converter_slots is None or _converter_slots_pid != os.getpid():
+            slots = queue.Queue()
+            for slot in range(
+                    current_app.config['PREVIEWER_CONVERT_PDF_WORKERS']):
+                slots.put(slot)
+            _converter_slots = slots
+            _converter_slots_pid = os.getpid()
+        return _converter_slots
+
+
 def convert_to(folder, source):
     """Convert file to pdf."""
     def redirect_detail_page(pid_value):
@@ -111,8 +137,20 @@ def convert_to(folder, source):
         )
 
     timeout = current_app.config['PREVIEWER_CONVERT_PDF_TIMEOUT']
+    pid_value = request.path.split('/').pop(2)
+    # Wait for a free converter slot of this process.
+    slots = get_converter_slots()
+    try:
+        slot = slots.get(timeout=timeout)
+    except queue.Empty:
+        current_app.logger.error('no converter to pdf is available')
+        raise LibreOfficeError('')
+    profile_folder = os.path.join(
+        current_app.config['PREVIEWER_CONVERT_PDF_PROFILE_DIR'],
+        '{}_{}'.format(os.getpid(), slot))
     args = [
         'libreoffice',
+        '-env:UserInstallation=file://' + profile_folder,
         '--headless',
         '--convert-to',
         'pdf',
@@ -121,18 +159,13 @@ def convert_to(folder, source):
         source
     ]
     os_env = dict(os.environ)
-    temp_folder = "/tmp/" + source.split("/")[-2] + "_libreoffice"
-
-    if os.path.exists(temp_folder):
-        shutil.rmtree(temp_folder)
-
-    os.mkdir(temp_folder)
     # Change home var for next subprocess for process runs faster.
-    os_env['HOME'] = temp_folder
+    os_env['HOME'] = profile_folder
     filename = err_txt = None
-    pid_value = request.path.split('/').pop(2)
+    output = ''
 
     try:
+        os.makedirs(profile_folder, exist_ok=True)
         process_count = 0
 
         while (
@@ -146,10 +179,8 @@ def convert_to(folder, source):
                 env=os_env,
                 timeout=timeout
             )
-            filename = re.search(
-                '-> (.*?) using filter',
-                process.stdout.decode()
-            )
+            output = process.stdout.decode()
+            filename = re.search('-> (.*?) using filter', output)
 
             if not filename:
                 current_app.logger.debug(
@@ -192,15 +223,43 @@ def convert_to(folder, source):
         flash(err_txt, category='error')
         redirect_detail_page(pid_value)
     finally:
-        shutil.rmtree(temp_folder)
+        if not filename:
+            # The profile may be broken, make a new one at the next time.
+            shutil.rmtree(profile_folder, ignore_errors=True)
+        slots.put(slot)
 
     if filename is None:
         current_app.logger.error('convert to pdf failure')
-        raise LibreOfficeError(process.stdout.decode())
+        raise LibreOfficeError(output)
     else:
         return filename.group(1)
 
 
+def convert_to_cache(cache_folder, source, cache_name='data.pdf'):
+    """Convert file to pdf in a cache folder.
+
+    The file is converted in a temporary folder and moved into the cache
+    folder, so that the other processes never read an incomplete PDF.
+
+    :param cache_folder: Folder of the converted PDF.
+    :param source: Path of the file to convert.
+    :param cache_name: File name of the converted PDF.
+    :return: Path of the converted PDF.
+    """
+    cache_path = os.path.join(cache_folder, cache_name)
+    if os.path.isfile(cache_path):
+        return cache_path
+    work_folder = '{}_{}_{}'.format(
+        cache_folder, os.getpid(), threading.get_ident())
+    try:
+        converted = convert_to(work_folder, source)
+        os.makedirs(cache_folder, exist_ok=True)
+        os.replace(converted, cache_path)
+    finally:
+        shutil.rmtree(work_folder, ignore_errors=True)
+    return cache_path
+
+
 class LibreOfficeError(Exception):
     """Libreoffice process error."""
 
@@ -73,3 +73,9 @@ PREVIEWER_CONVERT_PDF_RETRY_COUNT = 5
 
 PREVIEWER_CONVERT_PDF_TIMEOUT = 80
 """"Timout of converting file to PDF."""
+
+PREVIEWER_CONVERT_PDF_WORKERS = 2
+"""Number of files converted to PDF at the same time by a process."""
+
+PREVIEWER_CONVERT_PDF_PROFILE_DIR = '/tmp/libreoffice_profiles'
+"""Folder of the LibreOffice user profiles of the converters."""
@@ -2,7 +2,8 @@ import pytest
 import os
 from mock import patch, MagicMock
 
-from invenio_previewer.api import PreviewFile, convert_to, LibreOfficeError
+from invenio_previewer.api import PreviewFile, convert_to, convert_to_cache, \
+    get_converter_slots, LibreOfficeError
 
 
 # class PreviewFile(object): 
@@ -86,6 +87,55 @@ def test_convert_to(app):
             pass
         
 
+# def get_converter_slots():
+def test_get_converter_slots(app):
+    app.config['PREVIEWER_CONVERT_PDF_WORKERS'] = 2
+    with app.test_request_context():
+        slots = get_converter_slots()
+        assert get_converter_slots() is slots
+        assert slots.qsize() == 2
+
+
+# def convert_to(folder, source):
+def test_convert_to_profile(app, tmpdir):
+    app.config['PREVIEWER_CONVERT_PDF_PROFILE_DIR'] = str(tmpdir)
+    process = MagicMock()
+    process.stdout = b"convert /tmp/a/data -> /tmp/b/data.pdf using filter : writer_pdf_Export"
+    with app.test_request_context("/records/1/files/data"):
+        with patch('invenio_previewer.api.subprocess.run', return_value=process) as mock_run:
+            assert convert_to("/tmp/b", "/tmp/a/data") == "/tmp/b/data.pdf"
+            args = mock_run.call_args[0][0]
+            assert args[1].startswith("-env:UserInstallation=file://" + str(tmpdir))
+        # the slot is released
+        assert get_converter_slots().qsize() == app.config['PREVIEWER_CONVERT_PDF_WORKERS']
+
+
+# def convert_to_cache(cache_folder, source, cache_name='data.pdf'):
+def test_convert_to_cache(app, tmpdir):
+    cache_folder = os.path.join(str(tmpdir), "pdf_dir", "md5_test")
+
+    def mock_convert(folder, source):
+        os.makedirs(folder)
+        with open(os.path.join(folder, "data.pdf"), "w") as f:
+            f.write("pdf")
+        return os.path.join(folder, "data.pdf")
+
+    with patch('invenio_previewer.api.convert_to', side_effect=mock_convert) as mock_convert_to:
+        path = convert_to_cache(cache_folder, "/tmp/a/data")
+        assert path == os.path.join(cache_folder, "data.pdf")
+        assert os.path.isfile(path)
+        assert os.listdir(os.path.dirname(cache_folder)) == ["md5_test"]
+
+        # converted only once
+        assert convert_to_cache(cache_folder, "/tmp/a/data") == path
+        assert mock_convert_to.call_count == 1
+
+    with patch('invenio_previewer.api.convert_to', side_effect=LibreOfficeError("")):
+        with pytest.raises(LibreOfficeError):
+            convert_to_cache(os.path.join(str(tmpdir), "pdf_dir", "md5_error"), "/tmp/a/data")
+        assert os.listdir(os.path.join(str(tmpdir), "pdf_dir")) == ["md5_test"]
+
+
 # class LibreOfficeError(Exception):
 def test_LibreOfficeError(app):
     test = LibreOfficeError(
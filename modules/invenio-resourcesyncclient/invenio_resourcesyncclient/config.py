@@ -45,7 +45,8 @@ INVENIO_RESYNC_INDEXES_SAVING_FORMAT = {
 INVENIO_RESYNC_LOGS_STATUS = {
     'successful': "Successful",
     'running': 'Running',
-    'failed': 'Failed'
+    'failed': 'Failed',
+    'suspended': 'Suspended'
 }
 
 INVENIO_RESYNC_SAVE_PATH = '/tmp/resync/'
@@ -55,3 +56,15 @@ INVENIO_RESYNC_MODE = True
 
 INVENIO_RESYNC_ENABLE_ITEM_VERSIONING = False
 """ If True, the version of the item will be updated upon import.  """
+
+INVENIO_RESYNC_FETCH_WORKERS = 8
+"""Number of resources fetched concurrently on import."""
+
+INVENIO_RESYNC_IMPORT_BATCH_SIZE = 100
+"""Number of resources imported per commit, progress is saved per batch."""
+
+INVENIO_RESYNC_RETRY_COUNT = 5
+"""Number of retries of a failed GetRecord request."""
+
+INVENIO_RESYNC_BACKOFF_FACTOR = 1.0
+"""Backoff factor between the retries of a GetRecord request."""
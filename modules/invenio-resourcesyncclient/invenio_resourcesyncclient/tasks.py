@@ -24,6 +24,7 @@ import os
 import signal
 import ssl
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from urllib.parse import urlparse
 
@@ -36,11 +37,16 @@ from invenio_db import db
 from invenio_oaiharvester.harvester import DCMapper, DDIMapper, JPCOARMapper
 from invenio_oaiharvester.tasks import event_counter
 from lxml import etree
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+from weko_deposit.api import WekoIndexer
 
 from .api import ResyncHandler
-from .config import INVENIO_RESYNC_INDEXES_MODE, \
-    INVENIO_RESYNC_INDEXES_STATUS, INVENIO_RESYNC_LOGS_STATUS, \
-    INVENIO_RESYNC_MODE, INVENIO_RESYNC_SAVE_PATH
+from .config import INVENIO_RESYNC_BACKOFF_FACTOR, \
+    INVENIO_RESYNC_FETCH_WORKERS, INVENIO_RESYNC_IMPORT_BATCH_SIZE, \
+    INVENIO_RESYNC_INDEXES_MODE, INVENIO_RESYNC_INDEXES_STATUS, \
+    INVENIO_RESYNC_LOGS_STATUS, INVENIO_RESYNC_MODE, \
+    INVENIO_RESYNC_RETRY_COUNT, INVENIO_RESYNC_SAVE_PATH
 from .models import ResyncIndexes, ResyncLogs
 from .utils import get_list_records, process_item, process_sync
 
@@ -76,7 +82,6 @@ def run_sync_import(id):
     start_time = datetime.now()
     resync = db.session.query(ResyncIndexes).filter_by(id=id).first()
     counter = init_counter()
-    resync_index = ResyncHandler.get_resync(id)
     resync_log = prepare_log(
         resync,
         id,
@@ -93,51 +98,51 @@ def run_sync_import(id):
             pause = True
 
         signal.signal(signal.SIGTERM, sigterm_handler)
-        base = get_list_records(resync.id)
         while True:
             current_app.logger.info('[{0}] [{1}]'.format(
                 0, 'Processing records'))
-            # for record_id in records:
             try:
                 hostname = urlparse(resync.base_url)
                 records = get_list_records(resync.id)
                 current_app.logger.debug(
                     "len(records):{0}".format(len(records)))
-                successful = []
-                for i in records:
-                    try:
-                        current_app.logger.debug('{0} {1} {2}: {3}'.format(
-                            __file__, 'run_sync_import()', 'resource', i))
-                        if INVENIO_RESYNC_MODE:
-                            record = get_record_from_file(i)
-                        else:
-                            record = get_record(
-                                url='{}://{}/oai'.format(
-                                    hostname.scheme,
-                                    hostname.netloc
-                                ),
-                                record_id=i,
-                                metadata_prefix='jpcoar_1.0',
-                            )
-
-                        if len(record) == 1:
-                            process_item(record[0], resync, counter)
-                            db.session.commit()
-                            successful.append(i)
-                    except Exception as ex:
-                        db.session.rollback()
-                        current_app.logger.exception(
-                            'Error occurred while importing item')
-                        current_app.logger.error(ex)
-                        event_counter('error_items', counter)
-                        continue
-
-                for item in successful:
-                    records.remove(item)
-
-                resync_index.update({
-                    'result': json.dumps(records)
-                })
+                batch_size = current_app.config.get(
+                    'INVENIO_RESYNC_IMPORT_BATCH_SIZE',
+                    INVENIO_RESYNC_IMPORT_BATCH_SIZE)
+                workers = current_app.config.get(
+                    'INVENIO_RESYNC_FETCH_WORKERS',
+                    INVENIO_RESYNC_FETCH_WORKERS)
+                url = '{}://{}/oai'.format(hostname.scheme, hostname.netloc)
+                session = get_session(workers)
+                app = current_app._get_current_object()
+                failed = []
+
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    def fetch_batch(start):
+                        return [(i, executor.submit(
+                            fetch_record, app, i, url, session))
+                            for i in records[start:start + batch_size]]
+
+                    # The next batch is fetched while the current one is
+                    # imported.
+                    fetched = fetch_batch(0)
+                    for start in range(0, len(records), batch_size):
+                        importing = fetched
+                        fetched = fetch_batch(start + batch_size)
+                        failed.extend(
+                            import_records(importing, resync, counter))
+
+                        # Save the progress, an interrupted import resumes
+                        # from the remaining resources.
+                        resync.result = json.dumps(
+                            failed + records[start + batch_size:])
+                        resync_log.counter = dict(counter)
+                        db.session.commit()
+                        if pause:
+                            for _, future in fetched:
+                                future.cancel()
+                            break
+                session.close()
 
             except Exception as ex:
                 current_app.logger.error(traceback.format_exc())
@@ -145,6 +150,13 @@ def run_sync_import(id):
                     'Error occurred while processing harvesting item\n' + str(
                         ex))
 
+            if pause:
+                resync_log.status = current_app.config.get(
+                    "INVENIO_RESYNC_LOGS_STATUS",
+                    INVENIO_RESYNC_LOGS_STATUS
+                ).get('suspended')
+                break
+
             resync_log.status = current_app.config.get(
                 "INVENIO_RESYNC_LOGS_STATUS",
                 INVENIO_RESYNC_LOGS_STATUS
@@ -193,6 +205,98 @@ def run_sync_import(id):
     return res
 
 
+def get_session(pool_size):
+    """Create a HTTP session with connection pool and retry."""
+    session = requests.Session()
+    retries = Retry(
+        total=current_app.config.get(
+            'INVENIO_RESYNC_RETRY_COUNT',
+            INVENIO_RESYNC_RETRY_COUNT),
+        backoff_factor=current_app.config.get(
+            'INVENIO_RESYNC_BACKOFF_FACTOR',
+            INVENIO_RESYNC_BACKOFF_FACTOR),
+        status_forcelist=[500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=pool_size,
+                          pool_maxsize=pool_size,
+                          max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def fetch_record(app, resource, url, session):
+    """Fetch a record of the resource list in a fetch worker thread."""
+    with app.app_context():
+        if INVENIO_RESYNC_MODE:
+            return get_record_from_file(resource)
+        return get_record(
+            url=url,
+            record_id=resource,
+            metadata_prefix='jpcoar_1.0',
+            session=session
+        )
+
+
+def import_records(fetched, resync, counter):
+    """Import fetched records, each in a savepoint.
+
+    When a record leaves the transaction unusable, the records imported
+    before it are rolled back too. They are returned as not imported with
+    their counts taken back, and the search documents of the records
+    inserted by them are deleted.
+
+    :param fetched: list of resources and the futures of their records.
+    :return: list of resources which are not imported.
+    """
+    failed = []
+    imported = []
+    committed_counter = dict(counter)
+    # The inserted records are kept by invenio_oaiharvester.tasks.
+    db.session.info['oaiharvester_inserted'] = set()
+    try:
+        for i, future in fetched:
+            savepoint = db.session.begin_nested()
+            before = dict(counter)
+            try:
+                current_app.logger.debug('{0} {1} {2}: {3}'.format(
+                    __file__, 'run_sync_import()', 'resource', i))
+                record = future.result()
+                if len(record) == 1:
+                    process_item(record[0], resync, counter)
+                    imported.append(i)
+                else:
+                    failed.append(i)
+                if savepoint.is_active:
+                    savepoint.commit()
+            except Exception as ex:
+                current_app.logger.exception(
+                    'Error occurred while importing item')
+                current_app.logger.error(ex)
+                event_counter('error_items', counter)
+                failed.append(i)
+                if savepoint.is_active:
+                    savepoint.rollback()
+                    continue
+                db.session.rollback()
+                # Keep only the counts of the failed record since the
+                # last commit.
+                for k, v in counter.items():
+                    if isinstance(v, int):
+                        counter[k] = committed_counter.get(k, 0) + v - \
+                            before.get(k, 0)
+                committed_counter = dict(counter)
+                inserted = db.session.info['oaiharvester_inserted']
+                db.session.info['oaiharvester_inserted'] = set()
+                indexer = WekoIndexer()
+                for uuid in inserted:
+                    indexer.delete_by_id(uuid)
+                failed.extend(imported)
+                imported = []
+    finally:
+        db.session.info.pop('oaiharvester_inserted', None)
+    return failed
+
+
 def get_record_from_file(rc):
     """Get records """
     record = etree.Element('record')
@@ -222,8 +326,12 @@ def get_record(
         url,
         record_id=None,
         metadata_prefix=None,
-        encoding='utf-8'):
-    """Get records by record_id."""
+        encoding='utf-8',
+        session=None):
+    """Get records by record_id.
+
+    :param session: HTTP session to reuse connections (optional).
+    """
     # Avoid SSLError - dh key too small
     requests.packages.urllib3.disable_warnings()
     requests.packages.urllib3.util.ssl_.DEFAULT_CIPHERS += 'HIGH:!DH:!aNULL'
@@ -241,7 +349,8 @@ def get_record(
     current_app.logger.debug('{0} {1} {2}: {3}'.format(
         __file__, 'get_record()', 'payload_str', payload_str))
 
-    response = requests.get(url, params=payload_str, verify=False)
+    response = (session or requests).get(
+        url, params=payload_str, verify=False)
     et = etree.XML(response.text.encode(encoding))
     current_app.logger.debug('{0} {1} {2}: {3}'.format(
         __file__, 'get_record()', 'et', response.text.encode(encoding)))
@@ -1,4 +1,5 @@
 import pytest
+from concurrent.futures import Future
 from mock import patch, MagicMock
 
 from invenio_resourcesyncclient.tasks import (
@@ -10,7 +11,10 @@ from invenio_resourcesyncclient.tasks import (
     prepare_log,
     finish,
     init_counter,
-    run_sync_auto
+    run_sync_auto,
+    get_session,
+    fetch_record,
+    import_records
 )
 
 class MockSyncFunc:
@@ -62,6 +66,89 @@ def test_get_record(app):
     assert res == []
 
 
+#def get_session(pool_size):
+# .tox/c1/bin/pytest --cov=invenio_resourcesyncclient tests/test_tasks.py::test_get_session -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-resourcesyncclient/.tox/c1/tmp
+def test_get_session(app):
+    app.config['INVENIO_RESYNC_RETRY_COUNT'] = 3
+    session = get_session(4)
+    adapter = session.get_adapter('https://jpcoar.repo.nii.ac.jp/oai')
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 3
+    session.close()
+
+
+#def fetch_record(app, resource, url, session):
+# .tox/c1/bin/pytest --cov=invenio_resourcesyncclient tests/test_tasks.py::test_fetch_record -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-resourcesyncclient/.tox/c1/tmp
+def test_fetch_record(app):
+    session = MagicMock()
+    with patch('invenio_resourcesyncclient.tasks.INVENIO_RESYNC_MODE', False):
+        with patch('invenio_resourcesyncclient.tasks.get_record',
+                   return_value=['record']) as mock_get:
+            assert fetch_record(app, 1, 'https://localhost/oai',
+                                session) == ['record']
+            mock_get.assert_called_with(
+                url='https://localhost/oai', record_id=1,
+                metadata_prefix='jpcoar_1.0', session=session)
+    with patch('invenio_resourcesyncclient.tasks.INVENIO_RESYNC_MODE', True):
+        with patch('invenio_resourcesyncclient.tasks.get_record_from_file',
+                   return_value=['file']):
+            assert fetch_record(app, 1, 'https://localhost/oai',
+                                session) == ['file']
+
+
+#def import_records(fetched, resync, counter):
+# .tox/c1/bin/pytest --cov=invenio_resourcesyncclient tests/test_tasks.py::test_import_records -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-resourcesyncclient/.tox/c1/tmp
+def test_import_records(app, db):
+    def future(result=None, error=None):
+        f = Future()
+        if error:
+            f.set_exception(error)
+        else:
+            f.set_result(result)
+        return f
+
+    fetched = [
+        (1, future(['record1'])),
+        (2, future([])),
+        (3, future(error=Exception('fetch error'))),
+        (4, future(['record4'])),
+    ]
+    counter = init_counter()
+    with patch('invenio_resourcesyncclient.tasks.process_item') as mock_process:
+        failed = import_records(fetched, MagicMock(), counter)
+    assert failed == [2, 3]
+    assert mock_process.call_count == 2
+    assert counter['error_items'] == 1
+
+    # the whole transaction is rolled back by the record 5
+    def process(record, resync, counter):
+        counter['created_items'] += 1
+        db.session.info['oaiharvester_inserted'].add(record)
+        if record == 'record5':
+            raise Exception('import error')
+
+    fetched = [
+        (4, future(['record4'])),
+        (5, future(['record5'])),
+        (6, future(['record6'])),
+    ]
+    counter = init_counter()
+    with patch('invenio_resourcesyncclient.tasks.process_item', side_effect=process), \
+            patch('invenio_resourcesyncclient.tasks.db.session.begin_nested') as mock_savepoint, \
+            patch('invenio_resourcesyncclient.tasks.db.session.rollback') as mock_rollback, \
+            patch('invenio_resourcesyncclient.tasks.WekoIndexer') as mock_indexer:
+        mock_savepoint.return_value.is_active = False
+        failed = import_records(fetched, MagicMock(), counter)
+        mock_rollback.assert_called_once()
+        deleted = [args[0] for args, _ in mock_indexer.return_value.delete_by_id.call_args_list]
+        assert sorted(deleted) == ['record4', 'record5']
+    # the record 4 is rolled back with the record 5 and is retried later
+    assert sorted(failed) == [4, 5]
+    assert counter['created_items'] == 2
+    assert counter['error_items'] == 1
+    assert 'oaiharvester_inserted' not in db.session.info
+
+
 #def resync_sync(id):
 #        def sigterm_handler(*args):
 # .tox/c1/bin/pytest --cov=invenio_resourcesyncclient tests/test_tasks.py::test_resync_sync -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/invenio-resourcesyncclient/.tox/c1/tmp
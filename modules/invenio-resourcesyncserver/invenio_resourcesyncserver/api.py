@@ -29,6 +29,7 @@ import traceback
 from datetime import timedelta
 
 from flask import current_app, request, send_file
+from invenio_cache import current_cache
 from invenio_db import db
 from invenio_pidrelations.contrib.versioning import PIDVersioning
 from invenio_pidstore.models import PersistentIdentifier
@@ -48,11 +49,32 @@ from weko_items_ui.utils import _export_item, check_item_type_name, \
 
 from .config import INVENIO_CAPABILITY_URL, VALIDATE_MESSAGE, WEKO_ROOT_INDEX
 from .models import ChangeListIndexes, ResourceListIndexes
-from .query import get_items_by_index_tree
+from .query import get_items_chunk, get_items_chunk_keys, \
+    get_items_search, get_items_summary
 
 import urllib.parse
 
 
+def _w3c_date(date):
+    """Parse a W3C datetime string to datetime."""
+    return datetime.datetime.fromtimestamp(
+        str_to_datetime(date), datetime.timezone.utc)
+
+
+def _to_search_date(date, parse):
+    """Convert a date to the ISO format string used in search queries.
+
+    :param date: (str or datetime) date.
+    :param parse: function parsing a date string to datetime.
+    :return: (str) ISO format date or None
+    """
+    if not date:
+        return None
+    if not isinstance(date, datetime.datetime):
+        date = parse(date)
+    return date.isoformat() if date else None
+
+
 class ResourceListHandler(object):
     """Define API for ResourceListIndexes creation and update."""
 
@@ -336,87 +358,157 @@ class ResourceListHandler(object):
                     return True
         return False
 
-    def get_resource_list_xml(self, from_date=None, to_date=None):
+    def _get_item_chunks(self, from_date=None, to_date=None):
+        """
+        Get the chunks of the items under the index.
+
+        The chunk keys are cached by a version made of the number of items
+        and their last update date, so they are regenerated only when the
+        items under the index change.
+
+        :param from_date: (str) lower bound of the update date.
+        :param to_date: (str) upper bound of the update date.
+        :return: search, version and list of the search_after keys of chunks
+        """
+        search = get_items_search(self.repository_id, from_date, to_date)
+        total, last_updated = get_items_summary(search)
+        version = '{}_{}_{}_{}'.format(
+            from_date or '', to_date or '', total, last_updated)
+        cache_key = current_app.config[
+            'INVENIO_RESOURCESYNCSERVER_CACHE_KEY'].format(
+                self.repository_id, 'chunks', version)
+        keys = current_cache.get(cache_key)
+        if keys is None:
+            keys = get_items_chunk_keys(
+                search, total,
+                current_app.config['INVENIO_RESOURCESYNCSERVER_CHUNK_SIZE'])
+            current_cache.set(
+                cache_key, keys,
+                timeout=current_app.config[
+                    'INVENIO_RESOURCESYNCSERVER_CACHE_TIMEOUT'])
+        return search, version, keys
+
+    def _get_chunk_xml(self, capability, new_list, add_item, chunk=None,
+                       from_date=None, to_date=None):
+        """
+        Get content of a chunk of resource list or resource dump.
+
+        If the items are split into chunks and no chunk is given, the
+        sitemapindex of the chunks is returned.
+
+        :param capability: (str) 'resourcelist' or 'resourcedump'.
+        :param new_list: function making an empty list object.
+        :param add_item: function adding an item hit to the list object.
+        :param chunk: (int) chunk number.
+        :return: (xml) content
+        """
+        search, version, keys = self._get_item_chunks(from_date, to_date)
+        url = '{}resync/{}/{}'.format(
+            request.url_root, self.repository_id, capability)
+        if chunk is None and len(keys) > 1:
+            index = ListBaseWithIndex(capability_name=capability)
+            index.sitemapindex = True
+            index.up = INVENIO_CAPABILITY_URL.format(request.url_root)
+            for number in range(len(keys)):
+                index.add(Resource('{}/{}.xml'.format(url, number)))
+            return index.as_xml()
+        if chunk is not None and not 0 <= chunk < len(keys):
+            return None
+
+        cache_key = current_app.config[
+            'INVENIO_RESOURCESYNCSERVER_CACHE_KEY'].format(
+                self.repository_id,
+                '{}_{}_{}_{}'.format(
+                    capability, chunk, self.resource_dump_manifest,
+                    request.url_root),
+                version)
+        xml = current_cache.get(cache_key)
+        if xml is None:
+            items = get_items_chunk(
+                search, keys[chunk or 0],
+                current_app.config['INVENIO_RESOURCESYNCSERVER_CHUNK_SIZE'])
+            rl = new_list()
+            rl.up = INVENIO_CAPABILITY_URL.format(request.url_root)
+            if chunk is not None:
+                rl.index = '{}.xml'.format(url)
+            for item in items:
+                add_item(rl, item)
+            xml = rl.as_xml()
+            current_cache.set(
+                cache_key, xml,
+                timeout=current_app.config[
+                    'INVENIO_RESOURCESYNCSERVER_CACHE_TIMEOUT'])
+        return xml
+
+    def get_resource_list_xml(self, from_date=None, to_date=None,
+                              chunk=None):
         """
         Get content of resource list.
 
+        :param chunk: (int) chunk number, the sitemapindex of the chunks is
+                      returned if the items are split and chunk is None.
         :return: (xml) resource list content
         """
         if not self._validation():
             return None
-        r = get_items_by_index_tree(self.repository_id)
 
-        rl = ResourceList()
-        rl.up = INVENIO_CAPABILITY_URL.format(request.url_root)
-
-        for item in r:
-            if item:
-                resource_date = str_to_datetime(item.get('_source').get(
-                    '_updated'))
-                if from_date and str_to_datetime(from_date) > resource_date:
-                    continue
-                if to_date and str_to_datetime(to_date) < resource_date:
-                    continue
-                id_item = item.get('_source').get('control_number')
-                #url = '{}records/{}'.format(request.url_root, str(id_item))
-                url = '{}resync/{}/records/{}'.format(
-                    request.url_root,
-                    str(self.repository_id),
-                    str(id_item)
-                )
+        def add_item(rl, item):
+            id_item = item.get('_source').get('control_number')
+            #url = '{}records/{}'.format(request.url_root, str(id_item))
+            url = '{}resync/{}/records/{}'.format(
+                request.url_root,
+                str(self.repository_id),
+                str(id_item)
+            )
+            rl.add(Resource(url, lastmod=item.get('_source').get(
+                '_updated')))
 
-                rl.add(Resource(url, lastmod=item.get('_source').get(
-                    '_updated')))
-        return rl.as_xml()
+        return self._get_chunk_xml(
+            'resourcelist', ResourceList, add_item, chunk,
+            _to_search_date(from_date, _w3c_date),
+            _to_search_date(to_date, _w3c_date))
 
-    def get_resource_dump_xml(self, from_date=None, to_date=None):
+    def get_resource_dump_xml(self, from_date=None, to_date=None,
+                              chunk=None):
         """
         Get content of resource dump.
 
+        :param chunk: (int) chunk number, the sitemapindex of the chunks is
+                      returned if the items are split and chunk is None.
         :return: (xml) resource dump content
         """
         if not self._validation():
             return None
 
         from .utils import parse_date
-        if from_date:
-            from_date = parse_date(from_date)
-        if to_date:
-            to_date = parse_date(to_date)
-
-        r = get_items_by_index_tree(self.repository_id)
-        rd = ResourceDump()
-        rd.up = INVENIO_CAPABILITY_URL.format(request.url_root)
-        for item in r:
-            if item:
-                resource_date = parse_date(item.get('_source').get(
-                    '_updated'))
-                if from_date and from_date > resource_date:
-                    continue
-                if to_date and to_date < resource_date:
-                    continue
-                id_item = item.get('_source').get('control_number')
-                url = '{}resync/{}/{}/file_content.zip'.format(
+
+        def add_item(rd, item):
+            id_item = item.get('_source').get('control_number')
+            url = '{}resync/{}/{}/file_content.zip'.format(
+                request.url_root,
+                self.repository_id,
+                str(id_item))
+            rs = Resource(
+                url,
+                lastmod=item.get('_source').get('_updated'),
+                ln=[]
+            )
+            if self.resource_dump_manifest:
+                href = '{}resync/{}/{}/resourcedump_manifest.xml'.format(
                     request.url_root,
                     self.repository_id,
-                    str(id_item))
-                rs = Resource(
-                    url,
-                    lastmod=item.get('_source').get('_updated'),
-                    ln=[]
+                    str(id_item)
                 )
-                if self.resource_dump_manifest:
-                    href = '{}resync/{}/{}/resourcedump_manifest.xml'.format(
-                        request.url_root,
-                        self.repository_id,
-                        str(id_item)
-                    )
-                    rs.ln.append({
-                        'rel': 'contents',
-                        'href': href,
-                        'type': 'application/xml'})
-                rd.add(rs)
-        return rd.as_xml()
+                rs.ln.append({
+                    'rel': 'contents',
+                    'href': href,
+                    'type': 'application/xml'})
+            rd.add(rs)
+
+        return self._get_chunk_xml(
+            'resourcedump', ResourceDump, add_item, chunk,
+            _to_search_date(from_date, parse_date),
+            _to_search_date(to_date, parse_date))
 
     @classmethod
     def get_capability_content(cls):
@@ -46,3 +46,12 @@ VALIDATE_MESSAGE = 'Selected repository has been registered already. ' \
 """Validate message."""
 
 INVENIO_RESOURCESYNCSERVER_TMP_PREFIX = 'weko_resync_'
+
+INVENIO_RESOURCESYNCSERVER_CHUNK_SIZE = 1000
+"""Number of items in a chunk of resource list and resource dump."""
+
+INVENIO_RESOURCESYNCSERVER_CACHE_KEY = 'resync_chunk_{}_{}_{}'
+"""Cache key of chunks, formatted with index id, list name and version."""
+
+INVENIO_RESOURCESYNCSERVER_CACHE_TIMEOUT = 86400
+"""Cache timeout of chunks of resource list and resource dump."""
@@ -30,6 +30,11 @@ from weko_schema_ui.models import PublishStatus
 
 from .config import WEKO_ROOT_INDEX
 
+ITEMS_CHUNK_SORT = [
+    {"_updated": {"order": "asc"}},
+    {"control_number": {"order": "asc"}}
+]
+
 
 def get_items_by_index_tree(index_tree_id):
     """Get tree items."""
@@ -63,6 +68,101 @@ def get_item_changes_by_index(index_tree_id, date_from, date_until):
     return search_result.get('hits').get('hits')
 
 
+def get_items_search(index_tree_id, date_from=None, date_until=None):
+    """Get the search of the items of an index tree.
+
+    The filters of the index tree and the range of the update date are put
+    into the query, so that they also apply to aggregations and to paging
+    with search_after.
+
+    :param index_tree_id: Index Identifier contains item's path.
+    :param date_from: Lower bound of the update date (optional).
+    :param date_until: Upper bound of the update date (optional).
+    :returns: Search instance.
+    """
+    records_search = RecordsSearch()
+    records_search = records_search.with_preference_param().params(
+        version=False)
+    records_search._index[0] = current_app.config['SEARCH_UI_SEARCH_INDEX']
+    query_q = item_path_search_factory(
+        search=records_search,
+        index_id=index_tree_id
+    ).to_dict()
+
+    filters = [query_q['post_filter']] if query_q.get('post_filter') else []
+    date_range = {}
+    if date_from:
+        date_range['gte'] = date_from
+    if date_until:
+        date_range['lte'] = date_until
+    if date_range:
+        filters.append({"range": {"_updated": date_range}})
+
+    search = RecordsSearch()
+    search = search.with_preference_param().params(version=False)
+    search._index[0] = current_app.config['SEARCH_UI_SEARCH_INDEX']
+    return search.update_from_dict({
+        "query": {
+            "bool": {
+                "must": [query_q['query']],
+                "filter": filters
+            }
+        }
+    })
+
+
+def get_items_summary(search):
+    """Get the number of items and their last update date.
+
+    :param search: Search instance made by get_items_search.
+    :returns: Tuple of the number of items and the last update date.
+    """
+    search = search.extra(size=0)
+    search.aggs.metric('last_updated', 'max', field='_updated')
+    search_result = search.execute().to_dict()
+    last_updated = search_result.get('aggregations', {}).get(
+        'last_updated', {})
+    return search_result.get('hits').get('total'), \
+        last_updated.get('value_as_string', last_updated.get('value'))
+
+
+def get_items_chunk_keys(search, total, chunk_size):
+    """Get the search_after keys where the chunks of the items start.
+
+    Only the sort values are fetched, the first chunk has no key.
+
+    :param search: Search instance made by get_items_search.
+    :param total: Number of items.
+    :param chunk_size: Number of items in a chunk.
+    :returns: List of the keys of the chunks.
+    """
+    search = search.sort(*ITEMS_CHUNK_SORT).source(False).extra(
+        size=chunk_size)
+    keys = [None]
+    while len(keys) * chunk_size < total:
+        page = search.extra(search_after=keys[-1]) if keys[-1] else search
+        hits = page.execute().to_dict().get('hits').get('hits')
+        if len(hits) < chunk_size:
+            break
+        keys.append(hits[-1]['sort'])
+    return keys
+
+
+def get_items_chunk(search, key, chunk_size):
+    """Get the items of a chunk.
+
+    :param search: Search instance made by get_items_search.
+    :param key: search_after key of the chunk.
+    :param chunk_size: Number of items in a chunk.
+    :returns: List of hits with control_number and _updated.
+    """
+    search = search.sort(*ITEMS_CHUNK_SORT).source(
+        ['control_number', '_updated']).extra(size=chunk_size)
+    if key:
+        search = search.extra(search_after=key)
+    return search.execute().to_dict().get('hits').get('hits')
+
+
 def item_path_search_factory(search, index_id="0"):
     """Parse query using Weko-Query-Parser.
 
@@ -30,12 +30,13 @@ blueprint = Blueprint(
 
 
 @blueprint.route("/resync/<index_id>/resourcelist.xml")
-def resource_list(index_id):
-    """Render resource list."""
+@blueprint.route("/resync/<index_id>/resourcelist/<int:chunk>.xml")
+def resource_list(index_id, chunk=None):
+    """Render resource list, or its chunk."""
     resource = ResourceListHandler.get_resource_by_repository_id(index_id)
     if not resource or not resource.status:
         abort(404)
-    output_xml = resource.get_resource_list_xml()
+    output_xml = resource.get_resource_list_xml(chunk=chunk)
     if not output_xml:
         abort(404)
     return Response(
@@ -44,12 +45,13 @@ def resource_list(index_id):
 
 
 @blueprint.route("/resync/<index_id>/resourcedump.xml")
-def resource_dump(index_id):
-    """Render resource dump."""
+@blueprint.route("/resync/<index_id>/resourcedump/<int:chunk>.xml")
+def resource_dump(index_id, chunk=None):
+    """Render resource dump, or its chunk."""
     resource = ResourceListHandler.get_resource_by_repository_id(index_id)
     if not resource or not resource.status:
         abort(404)
-    output_xml = resource.get_resource_dump_xml()
+    output_xml = resource.get_resource_dump_xml(chunk=chunk)
     if not output_xml:
         abort(404)
     return Response(
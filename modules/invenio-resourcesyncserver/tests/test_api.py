@@ -175,59 +175,75 @@ def test__validation_ResourceListHandler(i18n_app):
     assert test._validation() == True
     
 
-#     def get_resource_list_xml(self, from_date=None, to_date=None): ERR ~ 
+#     def get_resource_list_xml(self, from_date=None, to_date=None, chunk=None):
 def test_get_resource_list_xml_ResourceListHandler(i18n_app, indices):
     test = sample_ResourceListHandler()
-    test.repository_id = "Root Index"
-
-    data1 = [MagicMock()]
-
-    data2 = MagicMock()
-    def as_xml():
-        return True
-    data2.as_xml = as_xml
-
-    data3 = {"_updated": True}
-
-    from_date = datetime.datetime.now() - datetime.timedelta(hours=11)
-    to_date = datetime.datetime.now()
+    hits = [{"_source": {"control_number": "1", "_updated": "2022-11-04T00:00:00+00:00"}}]
+    mock_cache = MagicMock(get=MagicMock(return_value=None))
 
     with patch("invenio_resourcesyncserver.api.ResourceListHandler._validation", return_value=""):
         assert test.get_resource_list_xml() is None
 
-    with patch("invenio_resourcesyncserver.api.ResourceListHandler._validation", return_value="test"):
-        with patch('invenio_resourcesyncserver.api.get_items_by_index_tree', return_value=data1):
-            with patch('invenio_resourcesyncserver.api.ResourceList', return_value=data2):
-                with patch('invenio_resourcesyncserver.api.str_to_datetime', return_value=from_date):
-                    with patch('invenio_resourcesyncserver.api.Resource', return_value=data3):
-                        assert test.get_resource_list_xml(from_date=from_date, to_date=to_date)
-
-
-#     def get_resource_dump_xml(self, from_date=None, to_date=None): ERR ~ 
+    with patch("invenio_resourcesyncserver.api.ResourceListHandler._validation", return_value="test"), \
+            patch("invenio_resourcesyncserver.api.current_cache", mock_cache), \
+            patch("invenio_resourcesyncserver.api.get_items_search", return_value="search") as mock_search, \
+            patch("invenio_resourcesyncserver.api.get_items_summary", return_value=(1, "2022-11-04T00:00:00.000Z")), \
+            patch("invenio_resourcesyncserver.api.get_items_chunk_keys", return_value=[None]), \
+            patch("invenio_resourcesyncserver.api.get_items_chunk", return_value=hits) as mock_chunk:
+        # date filter is passed to the search
+        result = test.get_resource_list_xml(from_date="2022-11-03T00:00:00Z", to_date=datetime.datetime(2022, 11, 6))
+        mock_search.assert_called_with(33, "2022-11-03T00:00:00+00:00", "2022-11-06T00:00:00")
+        assert "<urlset" in result
+        assert "resync/33/records/1</loc>" in result
+        mock_chunk.assert_called_with("search", None, 1000)
+
+        # chunk out of range
+        assert test.get_resource_list_xml(chunk=1) is None
+
+        # cached chunk
+        mock_cache.get.return_value = "cached_xml"
+        assert test.get_resource_list_xml() == "cached_xml"
+        mock_cache.get.return_value = None
+
+    # items are split into chunks
+    with patch("invenio_resourcesyncserver.api.ResourceListHandler._validation", return_value="test"), \
+            patch("invenio_resourcesyncserver.api.current_cache", mock_cache), \
+            patch("invenio_resourcesyncserver.api.get_items_search", return_value="search"), \
+            patch("invenio_resourcesyncserver.api.get_items_summary", return_value=(2, "2022-11-04T00:00:00.000Z")), \
+            patch("invenio_resourcesyncserver.api.get_items_chunk_keys", return_value=[None, ["2022-11-03", "1"]]), \
+            patch("invenio_resourcesyncserver.api.get_items_chunk", return_value=hits) as mock_chunk:
+        result = test.get_resource_list_xml()
+        assert "<sitemapindex" in result
+        assert "resync/33/resourcelist/0.xml</loc>" in result
+        assert "resync/33/resourcelist/1.xml</loc>" in result
+        mock_chunk.assert_not_called()
+
+        result = test.get_resource_list_xml(chunk=1)
+        assert "<urlset" in result
+        assert 'rel="index"' in result
+        mock_chunk.assert_called_with("search", ["2022-11-03", "1"], 1000)
+
+
+#     def get_resource_dump_xml(self, from_date=None, to_date=None, chunk=None):
 def test_get_resource_dump_xml_ResourceListHandler(i18n_app):
     test = sample_ResourceListHandler()
-    test.repository_id = "Root Index"
-    from_date = "2022/11/3 0:00:00"
-    to_date = "2022/11/6 0:00:00"
-
-    data1 = [{
-        "_source": {"_updated": "2022/11/4 0:00:00"}
-    }]
-
-    data2 = MagicMock()
-    def as_xml():
-        return True
-    data2.as_xml = as_xml
-
-    data3 = MagicMock()
-    data3.ln = []
+    hits = [{"_source": {"control_number": "1", "_updated": "2022-11-04T00:00:00+00:00"}}]
+    mock_cache = MagicMock(get=MagicMock(return_value=None))
 
     with patch("invenio_resourcesyncserver.api.ResourceListHandler._validation", return_value=""):
         assert not test.get_resource_dump_xml()
-    with patch("invenio_resourcesyncserver.api.ResourceListHandler._validation", return_value="test"):
-        with patch('invenio_resourcesyncserver.api.get_items_by_index_tree', return_value=data1):
-            with patch('invenio_resourcesyncserver.api.Resource', return_value=data3):
-                assert test.get_resource_dump_xml(from_date=from_date, to_date=to_date)
+    with patch("invenio_resourcesyncserver.api.ResourceListHandler._validation", return_value="test"), \
+            patch("invenio_resourcesyncserver.api.current_cache", mock_cache), \
+            patch("invenio_resourcesyncserver.api.get_items_search", return_value="search") as mock_search, \
+            patch("invenio_resourcesyncserver.api.get_items_summary", return_value=(1, "2022-11-04T00:00:00.000Z")), \
+            patch("invenio_resourcesyncserver.api.get_items_chunk_keys", return_value=[None]), \
+            patch("invenio_resourcesyncserver.api.get_items_chunk", return_value=hits):
+        result = test.get_resource_dump_xml(from_date="2022-11-03", to_date="2022-11-06")
+        mock_search.assert_called_with(33, "2022-11-03T00:00:00+00:00", "2022-11-06T00:00:00+00:00")
+        assert "resync/33/1/file_content.zip</loc>" in result
+        assert "resync/33/1/resourcedump_manifest.xml" in result
+        args, kwargs = mock_cache.set.call_args
+        assert args[1] == result
 
 
 #     def get_capability_content(cls):
@@ -12,6 +12,10 @@ from flask_babelex import Babel
 from invenio_resourcesyncserver.query import (
     get_items_by_index_tree,
     get_item_changes_by_index,
+    get_items_search,
+    get_items_summary,
+    get_items_chunk_keys,
+    get_items_chunk,
     item_path_search_factory,
     item_changes_search_factory
 )
@@ -33,6 +37,62 @@ def test_get_item_changes_by_index(i18n_app, indices, es):
     assert get_item_changes_by_index(index_tree_id, date_from, date_until)
 
 
+# def get_items_search(index_tree_id, date_from=None, date_until=None):
+def test_get_items_search(i18n_app, indices):
+    search = get_items_search(33, "2022-11-03T00:00:00", "2022-11-06T00:00:00")
+    query = search.to_dict()["query"]["bool"]
+    assert "post_filter" not in search.to_dict()
+    assert query["filter"][-1] == {"range": {"_updated": {"gte": "2022-11-03T00:00:00", "lte": "2022-11-06T00:00:00"}}}
+
+    assert len(query["filter"]) == 2
+
+    search = get_items_search(33)
+    query = search.to_dict()["query"]["bool"]
+    assert len(query["filter"]) == 1
+
+
+# def get_items_summary(search):
+def test_get_items_summary(i18n_app, indices):
+    search = MagicMock()
+    search.extra.return_value.execute.return_value.to_dict.return_value = {
+        "hits": {"total": 3, "hits": []},
+        "aggregations": {"last_updated": {"value": 1667520000000.0, "value_as_string": "2022-11-04T00:00:00.000Z"}}
+    }
+    assert get_items_summary(search) == (3, "2022-11-04T00:00:00.000Z")
+    search.extra.assert_called_with(size=0)
+
+
+# def get_items_chunk_keys(search, total, chunk_size):
+def test_get_items_chunk_keys(i18n_app):
+    def page(keys):
+        result = MagicMock()
+        result.execute.return_value.to_dict.return_value = {
+            "hits": {"hits": [{"sort": key} for key in keys]}}
+        return result
+
+    search = MagicMock()
+    first = search.sort.return_value.source.return_value.extra.return_value
+    first.execute = page([["a", "1"], ["b", "2"]]).execute
+    first.extra.side_effect = [page([["c", "3"], ["d", "4"]]), page([["e", "5"]])]
+
+    assert get_items_chunk_keys(search, 1, 2) == [None]
+    assert get_items_chunk_keys(search, 5, 2) == [None, ["b", "2"], ["d", "4"]]
+    first.extra.assert_called_with(search_after=["b", "2"])
+
+
+# def get_items_chunk(search, key, chunk_size):
+def test_get_items_chunk(i18n_app):
+    search = MagicMock()
+    chunk = search.sort.return_value.source.return_value.extra.return_value
+    chunk.execute.return_value.to_dict.return_value = {"hits": {"hits": ["hit1"]}}
+    chunk.extra.return_value.execute.return_value.to_dict.return_value = {"hits": {"hits": ["hit2"]}}
+
+    assert get_items_chunk(search, None, 10) == ["hit1"]
+    search.sort.return_value.source.assert_called_with(["control_number", "_updated"])
+    assert get_items_chunk(search, ["a", "1"], 10) == ["hit2"]
+    chunk.extra.assert_called_with(search_after=["a", "1"])
+
+
 # def item_path_search_factory(search, index_id="0"):
 def test_item_path_search_factory(i18n_app, indices):
     search = MagicMock()
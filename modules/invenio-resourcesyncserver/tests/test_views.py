@@ -112,10 +112,10 @@ def test_resource_list(client_api, users, indices):
     test = sample_ResourceListHandler()
     index_id = 33
 
-    def get_resource_list_xml():
+    def get_resource_list_xml(chunk=None):
         return True
 
-    def not_get_resource_list_xml():
+    def not_get_resource_list_xml(chunk=None):
         return False
 
     data_1 = MagicMock()
@@ -146,10 +146,10 @@ def test_resource_dump(client_api, users, indices):
     test = sample_ResourceListHandler()
     index_id = 33
 
-    def get_resource_dump_xml():
+    def get_resource_dump_xml(chunk=None):
         return True
 
-    def not_get_resource_dump_xml():
+    def not_get_resource_dump_xml(chunk=None):
         return False
 
     data_1 = MagicMock()
@@ -20,12 +20,12 @@ from celery.utils.log import get_task_logger
 from dateutil import parser
 from elasticsearch import VERSION as ES_VERSION
 from elasticsearch.helpers import bulk
-from elasticsearch_dsl import Index, Search
+from elasticsearch_dsl import A, Index, Search
 from flask import current_app
 from invenio_search import current_search_client
 from invenio_search.utils import prefix_index
 
-from .models import StatsAggregation, StatsBookmark
+from .models import StatsAggregation, StatsBookmark, StatsDataWriter
 from .utils import get_doctype
 
 SUPPORTED_INTERVALS = OrderedDict([
@@ -288,6 +288,61 @@ class StatAggregator(object):
             return None
         return parser.parse(result[0]['timestamp'])
 
+    def _get_existing_indices(self, index_name, keys):
+        """Get the indices of the existing aggregation documents.
+
+        :param index_name: Alias of the aggregation indices.
+        :param keys: Aggregation keys (unique_id) of a page of buckets.
+        :return: dict of unique_id to the index of its document.
+        """
+        indices = {}
+        query = Search(using=self.client, index=index_name).\
+            filter('terms', unique_id=list(keys)).\
+            source(['unique_id'])
+        for hit in query.scan():
+            indices.setdefault(hit.unique_id, hit.meta.index)
+        return indices
+
+    def _composite_buckets(self):
+        """Iterate the pages of (interval, term) buckets of the events.
+
+        The buckets are fetched with a composite aggregation paged with its
+        after_key, so that only one page is held in memory at a time.
+        """
+        logger = get_task_logger(__name__)
+        sources = [
+            {'timestamp': A('date_histogram', field='timestamp',
+                            interval=self.aggregation_interval)},
+            {self.aggregation_field: A('terms',
+                                       field=self.aggregation_field)},
+        ]
+        size = current_app.config['STATS_WEKO_AGGREGATION_PAGE_SIZE']
+        after_key = None
+        while True:
+            page_query = self.agg_query[0:0]
+            composite_args = dict(size=size, sources=sources)
+            if after_key:
+                composite_args['after'] = after_key
+            composite = page_query.aggs.bucket(
+                'composite', 'composite', **composite_args)
+            composite.metric(
+                'top_hit', 'top_hits', size=1, sort={'timestamp': 'desc'}
+            )
+            for dst, (metric, src, opts) in \
+                    self.metric_aggregation_fields.items():
+                composite.metric(dst, metric, field=src, **opts)
+            logger.debug("agg_query query: {}".format(page_query.to_dict()))
+            results = page_query.execute()
+            buckets = results.aggregations['composite'].buckets
+            logger.debug("agg_query result: {}".format(len(buckets)))
+            if not buckets:
+                break
+            yield buckets
+            if len(buckets) < size:
+                break
+            after_key = results.aggregations['composite'].to_dict().get(
+                'after_key') or buckets[-1]['key'].to_dict()
+
     def agg_iter(self, lower_limit=None, upper_limit=None, manual=False):
         """Aggregate and return dictionary to be indexed in ES."""
         logger = get_task_logger(__name__)
@@ -299,7 +354,9 @@ class StatAggregator(object):
         )
         upper_limit = upper_limit or (
             datetime.datetime.utcnow().replace(microsecond=0).isoformat())
-        aggregation_data = {}
+        writer = None
+        if current_app.config['STATS_WEKO_DB_BACKUP_AGGREGATION']:
+            writer = StatsDataWriter(StatsAggregation)
 
         self.agg_query = Search(using=self.client,
                                 index=self.event_index).\
@@ -311,31 +368,23 @@ class StatAggregator(object):
         for modifier in self.query_modifiers:
             self.agg_query = modifier(self.agg_query)
 
-        hist = self.agg_query.aggs.bucket(
-            'histogram',
-            'date_histogram',
-            field='timestamp',
-            interval=self.aggregation_interval
-        )
-        terms = hist.bucket(
-            'terms', 'terms', field=self.aggregation_field,
-            size=current_app.config['STATS_ES_INTEGER_MAX_VALUE']
-        )
-        # FIXME: Paginate?
-        top = terms.metric(
-            'top_hit', 'top_hits', size=1, sort={'timestamp': 'desc'}
-        )
-        for dst, (metric, src, opts) in self.metric_aggregation_fields.items():
-            terms.metric(dst, metric, field=src, **opts)
-        logger.debug("agg_query query: {}".format(self.agg_query))
-        results = self.agg_query.execute()
-        logger.debug("agg_query result: {}".format(len(results)))
-        for interval in results.aggregations['histogram'].buckets:
-            interval_date = datetime.datetime.strptime(
-                interval['key_as_string'], '%Y-%m-%dT%H:%M:%S')
-            for aggregation in interval['terms'].buckets:
+        index_name = '{0}-stats-{1}'.\
+                     format(self.search_index_prefix, self.event)
+        logger.debug("index_name: {}".format(index_name))
+        for buckets in self._composite_buckets():
+            existing_indices = {}
+            if manual:
+                existing_indices = self._get_existing_indices(
+                    index_name,
+                    set(b['key'][self.aggregation_field] for b in buckets))
+
+            for aggregation in buckets:
+                interval_date = datetime.datetime.utcfromtimestamp(
+                    aggregation['key']['timestamp'] / 1000)
+                key = aggregation['key'][self.aggregation_field]
+                aggregation_data = {}
                 aggregation_data['timestamp'] = interval_date.isoformat()
-                aggregation_data[self.aggregation_field] = aggregation['key']
+                aggregation_data[self.aggregation_field] = key
                 aggregation_data['count'] = aggregation['doc_count']
 
                 if self.metric_aggregation_fields:
@@ -356,31 +405,20 @@ class StatAggregator(object):
                             aggregation_data
                         )
 
-                index_name = '{0}-stats-{1}'.\
-                             format(self.search_index_prefix, self.event)
-                logger.debug("index_name: {}".format(index_name))
-
-                if manual:
-                    res = Search(using=self.client,
-                                 index=index_name).\
-                        filter('term', unique_id=aggregation['key']).\
-                        execute()
-                    
-                    if res.hits.total > 0:
-                        index_name = res.hits.hits[0]['_index']
-
                 rtn_data = dict(
-                    _id='{0}'.format(aggregation['key']),
-                    _index=index_name,
+                    _id='{0}'.format(key),
+                    _index=existing_indices.get(key, index_name),
                     _type=self.aggregation_doc_type,
                     _source=aggregation_data
                 )
-                self.indices.add(index_name)
-                if current_app.config['STATS_WEKO_DB_BACKUP_AGGREGATION']:
+                self.indices.add(rtn_data['_index'])
+                if writer:
                     # Save stats aggregation into Database.
-                    StatsAggregation.save(rtn_data, delete=True)
+                    writer.add(rtn_data)
 
                 yield rtn_data
+        if writer:
+            writer.flush()
 
     def run(self, start_date=None, end_date=None, update_bookmark=True, manual=False):
         """Calculate statistics aggregations."""
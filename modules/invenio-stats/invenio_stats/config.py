@@ -213,3 +213,12 @@ STATS_WEKO_DB_BACKUP_AGGREGATION = False
 
 STATS_WEKO_DB_BACKUP_BOOKMARK = False
 """Enable DB backup of bookmark."""
+
+STATS_WEKO_DB_BACKUP_BATCH_SIZE = 50
+"""Number of events or aggregations saved into Database in one statement."""
+
+STATS_WEKO_AGGREGATION_PAGE_SIZE = 1000
+"""Number of buckets fetched in one page when aggregating events."""
+
+STATS_WEKO_REPORT_CACHE_TIMEOUT = 300
+"""Seconds a date range report (Day, Week or Year unit) is cached."""
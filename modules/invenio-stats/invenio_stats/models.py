@@ -9,6 +9,7 @@
 """Database models for Invenio-Stats."""
 import hashlib
 import json
+from collections import OrderedDict
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from typing import List
@@ -127,6 +128,29 @@ class _StataModelBase(Timestamp):
             db.session.rollback()
             return False
 
+    @classmethod
+    def _make_stats_data(cls, data_object: dict):
+        """Make a row of the table from a stats data object.
+
+        :param data_object: stats data object.
+        :return: the row or None if the object has no source.
+        """
+        if not data_object.get("_source"):
+            return None
+        date = None
+        if 'timestamp' in data_object.get("_source"):
+            date = data_object.get("_source").get("timestamp")
+        elif 'date' in data_object.get("_source"):
+            date = data_object.get("_source").get("date")
+        return {
+            'id': _generate_id(),
+            'source_id': data_object.get("_id"),
+            'index': data_object.get("_index"),
+            'type': data_object.get("_type"),
+            'source': json.dumps(data_object.get("_source")),
+            'date': date
+        }
+
     @classmethod
     def save(cls, data_object: dict, delete: bool = False) -> bool:
         """Save stats event.
@@ -136,21 +160,8 @@ class _StataModelBase(Timestamp):
         :return:
         """
         try:
-            if data_object.get("_source"):
-                date = None
-                if 'timestamp' in data_object.get("_source"):
-                    date = data_object.get("_source").get("timestamp")
-                elif 'date' in data_object.get("_source"):
-                    date = data_object.get("_source").get("date")
-                stats_data = {
-                    'id': _generate_id(),
-                    'source_id': data_object.get("_id"),
-                    'index': data_object.get("_index"),
-                    'type': data_object.get("_type"),
-                    'source': json.dumps(data_object.get("_source")),
-                    'date': date
-                }
-            else:
+            stats_data = cls._make_stats_data(data_object)
+            if not stats_data:
                 return False
             uq_stats_key = cls.get_uq_key()
             stmt = insert(cls)
@@ -166,6 +177,38 @@ class _StataModelBase(Timestamp):
             db.session.rollback()
             return False
 
+    @classmethod
+    def save_all(cls, data_objects: List[dict]) -> bool:
+        """Save stats data in one statement and one commit.
+
+        Rows having the same unique key are merged, the last one wins, as
+        a statement cannot update the same row twice.
+
+        :param data_objects: list of stats data objects.
+        :return:
+        """
+        rows = OrderedDict()
+        for data_object in data_objects:
+            stats_data = cls._make_stats_data(data_object)
+            if stats_data:
+                key = tuple(stats_data[c] for c in cls.get_uq_columns())
+                rows.pop(key, None)
+                rows[key] = stats_data
+        if not rows:
+            return False
+        try:
+            stmt = insert(cls).values(list(rows.values()))
+            db.session.execute(
+                stmt.on_conflict_do_update(
+                    set_={'source': stmt.excluded.source},
+                    constraint=cls.get_uq_key()))
+            db.session.commit()
+            return True
+        except SQLAlchemyError as err:
+            current_app.logger.error("Unexpected error: {}".format(err))
+            db.session.rollback()
+            return False
+
 
 class StatsEvents(db.Model, _StataModelBase):
     """Database for Stats events."""
@@ -182,6 +225,10 @@ class StatsEvents(db.Model, _StataModelBase):
         """Get unique constraint name."""
         return "uq_stats_key_stats_events"
 
+    def get_uq_columns():
+        """Get columns of the unique constraint."""
+        return ('source_id', 'index', 'date')
+
 
 class StatsAggregation(db.Model, _StataModelBase):
     """Database for Stats Aggregation."""
@@ -197,6 +244,10 @@ class StatsAggregation(db.Model, _StataModelBase):
         """Get unique constraint name."""
         return "uq_stats_key_stats_aggregation"
 
+    def get_uq_columns():
+        """Get columns of the unique constraint."""
+        return ('source_id', 'index')
+
 
 class StatsBookmark(db.Model, _StataModelBase):
     """Database for Stats Bookmark."""
@@ -212,6 +263,47 @@ class StatsBookmark(db.Model, _StataModelBase):
         """Get unique constraint name."""
         return "uq_stats_key_stats_bookmark"
 
+    def get_uq_columns():
+        """Get columns of the unique constraint."""
+        return ('source_id', 'index')
+
+
+class StatsDataWriter(object):
+    """Buffer stats data and save them into the database in batches.
+
+    Saving each event with its own statement and commit is slow, so the
+    data are saved with one multi-row upsert per batch.
+    """
+
+    def __init__(self, model, batch_size=None):
+        """Initialize the writer.
+
+        :param model: Model the data are saved into.
+        :param batch_size: Number of data saved in one statement.
+        """
+        self.model = model
+        self.batch_size = batch_size or current_app.config.get(
+            'STATS_WEKO_DB_BACKUP_BATCH_SIZE', 50)
+        self.buffer = []
+
+    def add(self, data_object: dict):
+        """Add stats data, and save the buffer when it is full.
+
+        :param data_object: stats data object.
+        """
+        stats_data = dict(data_object)
+        # The source may be reused by the caller, so it is copied here.
+        stats_data['_source'] = dict(data_object.get('_source') or {})
+        self.buffer.append(stats_data)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Save the buffered stats data."""
+        if self.buffer:
+            self.model.save_all(self.buffer)
+            self.buffer = []
+
 
 def _generate_id():
     """Generate identifier.
@@ -252,6 +344,7 @@ def make_stats_events_partition_table(year, month):
     return tablename
 
 __all__ = [
+    "StatsDataWriter",
     "StatsEvents",
     "StatsBookmark",
     "StatsAggregation",
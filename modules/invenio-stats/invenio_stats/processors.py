@@ -24,7 +24,7 @@ from pytz import utc
 from weko_admin.api import is_restricted_user
 from weko_admin.utils import get_redis_cache, reset_redis_cache, is_exists_key_in_redis
 
-from .models import StatsEvents
+from .models import StatsDataWriter, StatsEvents
 from .utils import get_anonymization_salt, get_geoip, obj_or_import_string
 
 
@@ -189,6 +189,21 @@ class EventsIndexer(object):
 
     def actionsiter(self):
         """Iterator."""
+        writer = None
+        if current_app.config['STATS_WEKO_DB_BACKUP_EVENTS']:
+            writer = StatsDataWriter(StatsEvents)
+        try:
+            for event in self._actionsiter(writer):
+                yield event
+        finally:
+            if writer:
+                writer.flush()
+
+    def _actionsiter(self, writer=None):
+        """Iterate the processed events.
+
+        :param writer: StatsDataWriter saving the events into Database.
+        """
         for msg in self.queue.consume():
             try:
                 for preproc in self.preprocessors:
@@ -226,9 +241,9 @@ class EventsIndexer(object):
                     _type=self.doctype,
                     _source=msg,
                 )
-                if current_app.config['STATS_WEKO_DB_BACKUP_EVENTS']:
+                if writer:
                     # Save stats event into Database.
-                    StatsEvents.save(rtn_data, True)
+                    writer.add(rtn_data)
 
                 yield rtn_data
             except Exception:
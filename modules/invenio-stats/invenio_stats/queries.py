@@ -122,6 +122,8 @@ class ESDateHistogramQuery(ESQuery):
                 time_range['gte'] = start_date.isoformat()
             if end_date is not None:
                 time_range['lte'] = end_date.isoformat()
+            time_range['time_zone'] = str(
+                current_app.config['STATS_WEKO_DEFAULT_TIMEZONE']())
             agg_query = agg_query.filter(
                 'range',
                 **{self.time_field: time_range})
@@ -861,6 +861,9 @@ class QueryRecordViewReportHelper(object):
 class QueryItemRegReportHelper(object):
     """Helper for providing item registration report."""
 
+    range_units = ('Day', 'Week', 'Year')
+    """Units reported period by period over a date range."""
+
     @classmethod
     def get(cls, **kwargs):
         """Get item registration report."""
@@ -871,6 +874,8 @@ class QueryItemRegReportHelper(object):
             if kwargs.get('end_date') != '0' else None
         unit = kwargs.get('unit').title()
         empty_date_flg = True if not start_date or not end_date else False
+        # Day, Week and Year reports are built from one histogram query
+        histogram_flg = empty_date_flg or unit in cls.range_units
 
         query_name = 'item-create-total'
         count_keyname = 'count'
@@ -879,16 +884,16 @@ class QueryItemRegReportHelper(object):
                 query_name = 'item-detail-item-total'
             else:
                 query_name = 'item-detail-total' \
-                    if not empty_date_flg or unit == 'Host' \
+                    if not histogram_flg or unit == 'Host' \
                     else 'bucket-item-detail-view-histogram'
         elif target_report == config.TARGET_REPORTS['Contents Download']:
             if unit == 'Item':
                 query_name = 'get-file-download-per-item-report'
             else:
                 query_name = 'get-file-download-per-host-report' \
-                    if not empty_date_flg or unit == 'Host' \
+                    if not histogram_flg or unit == 'Host' \
                     else 'get-file-download-per-time-report'
-        elif empty_date_flg:
+        elif histogram_flg:
             query_name = 'item-create-histogram'
 
         # total
@@ -907,7 +912,16 @@ class QueryItemRegReportHelper(object):
         result = []
         if empty_date_flg or end_date >= start_date:
             try:
-                if unit == 'Day':
+                if not empty_date_flg and unit in cls.range_units:
+                    periods = cls.make_range_periods(
+                        unit, start_date, end_date)
+                    # total results
+                    total_results = len(periods)
+                    periods = cls.get_range_periods(
+                        query_total, query_name, unit, periods)
+                    result = periods[page_index * reports_per_page:
+                                     (page_index + 1) * reports_per_page]
+                elif unit == 'Day':
                     if empty_date_flg:
                         params = {'interval': 'day'}
                         res_total = query_total.run(**params)
@@ -932,34 +946,6 @@ class QueryItemRegReportHelper(object):
                                     'end_date': date,
                                 })
                             i += 1
-                    else:
-                        # total results
-                        total_results = (end_date - start_date).days + 1
-                        delta = timedelta(days=1)
-                        for i in range(total_results):
-                            if page_index * reports_per_page <= i < (
-                                    page_index + 1) * reports_per_page:
-                                d_start = d.replace(hour=0, minute=0, second=0,
-                                                    microsecond=0)
-                                d_end = d.replace(hour=23, minute=59, second=59,
-                                                  microsecond=9999)
-                                start_date_string = d_start.strftime(
-                                    '%Y-%m-%d %H:%M:%S')
-                                end_date_string = d_end.strftime(
-                                    '%Y-%m-%d %H:%M:%S')
-                                params = {'interval': 'day',
-                                          'start_date': start_date_string,
-                                          'end_date': end_date_string,
-                                          'is_restricted': False
-                                          }
-                                res_total = query_total.run(**params)
-                                result.append({
-                                    'count': res_total[count_keyname],
-                                    'start_date': start_date_string,
-                                    'end_date': end_date_string,
-                                    'is_restricted': False
-                                })
-                            d += delta
                 elif unit == 'Week':
                     delta = timedelta(days=7)
                     delta1 = timedelta(days=1)
@@ -999,39 +985,6 @@ class QueryItemRegReportHelper(object):
                                 })
                             d += delta
                             i += 1
-                    else:
-                        # total results
-                        total_results = int(
-                            (end_date - start_date).days / 7) + 1
-
-                        d = start_date
-                        for i in range(total_results):
-                            if page_index * \
-                                    reports_per_page <= i < (page_index + 1) * reports_per_page:
-                                d_start = d.replace(hour=0, minute=0, second=0,
-                                                    microsecond=0)
-                                start_date_string = d_start.strftime('%Y-%m-%d %H:%M:%S')
-                                d1 = d + delta - delta1
-                                if d1 > end_date:
-                                    d1 = end_date
-                                d_end = d1.replace(hour=23, minute=59, second=59,
-                                                  microsecond=9999)
-                                end_date_string = d_end.strftime('%Y-%m-%d %H:%M:%S')
-                                temp = {
-                                    'start_date': start_date_string,
-                                    'end_date': end_date_string,
-                                    'is_restricted': False
-                                }
-                                params = {'interval': 'week',
-                                          'start_date': temp['start_date'],
-                                          'end_date': temp['end_date'],
-                                          'is_restricted': False
-                                          }
-                                res_total = query_total.run(**params)
-                                temp['count'] = res_total[count_keyname]
-                                result.append(temp)
-
-                            d += delta
                 elif unit == 'Year':
                     if empty_date_flg:
                         params = {'interval': 'year', 'is_restricted': False}
@@ -1064,31 +1017,6 @@ class QueryItemRegReportHelper(object):
                                     'is_restricted': False
                                 })
                             i += 1
-                    else:
-                        start_year = start_date.year
-                        end_year = end_date.year
-                        # total results
-                        total_results = end_year - start_year + 1
-                        for i in range(total_results):
-                            if page_index * \
-                                    reports_per_page <= i < (page_index + 1) * reports_per_page:
-                                start_date_string = '{}-01-01 00:00:00'.format(
-                                    start_year + i)
-                                end_date_string = '{}-12-31 23:59:59'.format(
-                                    start_year + i)
-                                params = {'interval': 'year',
-                                          'start_date': start_date_string,
-                                          'end_date': end_date_string,
-                                          'is_restricted': False
-                                          }
-                                res_total = query_total.run(**params)
-                                result.append({
-                                    'count': res_total[count_keyname],
-                                    'start_date': start_date_string,
-                                    'end_date': end_date_string,
-                                    'year': start_year + i,
-                                    'is_restricted': False
-                                })
                 elif unit == 'Item':
                     start_date_string = ''
                     end_date_string = ''
@@ -1202,6 +1130,88 @@ class QueryItemRegReportHelper(object):
         }
         return response
 
+    @classmethod
+    def make_range_periods(cls, unit, start_date, end_date):
+        """Make the periods between start and end date without their count.
+
+        @param unit: 'Day', 'Week' or 'Year'
+        @param start_date: start date of the report
+        @param end_date: end date of the report
+        @return: list of periods
+        """
+        periods = []
+        if unit == 'Year':
+            # Years are reported as a whole even if the range starts later
+            for year in range(start_date.year, end_date.year + 1):
+                periods.append({
+                    'count': 0,
+                    'start_date': '{}-01-01 00:00:00'.format(year),
+                    'end_date': '{}-12-31 23:59:59'.format(year),
+                    'year': year,
+                    'is_restricted': False
+                })
+        else:
+            # Weeks start at the start date, not at the calendar week
+            delta = timedelta(days=1 if unit == 'Day' else 7)
+            d = start_date
+            while d <= end_date:
+                d_end = min(d + delta - timedelta(days=1), end_date)
+                periods.append({
+                    'count': 0,
+                    'start_date': d.strftime('%Y-%m-%d 00:00:00'),
+                    'end_date': d_end.strftime('%Y-%m-%d 23:59:59'),
+                    'is_restricted': False
+                })
+                d += delta
+        return periods
+
+    @classmethod
+    def get_range_periods(cls, query, query_name, unit, periods):
+        """Set the count of every period of a date range report.
+
+        All periods are counted from one date histogram query over the whole
+        range instead of one query per period, and cached for a short time
+        so that paging through the report does not query again.
+
+        @param query: date histogram query of the report
+        @param query_name: name of the query
+        @param unit: 'Day', 'Week' or 'Year'
+        @param periods: periods made by make_range_periods
+        @return: list of periods with their count
+        """
+        if not periods:
+            return periods
+        start_date_string = periods[0]['start_date']
+        end_date_string = periods[-1]['end_date']
+        cache_key = 'stats:report:{}:{}:{}:{}'.format(
+            query_name, unit, start_date_string[:10], end_date_string[:10])
+        cached = current_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        res = query.run(interval='year' if unit == 'Year' else 'day',
+                        start_date=start_date_string,
+                        end_date=end_date_string)
+        counts = {}
+        for bucket in res['buckets']:
+            counts[bucket['date'].split('T')[0]] = bucket['value']
+        for period in periods:
+            if unit == 'Year':
+                period['count'] = counts.get(
+                    period['start_date'][:10], period['count'])
+                continue
+            # Sum up the days of the period
+            d = parser.parse(period['start_date'])
+            d_end = parser.parse(period['end_date'])
+            while d <= d_end:
+                period['count'] += counts.get(d.strftime('%Y-%m-%d'), 0)
+                d += timedelta(days=1)
+
+        current_cache.set(
+            cache_key, periods,
+            timeout=current_app.config['STATS_WEKO_REPORT_CACHE_TIMEOUT'])
+        return periods
+
     @classmethod
     def merge_items_results(cls, results):
         """
@@ -15,6 +15,7 @@ import pytest
 from tests.conftest import _create_file_download_event
 from elasticsearch_dsl import Index, Search
 from invenio_search import current_search, current_search_client
+from elasticsearch_dsl.response import Response
 from mock import patch
 
 from invenio_stats import current_stats
@@ -320,3 +321,66 @@ def test_StatAggregator(app):
 #     assert results[0].count == 12  # 3 views over 4 differnet hour slices
 #     assert results[0].unique_count == 4  # 4 different hour slices accessed
 #     assert results[0].volume == 9000 * 12
+
+
+# .tox/c1/bin/pytest --cov=invenio_stats tests/test_aggregations.py::test_StatAggregator_agg_iter -v -s -vv --cov-branch --cov-report=term --cov-config=tox.ini --basetemp=/code/modules/invenio-stats/.tox/c1/tmp
+def test_StatAggregator_agg_iter(app):
+    """Test paging of the aggregation buckets."""
+    def _bucket(timestamp, file_id, count):
+        return {
+            "key": {"timestamp": timestamp, "file_id": file_id},
+            "doc_count": count,
+            "top_hit": {"hits": {"total": count, "hits": [
+                {"_index": "test-events-stats-file-download",
+                 "_type": "stats-file-download", "_id": file_id,
+                 "_source": {"file_key": "{}.txt".format(file_id)}}]}}
+        }
+
+    def _page(buckets, after_key=None):
+        composite = {"buckets": buckets}
+        if after_key:
+            composite["after_key"] = after_key
+        return {"hits": {"total": 0, "hits": []},
+                "aggregations": {"composite": composite}}
+
+    pages = [
+        _page([_bucket(1609459200000, "f1", 2),
+               _bucket(1609459200000, "f2", 1)],
+              {"timestamp": 1609459200000, "file_id": "f2"}),
+        _page([_bucket(1609545600000, "f1", 3)]),
+    ]
+    queries = []
+
+    def _execute(search, *args, **kwargs):
+        queries.append(search.to_dict())
+        return Response(search, pages.pop(0))
+
+    app.config["STATS_WEKO_AGGREGATION_PAGE_SIZE"] = 2
+    stat_agg = StatAggregator(name='file-download-agg',
+                              client=current_search_client,
+                              event='file-download',
+                              aggregation_field='file_id',
+                              copy_fields={'file_key': 'file_key'},
+                              aggregation_interval='day')
+    with patch.object(Search, "execute", autospec=True,
+                      side_effect=_execute):
+        with patch.object(StatAggregator, "_get_existing_indices",
+                          return_value={"f1": "test-stats-file-download-0001"}):
+            res = list(stat_agg.agg_iter(
+                datetime.datetime(2021, 1, 1), datetime.datetime(2021, 1, 2),
+                manual=True))
+
+    assert len(queries) == 2
+    assert "after" not in queries[0]["aggs"]["composite"]["composite"]
+    assert queries[1]["aggs"]["composite"]["composite"]["after"] == \
+        {"timestamp": 1609459200000, "file_id": "f2"}
+    assert [(r["_id"], r["_source"]["timestamp"], r["_source"]["count"])
+            for r in res] == [
+        ("f1", "2021-01-01T00:00:00", 2),
+        ("f2", "2021-01-01T00:00:00", 1),
+        ("f1", "2021-01-02T00:00:00", 3),
+    ]
+    assert res[0]["_source"]["file_key"] == "f1.txt"
+    assert res[0]["_index"] == "test-stats-file-download-0001"
+    assert res[1]["_index"] == "test-stats-file-download"
+    app.config["STATS_WEKO_AGGREGATION_PAGE_SIZE"] = 1000
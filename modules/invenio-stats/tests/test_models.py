@@ -1,10 +1,12 @@
 import datetime
-from mock import patch
+from mock import MagicMock, patch
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import SQLAlchemyError
 
 from invenio_stats.models import (
     get_stats_events_partition_tables,
     make_stats_events_partition_table,
+    StatsDataWriter,
     StatsEvents,
     StatsAggregation,
     StatsBookmark
@@ -42,6 +44,70 @@ def test_StatsEvents(app, db, stats_events_for_db):
         assert StatsEvents.save(_save_data1) == False
 
 
+# def save_all(cls, data_objects: List[dict]) -> bool:
+# .tox/c1/bin/pytest --cov=invenio_stats tests/test_models.py::test_StatsEvents_save_all -v -s -vv --cov-branch --cov-report=term --cov-config=tox.ini --basetemp=/code/modules/invenio-stats/.tox/c1/tmp
+def test_StatsEvents_save_all(app, db):
+    _save_data = [
+        {
+            "_id": "1",
+            "_index": "test-events-stats-record-view",
+            "_type": "record-view",
+            "_source": {"timestamp": "2023-01-01T01:01:00", "count": 1}
+        },
+        {
+            "_id": "1",
+            "_index": "test-events-stats-record-view",
+            "_type": "record-view",
+            "_source": {"timestamp": "2023-01-01T01:01:00", "count": 2}
+        },
+        {
+            "_id": "2",
+            "_index": "test-events-stats-record-view",
+            "_type": "record-view",
+            "_source": {"timestamp": "2023-01-01T01:01:00", "count": 3}
+        },
+        {"_source": None},
+    ]
+    assert StatsEvents.get_uq_columns() == ('source_id', 'index', 'date')
+    assert StatsEvents.save_all([{"_source": None}]) == False
+    with patch('invenio_db.db.session.execute', return_value=True) as mock_execute, \
+            patch('invenio_db.db.session.commit') as mock_commit:
+        assert StatsEvents.save_all(_save_data) == True
+        assert mock_execute.call_count == 1
+        assert mock_commit.call_count == 1
+        params = mock_execute.call_args[0][0].compile(
+            dialect=postgresql.dialect()).params
+        assert sorted(v for k, v in params.items()
+                      if k.startswith("source_id")) == ["1", "2"]
+        assert '{"timestamp": "2023-01-01T01:01:00", "count": 2}' in params.values()
+    with patch('invenio_db.db.session.execute', side_effect=SQLAlchemyError("test_sql_error")):
+        assert StatsEvents.save_all(_save_data) == False
+
+
+# class StatsDataWriter(object):
+# .tox/c1/bin/pytest --cov=invenio_stats tests/test_models.py::test_StatsDataWriter -v -s -vv --cov-branch --cov-report=term --cov-config=tox.ini --basetemp=/code/modules/invenio-stats/.tox/c1/tmp
+def test_StatsDataWriter(app):
+    model = MagicMock()
+    writer = StatsDataWriter(model, batch_size=2)
+    source = {"timestamp": "2023-01-01T01:01:00", "count": 1}
+    writer.add({"_id": "1", "_source": source})
+    model.save_all.assert_not_called()
+
+    # the source is copied when added
+    source["count"] = 2
+    writer.add({"_id": "2", "_source": source})
+    model.save_all.assert_called_once()
+    saved = model.save_all.call_args[0][0]
+    assert [d["_source"]["count"] for d in saved] == [1, 2]
+    assert writer.buffer == []
+
+    writer.add({"_id": "3", "_source": source})
+    writer.flush()
+    assert model.save_all.call_count == 2
+    writer.flush()
+    assert model.save_all.call_count == 2
+
+
 # class StatsAggregation(db.Model, _StataModelBase):
 # .tox/c1/bin/pytest --cov=invenio_stats tests/test_models.py::test_StatsAggregation -v -s -vv --cov-branch --cov-report=term --cov-config=tox.ini --basetemp=/code/modules/invenio-stats/.tox/c1/tmp
 def test_StatsAggregation(app, db):
@@ -15,7 +15,7 @@ import json
 from invenio_stats.models import StatsEvents, StatsAggregation, StatsBookmark
 
 from sqlalchemy.exc import UnsupportedCompilationError
-from mock import patch
+from mock import MagicMock, patch
 import datetime
 from invenio_stats.errors import UnknownQueryError
 from invenio_stats.utils import (
@@ -784,6 +784,46 @@ def test_query_item_reg_report_helper(app, db, event_queues,es):
     res = QueryItemRegReportHelper.merge_items_results(_results)
     assert res==[{'col1': 1.0, 'col3': 5}, {'col1': 2.0, 'col3': 4}]
 
+def test_query_item_reg_report_helper_range_periods(app):
+    _res = {
+        'buckets': [
+            {'date': '2022-09-01T00:00:00.000+09:00', 'value': 1.0},
+            {'date': '2022-09-08T00:00:00.000+09:00', 'value': 2.0},
+            {'date': '2022-09-10T00:00:00.000+09:00', 'value': 3.0},
+        ]
+    }
+    start_date = datetime.datetime(2022, 9, 1)
+    end_date = datetime.datetime(2022, 9, 15)
+    periods = QueryItemRegReportHelper.make_range_periods('Week', start_date, end_date)
+    assert [p['end_date'] for p in periods] == ['2022-09-07 23:59:59', '2022-09-14 23:59:59', '2022-09-15 23:59:59']
+
+    query = MagicMock()
+    query.run.return_value = _res
+    with patch('invenio_stats.utils.current_cache') as mock_cache:
+        mock_cache.get.return_value = None
+        res = QueryItemRegReportHelper.get_range_periods(query, 'item-create-histogram', 'Week', periods)
+        assert [p['count'] for p in res] == [1.0, 5.0, 0]
+        query.run.assert_called_once_with(interval='day', start_date='2022-09-01 00:00:00', end_date='2022-09-15 23:59:59')
+        mock_cache.set.assert_called_once()
+
+        # cached report does not query again
+        query.run.reset_mock()
+        mock_cache.get.return_value = res
+        assert QueryItemRegReportHelper.get_range_periods(query, 'item-create-histogram', 'Week', periods) == res
+        query.run.assert_not_called()
+
+    _res = {'buckets': [{'date': '2022-01-01T00:00:00.000+09:00', 'value': 4.0}]}
+    query.run.return_value = _res
+    periods = QueryItemRegReportHelper.make_range_periods('Year', start_date, datetime.datetime(2023, 1, 1))
+    with patch('invenio_stats.utils.current_cache') as mock_cache:
+        mock_cache.get.return_value = None
+        res = QueryItemRegReportHelper.get_range_periods(query, 'item-create-histogram', 'Year', periods)
+        assert res == [
+            {'count': 4.0, 'start_date': '2022-01-01 00:00:00', 'end_date': '2022-12-31 23:59:59', 'year': 2022, 'is_restricted': False},
+            {'count': 0, 'start_date': '2023-01-01 00:00:00', 'end_date': '2023-12-31 23:59:59', 'year': 2023, 'is_restricted': False}]
+        query.run.assert_called_once_with(interval='year', start_date='2022-01-01 00:00:00', end_date='2023-12-31 23:59:59')
+
+@patch('invenio_stats.utils.current_cache', MagicMock(get=MagicMock(return_value=None)))
 def test_query_item_reg_report_helper_error(app, db):
     # get
     res = QueryItemRegReportHelper.get(target_report='1', unit='Day', start_date='2022-09-01', end_date='2022-09-15')
@@ -36,7 +36,7 @@ import time
 from flask import session
 from flask_login import login_user
 
-from elasticsearch.exceptions import NotFoundError
+from elasticsearch.exceptions import ConflictError, NotFoundError
 from invenio_pidstore.models import PersistentIdentifier, PIDStatus, Redirect
 from invenio_pidstore.errors import PIDInvalidAction
 from invenio_pidrelations.models import PIDRelation
@@ -178,6 +178,32 @@ class TestWekoIndexer:
         ret = indexer.get_metadata_by_item_id(item_id)
         assert ret['_source']['title'] == title
 
+        # a newer version is indexed by partial updates
+        with patch.object(indexer.client, 'index',
+                          side_effect=[ConflictError(409, 'conflict', {}), None]) as mock_index:
+            indexer.upload_metadata(record_data,item_id,0,skip_files)
+            assert mock_index.call_count == 2
+            assert mock_index.call_args[1].get('version') is None
+            assert mock_index.call_args[1].get('version_type') is None
+
+    #  def bulk_upload_metadata(self, items):
+    # .tox/c1/bin/pytest --cov=weko_deposit tests/test_api.py::TestWekoIndexer::test_bulk_upload_metadata -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-deposit/.tox/c1/tmp
+    def test_bulk_upload_metadata(self,app,es_records):
+        indexer, records = es_records
+        items = []
+        titles = []
+        for i, revision_id in [(0, 10), (1, 0)]:
+            record_data = copy.deepcopy(records[i]['record_data'])
+            record_data['title'] = 'BULK{}'.format(uuid.uuid4())
+            titles.append(record_data['title'])
+            items.append((record_data, records[i]['recid'].id, revision_id))
+        indexer.bulk_upload_metadata(items)
+        for (_, item_id, _), title in zip(items, titles):
+            ret = indexer.get_metadata_by_item_id(item_id)
+            assert ret['_source']['title'] == title
+
+        indexer.bulk_upload_metadata([])
+
 
     # def delete_file_index(self, body, parent_id):
     # .tox/c1/bin/pytest --cov=weko_deposit tests/test_api.py::TestWekoIndexer::test_delete_file_index -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-deposit/.tox/c1/tmp
@@ -212,6 +238,23 @@ class TestWekoIndexer:
         res = indexer.update_es_data(record, update_revision=False,update_oai=True, is_deleted=False)
         assert res=={'_id': res['_id'], '_index': 'test-weko-item-v1.0.0', '_primary_term': 1, '_seq_no': 10, '_shards': {'failed': 0, 'successful': 1, 'total': 2}, '_type': 'item-v1.0.0', '_version': 4, 'result': 'updated'}
 
+    # def bulk_update_es_data(self, records, field='path'):
+    # .tox/c1/bin/pytest --cov=weko_deposit tests/test_api.py::TestWekoIndexer::test_bulk_update_es_data -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-deposit/.tox/c1/tmp
+    def test_bulk_update_es_data(self,es_records):
+        indexer, records = es_records
+        record0 = records[0]['record']
+        record1 = records[1]['record']
+        record0['publish_status'] = '1'
+        record1['publish_status'] = '0'
+        indexer.bulk_update_es_data([record0, record1], field='publish_status')
+        ret = indexer.get_metadata_by_item_id(record0.id)
+        assert ret['_source']['publish_status'] == '1'
+        assert ret['_source']['_item_metadata']['publish_status'] == '1'
+        ret = indexer.get_metadata_by_item_id(record1.id)
+        assert ret['_source']['publish_status'] == '0'
+
+        indexer.bulk_update_es_data([])
+
     # def index(self, record):
     # .tox/c1/bin/pytest --cov=weko_deposit tests/test_api.py::TestWekoIndexer::test_index -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-deposit/.tox/c1/tmp
     def test_index(self,es_records):
@@ -294,6 +337,20 @@ class TestWekoIndexer:
         assert ret == {'_index': 'test-weko-item-v1.0.0', '_type': 'item-v1.0.0', '_id': '{}'.format(record.id), '_version': 3, 'result': 'updated', '_shards': {'total': 2, 'successful': 1, 'failed': 0}, '_seq_no': 9, '_primary_term': 1}
 
        
+    #     def bulk_update_author_link(self, author_links):
+    # .tox/c1/bin/pytest --cov=weko_deposit tests/test_api.py::TestWekoIndexer::test_bulk_update_author_link -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-deposit/.tox/c1/tmp
+    def test_bulk_update_author_link(self,es_records):
+        indexer, records = es_records
+        author_links = [
+            {"id": records[0]['record'].id, "author_link": ['1']},
+            {"id": records[1]['record'].id, "author_link": ['2']},
+            {"id": records[2]['record'].id, "author_link": []},
+        ]
+        indexer.bulk_update_author_link(author_links)
+        ret = indexer.get_metadata_by_item_id(records[0]['record'].id)
+        assert ret['_source']['author_link'] == ['1']
+        ret = indexer.get_metadata_by_item_id(records[1]['record'].id)
+        assert ret['_source']['author_link'] == ['2']
 
     #     def update_jpcoar_identifier(self, dc, item_id):
     # .tox/c1/bin/pytest --cov=weko_deposit tests/test_api.py::TestWekoIndexer::test_update_jpcoar_identifier -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-deposit/.tox/c1/tmp
@@ -580,6 +637,32 @@ class TestWekoDeposit:
         deposit = record['deposit']
         ret = deposit.get_content_files()
         assert ret==None
+        assert deposit.file_extracts==[]
+
+    # def _extract_committed_file_contents(session, extracts):
+    # .tox/c1/bin/pytest --cov=weko_deposit tests/test_api.py::TestWekoDeposit::test_extract_committed_file_contents -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-deposit/.tox/c1/tmp
+    def test_extract_committed_file_contents(sel,app,db):
+        from weko_deposit.api import file_contents_hook
+        files = [{"checksum": "md5:1", "uri": "/tmp/1", "size": 10, "version_id": "v1"}]
+        with patch("weko_deposit.tasks.extract_file_contents.apply_async") as mock_async:
+            # rolled back
+            file_contents_hook.add(db.session, "item_id", (files, 2))
+            db.session.rollback()
+            assert "weko_deposit_file_extracts" not in db.session.info
+            mock_async.assert_not_called()
+
+            # a rolled back SAVEPOINT keeps the request
+            file_contents_hook.add(db.session, "item_id", (files, 2))
+            with pytest.raises(ValueError):
+                with db.session.begin_nested():
+                    raise ValueError
+            # the extraction is requested after the outermost commit
+            with db.session.begin_nested():
+                pass
+            mock_async.assert_not_called()
+            db.session.commit()
+            mock_async.assert_called_once_with(args=("item_id", files, 2))
+            assert "weko_deposit_file_extracts" not in db.session.info
 
     # def get_file_data(self):
     # .tox/c1/bin/pytest --cov=weko_deposit tests/test_api.py::TestWekoDeposit::test_get_file_data -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-deposit/.tox/c1/tmp
@@ -28,7 +28,8 @@ from mock import patch, MagicMock
 from invenio_pidstore.errors import PIDDoesNotExistError
 from weko_authors.models import AuthorsAffiliationSettings,AuthorsPrefixSettings
 
-from weko_deposit.tasks import update_items_by_authorInfo
+from weko_deposit.tasks import update_items_by_authorInfo, get_file_content, \
+    extract_file_content, extract_file_contents
 [
     {
         "recid": "1",
@@ -79,7 +80,7 @@ class MockRecordIndexer:
 # .tox/c1/bin/pytest --cov=weko_deposit tests/test_tasks.py::test_update_authorInfo -v -s -vv --cov-branch --cov-report=term --cov-config=tox.ini --basetemp=/code/modules/weko-deposit/.tox/c1/tmp
 def test_update_authorInfo(app, db, records,mocker):
     app.config.update(WEKO_SEARCH_MAX_RESULT=1)
-    mocker.patch("weko_deposit.tasks.WekoDeposit.update_author_link")
+    mocker.patch("weko_deposit.tasks.WekoIndexer.bulk_update_author_link")
     mock_recordssearch = MagicMock(side_effect=MockRecordsSearch)
     with patch("weko_deposit.tasks.RecordsSearch", mock_recordssearch):
         with patch("weko_deposit.tasks.RecordIndexer", MockRecordIndexer):
@@ -223,3 +224,85 @@ def test_update_authorInfo(app, db, records,mocker):
         with patch("weko_deposit.tasks.RecordIndexer", MockRecordIndexer):
             update_items_by_authorInfo(["1","xxx"], _target)
 
+
+class MockDatastore:
+    def __init__(self):
+        self.data = {}
+        self.redis = self
+
+    def get(self, key):
+        return self.data[key]
+
+    def put(self, key, value, ttl_secs=None):
+        self.data[key] = value
+
+
+# def get_file_content(checksum):
+# def extract_file_content(checksum, uri, size):
+# .tox/c1/bin/pytest --cov=weko_deposit tests/test_tasks.py::test_extract_file_content -v -s -vv --cov-branch --cov-report=term --cov-config=tox.ini --basetemp=/code/modules/weko-deposit/.tox/c1/tmp
+def test_extract_file_content(app):
+    datastore = MockDatastore()
+    app.config.update(WEKO_DEPOSIT_FILE_CONTENT_MAX_FILE_SIZE=100,
+                      WEKO_DEPOSIT_FILE_CONTENT_MAX_LENGTH=5)
+    with patch("weko_deposit.tasks.RedisConnection.connection",
+               return_value=datastore):
+        assert get_file_content("md5:1") is None
+        with patch("weko_deposit.tasks.parser.from_file",
+                   return_value={"content": "test\ncontent"}) as mock_parser:
+            assert extract_file_content("md5:1", "/tmp/1", 10) == "testc"
+            mock_parser.assert_called_once()
+        assert get_file_content("md5:1") == "testc"
+
+        # too large file
+        with patch("weko_deposit.tasks.parser.from_file") as mock_parser:
+            assert extract_file_content("md5:2", "/tmp/2", 1000) == ""
+            mock_parser.assert_not_called()
+        assert get_file_content("md5:2") == ""
+
+        # missing file is not cached
+        with patch("weko_deposit.tasks.parser.from_file",
+                   side_effect=FileNotFoundError):
+            assert extract_file_content("md5:3", "/tmp/3", 10) == ""
+        assert get_file_content("md5:3") is None
+
+
+# def extract_file_contents(self, item_id, files, version=None):
+# .tox/c1/bin/pytest --cov=weko_deposit tests/test_tasks.py::test_extract_file_contents -v -s -vv --cov-branch --cov-report=term --cov-config=tox.ini --basetemp=/code/modules/weko-deposit/.tox/c1/tmp
+def test_extract_file_contents(app):
+    files = [
+        {"checksum": "md5:1", "uri": "/tmp/1", "size": 10, "version_id": "v1"},
+        {"checksum": "md5:2", "uri": "/tmp/2", "size": 10, "version_id": "v2"},
+    ]
+    datastore = MockDatastore()
+    datastore.data["weko_file_content_md5:1"] = b"cached"
+    with patch("weko_deposit.tasks.RedisConnection.connection",
+               return_value=datastore):
+        with patch("weko_deposit.tasks.parser.from_file",
+                   return_value={"content": "extracted"}) as mock_parser:
+            with patch("weko_deposit.tasks.WekoIndexer.update_file_content") as mock_update:
+                extract_file_contents("item_id", files)
+                mock_update.assert_called_with(
+                    "item_id", {"v1": "cached", "v2": "extracted"})
+            mock_parser.assert_called_once_with("/tmp/2")
+
+            with patch("weko_deposit.tasks.WekoIndexer.update_file_content",
+                       side_effect=NotFoundError):
+                with patch("weko_deposit.tasks.extract_file_contents.retry",
+                           side_effect=Exception("retry")):
+                    with pytest.raises(Exception) as e:
+                        extract_file_contents("item_id", files)
+                    assert str(e.value) == "retry"
+
+            # the document of the version is not indexed yet
+            with patch("weko_deposit.tasks.WekoIndexer.get_version", return_value=1):
+                with patch("weko_deposit.tasks.WekoIndexer.update_file_content") as mock_update:
+                    with patch("weko_deposit.tasks.extract_file_contents.retry",
+                               side_effect=Exception("retry")):
+                        with pytest.raises(Exception) as e:
+                            extract_file_contents("item_id", files, 2)
+                        assert str(e.value) == "retry"
+                    mock_update.assert_not_called()
+
+                    extract_file_contents("item_id", files, 1)
+                    mock_update.assert_called_with(
+                        "item_id", {"v1": "cached", "v2": "extracted"})
@@ -26,15 +26,15 @@ import uuid
 from collections import OrderedDict
 from datetime import datetime, timezone,date
 from typing import NoReturn, Union
-from tika import parser
 
 import redis
 from redis import sentinel
 from dictdiffer import dot_lookup
 from dictdiffer.merge import Merger, UnresolvedConflictsException
-from elasticsearch.exceptions import TransportError
+from elasticsearch.exceptions import ConflictError, TransportError
 from elasticsearch.helpers import bulk
-from flask import abort, current_app, json, request, session
+from flask import abort, current_app, has_app_context, json, request, \
+    session
 from flask_security import current_user
 from invenio_db import db
 from invenio_deposit.api import Deposit, index, preserve
@@ -61,7 +61,7 @@ from sqlalchemy.orm.attributes import flag_modified
 from weko_admin.models import AdminSettings
 from weko_index_tree.api import Indexes
 from weko_records.api import FeedbackMailList, ItemLink, ItemsMetadata, \
-    ItemTypes
+    ItemTypes, TransactionHook
 from weko_records.models import ItemMetadata, ItemReference
 from weko_records.utils import get_all_items, get_attribute_value_all_items, \
     get_options_and_order_list, json_loader, remove_weko2_special_character, \
@@ -71,7 +71,8 @@ from weko_redis.redis import RedisConnection
 from weko_user_profiles.models import UserProfile
 
 from .config import WEKO_DEPOSIT_BIBLIOGRAPHIC_INFO_KEY, \
-    WEKO_DEPOSIT_BIBLIOGRAPHIC_INFO_SYS_KEY, WEKO_DEPOSIT_SYS_CREATOR_KEY
+    WEKO_DEPOSIT_BIBLIOGRAPHIC_INFO_SYS_KEY, \
+    WEKO_DEPOSIT_FILE_CONTENT_ASYNC, WEKO_DEPOSIT_SYS_CREATOR_KEY
 from .pidstore import get_latest_version_id, get_record_without_version, \
     weko_deposit_fetcher, weko_deposit_minter
 
@@ -147,13 +148,6 @@ class WekoIndexer(RecordIndexer):
             revision_id (int): _description_
             skip_files (bool, optional): _description_. Defaults to False.
         """
-        # current_app.logger.error("jrc:{}".format(jrc))
-        # current_app.logger.error("type(jrc):{}".format(type(jrc)))
-        # current_app.logger.error("item_id:{}".format(item_id))
-        # current_app.logger.error("type(item_id:{}".format(type(item_id)))
-        # current_app.logger.error("revision_id:{}".format(revision_id))
-        # current_app.logger.error("type(revision_id:{}".format(type(revision_id)))
-        # current_app.logger.error("skip_files:{}".format(skip_files))
         es_info = dict(id=str(item_id),
                        index=self.es_index,
                        doc_type=self.es_doc_type)
@@ -161,15 +155,51 @@ class WekoIndexer(RecordIndexer):
                     version_type=self._version_type,
                     body=jrc)
 
-        if self.client.exists(**es_info):
+        # A newer version is already indexed, e.g. by partial updates of
+        # the document, overwrite it without versioning.
+        try:
+            self.client.index(**{**es_info, **body})
+        except ConflictError:
             del body['version']
             del body['version_type']
+            self.client.index(**{**es_info, **body})
 
-        # hfix merge
-        # current_app.logger.debug(full_body)
-        # self.client.index(**full_body)
+    def bulk_upload_metadata(self, items):
+        """Upload the data of many items to ElasticSearch in a bulk request.
 
-        self.client.index(**{**es_info, **body})
+        Args:
+            items (list): tuples of the item data, item id and revision id.
+        """
+        self.get_es_index()
+        actions = {}
+        for jrc, item_id, revision_id in items:
+            actions[str(item_id)] = dict(
+                _op_type='index',
+                _id=str(item_id),
+                _index=self.es_index,
+                _type=self.es_doc_type,
+                _version=revision_id + 1,
+                _version_type=self._version_type,
+                _source=jrc,
+            )
+        if not actions:
+            return
+        _, errors = bulk(self.client, actions.values(),
+                         raise_on_error=False)
+        conflicts = []
+        for error in errors:
+            info = error.get('index', {})
+            if info.get('status') == 409 and info.get('_id') in actions:
+                action = actions[info['_id']]
+                del action['_version']
+                del action['_version_type']
+                conflicts.append(action)
+            else:
+                current_app.logger.error(error)
+        if conflicts:
+            _, errors = bulk(self.client, conflicts, raise_on_error=False)
+            for error in errors:
+                current_app.logger.error(error)
 
     def delete_file_index(self, body, parent_id):
         """Delete file index in Elastic search.
@@ -266,6 +296,36 @@ class WekoIndexer(RecordIndexer):
                 body=body
             )
 
+    def bulk_update_es_data(self, records, field='path'):
+        """Update a field of many records in a bulk request.
+
+        The revisions of the records are not checked, as with
+        ``update_es_data(record, update_revision=False)``.
+
+        Args:
+            records (list): Records to update.
+            field (str, optional): Field to update. Defaults to 'path'.
+        """
+        self.get_es_index()
+        updated = datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
+        actions = [dict(
+            _op_type='update',
+            _id=str(record.id),
+            _index=self.es_index,
+            _type=self.es_doc_type,
+            doc={
+                '_item_metadata': {
+                    field: record.get(field)
+                },
+                field: record.get(field),
+                '_updated': updated
+            },
+        ) for record in records]
+        if actions:
+            _, errors = bulk(self.client, actions, raise_on_error=False)
+            for error in errors:
+                current_app.logger.error(error)
+
     def index(self, record):
         """Index a record(fake function).
 
@@ -415,6 +475,59 @@ class WekoIndexer(RecordIndexer):
             body=body
         )
 
+    def get_version(self, item_id):
+        """Get the version of the indexed document of an item.
+
+        :param item_id: Item ID (UUID).
+        :return: Version of the document.
+        """
+        self.get_es_index()
+        return self.client.get(index=self.es_index,
+                               doc_type=self.es_doc_type,
+                               id=str(item_id),
+                               _source=False)['_version']
+
+    def update_file_content(self, item_id, contents):
+        """Update extracted full-text of files of an item.
+
+        :param item_id: Item id.
+        :param contents: dict of full-text by file version id.
+        """
+        self.get_es_index()
+        script = {
+            'source': 'if (ctx._source.content != null) {'
+                      ' for (def c : ctx._source.content) {'
+                      ' if (params.contents.containsKey(c.version_id)) {'
+                      ' c.attachment = ["content":'
+                      ' params.contents.get(c.version_id)]; } } }',
+            'lang': 'painless',
+            'params': {'contents': contents}
+        }
+        return self.client.update(
+            index=self.es_index,
+            doc_type=self.es_doc_type,
+            id=str(item_id),
+            body={'script': script}
+        )
+
+    def bulk_update_author_link(self, author_links):
+        """Update author_link info of many items in a bulk request.
+
+        :param author_links: list of dict of id and author_link.
+        """
+        self.get_es_index()
+        actions = [dict(
+            _op_type='update',
+            _id=str(author_link.get('id')),
+            _index=self.es_index,
+            _type=self.es_doc_type,
+            doc={'author_link': author_link.get('author_link')},
+        ) for author_link in author_links if author_link.get('author_link')]
+        if actions:
+            _, errors = bulk(self.client, actions, raise_on_error=False)
+            for error in errors:
+                current_app.logger.error(error)
+
     def __build_bulk_es_data(self, updated_data):
         """Build ElasticSearch data.
 
@@ -444,6 +557,19 @@ class WekoIndexer(RecordIndexer):
                     current_app.logger.error(error)
 
 
+def _extract_committed_file_contents(session, extracts):
+    """Extract full-text of the files of the committed items."""
+    if has_app_context():
+        from .tasks import extract_file_contents
+        for item_id, (files, version) in extracts.items():
+            extract_file_contents.apply_async(args=(item_id, files, version))
+
+
+file_contents_hook = TransactionHook(
+    'weko_deposit_file_extracts', _extract_committed_file_contents)
+file_contents_hook.register()
+
+
 class WekoDeposit(Deposit):
     """Define API for changing deposit state."""
 
@@ -957,6 +1083,10 @@ class WekoDeposit(Deposit):
                     self.indexer.upload_metadata(self.jrc,
                                                  self.pid.object_uuid,
                                                  self.revision_id)
+                    if getattr(self, 'file_extracts', None):
+                        file_contents_hook.add(
+                            db.session, str(self.pid.object_uuid),
+                            (self.file_extracts, self.revision_id + 1))
                     feedback_mail_list = FeedbackMailList.get_mail_list_by_item_id(self.id)
                     if feedback_mail_list:
                         self.update_feedback_mail()
@@ -1108,7 +1238,11 @@ class WekoDeposit(Deposit):
 
         """
         from weko_workflow.utils import get_url_root
+        from .tasks import extract_file_content, get_file_content
         contents = []
+        extracts = []
+        is_async = current_app.config.get(
+            'WEKO_DEPOSIT_FILE_CONTENT_ASYNC', WEKO_DEPOSIT_FILE_CONTENT_ASYNC)
         fmd = self.get_file_data()
         if fmd:
             for file in self.files:
@@ -1137,12 +1271,20 @@ class WekoDeposit(Deposit):
                                 content = lst.copy()
                                 attachment = {}
                                 if file.obj.mimetype in mimetypes:
-                                    try:
-                                        reader = parser.from_file(file.obj.file.uri)
-                                        attachment["content"] = "".join(reader["content"].splitlines())
-                                    except FileNotFoundError as se:
-                                        current_app.logger.error("FileNotFoundError: {}".format(se))
-                                        current_app.logger.error("file.obj: {}".format(file.obj))
+                                    text = get_file_content(file.obj.file.checksum)
+                                    if text is not None:
+                                        attachment["content"] = text
+                                    elif is_async:
+                                        extracts.append(dict(
+                                            checksum=file.obj.file.checksum,
+                                            uri=file.obj.file.uri,
+                                            size=file.obj.file.size,
+                                            version_id=str(file.obj.version_id)))
+                                    else:
+                                        attachment["content"] = extract_file_content(
+                                            file.obj.file.checksum,
+                                            file.obj.file.uri,
+                                            file.obj.file.size)
 
                                 content.update({"attachment": attachment})
                                 contents.append(content)
@@ -1154,6 +1296,8 @@ class WekoDeposit(Deposit):
                                 abort(500, '{}'.format(str(e2)))
                             break
             self.jrc.update({'content': contents})
+        # The extraction is requested once the item is indexed.
+        self.file_extracts = extracts
 
     def get_file_data(self):
         """ 
@@ -209,3 +209,24 @@ WEKO_DEPOSIT_ES_PARSING_ERROR_PROCESS_ENABLE = True
 
 WEKO_DEPOSIT_ES_PARSING_ERROR_KEYWORD = 'ElasticsearchParseException'
 """Parsing error's Keyword in Elasticsearch exception info."""
+
+WEKO_DEPOSIT_FILE_CONTENT_ASYNC = True
+"""Extract full-text of files in background and update ES when ready."""
+
+WEKO_DEPOSIT_FILE_CONTENT_CACHE_KEY = 'weko_file_content_{checksum}'
+"""Cache key of extracted full-text of files by checksum."""
+
+WEKO_DEPOSIT_FILE_CONTENT_CACHE_TTL = 60 * 60 * 24 * 30
+"""Cache expiration of extracted full-text of files (seconds)."""
+
+WEKO_DEPOSIT_FILE_CONTENT_MAX_FILE_SIZE = 100 * 1024 * 1024
+"""Files larger than this size (bytes) are not extracted."""
+
+WEKO_DEPOSIT_FILE_CONTENT_MAX_LENGTH = 10 * 1024 * 1024
+"""Maximum length of extracted full-text of a file."""
+
+WEKO_DEPOSIT_FILE_CONTENT_WORKERS = 4
+"""Number of files extracted concurrently."""
+
+WEKO_DEPOSIT_FILE_CONTENT_RETRY_COUNTDOWN = 30
+"""Seconds before retrying an update of a not yet indexed item."""
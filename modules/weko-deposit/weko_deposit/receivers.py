@@ -16,6 +16,7 @@ from weko_records.utils import json_loader
 
 from .api import WekoDeposit
 from .pidstore import get_record_without_version
+from .tasks import extract_file_contents
 
 
 def append_file_content(sender, json=None, record=None, index=None, **kwargs):
@@ -52,6 +53,11 @@ def append_file_content(sender, json=None, record=None, index=None, **kwargs):
         im.pop('recid')
         if record_metadata.status != PIDStatus.DELETED:
             dep.get_content_files()
+            if dep.file_extracts:
+                # The document is indexed after this signal, the task
+                # waits for the version of the record.
+                extract_file_contents.apply_async(args=(
+                    str(record.id), dep.file_extracts, record.revision_id))
 
         # Updated metadata's path
         dep.jrc.update(dict(path=dep.get('path')))
@@ -21,11 +21,13 @@
 """Weko Deposit celery tasks."""
 import csv
 import json
+from concurrent.futures import ThreadPoolExecutor
 from time import sleep
 from io import StringIO
 
 from celery import shared_task
 from celery.utils.log import get_task_logger
+from elasticsearch.exceptions import NotFoundError
 from flask import current_app
 from invenio_db import db
 from invenio_indexer.api import RecordIndexer
@@ -34,12 +36,14 @@ from invenio_pidstore.models import PersistentIdentifier
 from invenio_records.models import RecordMetadata
 from invenio_search import RecordsSearch
 from sqlalchemy.exc import SQLAlchemyError
+from tika import parser
 from weko_authors.models import Authors, AuthorsPrefixSettings, AuthorsAffiliationSettings
 from weko_records.api import ItemsMetadata
+from weko_redis.redis import RedisConnection
 from weko_schema_ui.models import PublishStatus
 from weko_workflow.utils import delete_cache_data, update_cache_data
 
-from .api import WekoDeposit
+from .api import WekoDeposit, WekoIndexer
 
 logger = get_task_logger(__name__)
 
@@ -312,9 +316,7 @@ def update_items_by_authorInfo(user_id, target, origin_pkid_list=[], origin_id_l
                 es_bulk_kwargs={'raise_on_error': True})
         if update_es_authorinfo:
             sleep(20)
-            for d in update_es_authorinfo:
-                dep = WekoDeposit.get_record(d['id'])
-                dep.update_author_link(d['author_link'])
+            WekoIndexer().bulk_update_author_link(update_es_authorinfo)
 
         data_total = search['hits']['total']
         if data_total > data_size + data_from:
@@ -486,6 +488,91 @@ def update_db_es_data(origin_pkid_list, origin_id_list):
         db.session.rollback()
 
 
+def get_file_content(checksum):
+    """Get extracted full-text of a file from cache.
+
+    :param checksum: Checksum of the file.
+    :return: Full-text, None if the file is not extracted yet.
+    """
+    redis_connection = RedisConnection()
+    datastore = redis_connection.connection(
+        db=current_app.config['CACHE_REDIS_DB'], kv=True)
+    cache_key = current_app.config[
+        'WEKO_DEPOSIT_FILE_CONTENT_CACHE_KEY'].format(checksum=checksum)
+    try:
+        return datastore.get(cache_key).decode('utf-8')
+    except KeyError:
+        # not extracted yet or expired
+        return None
+
+
+def extract_file_content(checksum, uri, size):
+    """Extract full-text of a file by Tika and cache it by checksum.
+
+    :param checksum: Checksum of the file.
+    :param uri: Location of the file.
+    :param size: Size of the file.
+    :return: Full-text of the file.
+    """
+    content = ''
+    if size is None or size <= current_app.config[
+            'WEKO_DEPOSIT_FILE_CONTENT_MAX_FILE_SIZE']:
+        try:
+            reader = parser.from_file(uri)
+            content = ''.join((reader.get('content') or '').splitlines())
+            content = content[:current_app.config[
+                'WEKO_DEPOSIT_FILE_CONTENT_MAX_LENGTH']]
+        except FileNotFoundError as se:
+            current_app.logger.error("FileNotFoundError: {}".format(se))
+            current_app.logger.error("file: {}".format(uri))
+            return content
+    redis_connection = RedisConnection()
+    datastore = redis_connection.connection(
+        db=current_app.config['CACHE_REDIS_DB'], kv=True)
+    datastore.put(
+        current_app.config['WEKO_DEPOSIT_FILE_CONTENT_CACHE_KEY'].format(
+            checksum=checksum),
+        content.encode('utf-8'),
+        ttl_secs=current_app.config['WEKO_DEPOSIT_FILE_CONTENT_CACHE_TTL'])
+    return content
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=5)
+def extract_file_contents(self, item_id, files, version=None):
+    """Extract full-text of files and update the item in ES.
+
+    The document is updated only when it is indexed with the version or a
+    newer one, so that a later indexing of the item does not overwrite the
+    full-text with the contents of an older document.
+
+    :param item_id: Item id.
+    :param files: list of dict of checksum, uri, size and version_id.
+    :param version: Version of the document to update.
+    """
+    app = current_app._get_current_object()
+
+    def _extract(file):
+        with app.app_context():
+            content = get_file_content(file['checksum'])
+            if content is None:
+                content = extract_file_content(
+                    file['checksum'], file['uri'], file['size'])
+            return file['version_id'], content
+
+    with ThreadPoolExecutor(max_workers=current_app.config[
+            'WEKO_DEPOSIT_FILE_CONTENT_WORKERS']) as executor:
+        contents = dict(executor.map(_extract, files))
+    indexer = WekoIndexer()
+    try:
+        if version is not None and indexer.get_version(item_id) < version:
+            raise NotFoundError(404, 'The document is not indexed yet.')
+        indexer.update_file_content(item_id, contents)
+    except NotFoundError:
+        # The item is not indexed yet.
+        raise self.retry(countdown=current_app.config[
+            'WEKO_DEPOSIT_FILE_CONTENT_RETRY_COUNTDOWN'])
+
+
 def make_stats_file(raw_stats):
     """Make TSV/CSV report file for stats."""
     file_format = current_app.config.get('WEKO_ADMIN_OUTPUT_FORMAT', 'tsv').lower()
@@ -480,8 +480,10 @@ def test_indexes_move(app, db, users, communities, test_indices):
 #     def get_recursive_tree(cls, pid: int = 0):
 #     def get_index_with_role(cls, index_id):
 #     def get_index(cls, index_id, with_count=False):
+#     def get_indexes_by_ids(cls, index_ids):
 #     def get_index_by_name(cls, index_name="", pid=0):
 #     def get_index_by_all_name(cls, index_name=""):
+#     def get_index_by_all_names(cls, index_names):
 #     def get_root_index_count(cls):
 #     def get_account_role(cls):
 #         def _get_dict(x):
@@ -678,6 +680,15 @@ def test_indexes_get_index_tree(i18n_app, db, redis_connect, users, db_records,
         assert res[0].id==1
         assert res[0].index_name=='Test index 1_ja'
 
+        # get_indexes_by_ids
+        res = Indexes.get_indexes_by_ids([1, 3, 999])
+        assert sorted([i.id for i in res])==[1, 3]
+        assert Indexes.get_indexes_by_ids([])==[]
+
+        # get_index_by_all_names
+        res = Indexes.get_index_by_all_names(["Test index 1_ja", "Test index 2_en", "not exist"])
+        assert sorted([i.id for i in res])==[1, 2]
+
         # get_root_index_count
         res = Indexes.get_root_index_count()
         assert res.parent==0
@@ -732,7 +743,10 @@ def test_indexes_get_index_tree(i18n_app, db, redis_connect, users, db_records,
         assert res==False
 
         # set_coverpage_state_resc
-        Indexes.set_coverpage_state_resc(2, True)
+        # the generation is updated by the caller after commit
+        with patch("weko_index_tree.api.update_index_tree_generation") as mock_generation:
+            Indexes.set_coverpage_state_resc(2, True)
+            mock_generation.assert_not_called()
         res = Indexes.get_coverpage_state([21])
         assert res==True
 
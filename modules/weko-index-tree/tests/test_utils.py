@@ -24,11 +24,16 @@ from weko_index_tree.utils import (
     perform_delete_index,
     get_doi_items_in_index,
     cached_index_tree_json,
+    get_index_tree_generation,
+    get_reduced_tree,
+    update_index_tree_generation,
     reset_tree,
     get_tree_json,
+    set_tree_expand_state,
     get_editing_items_in_index,
     reduce_index_by_more,
     reduce_index_by_role,
+    get_private_items_count,
     recorrect_private_items_count,
     sanitize,
     check_doi_in_index,
@@ -47,7 +52,7 @@ from invenio_accounts.testutils import login_user_via_session, client_authentica
 ######
 import json
 import pytest
-from mock import patch
+from mock import MagicMock, patch
 from datetime import date, datetime, timedelta
 from functools import wraps
 from operator import itemgetter
@@ -118,6 +123,108 @@ def test_is_index_tree_updated(app):
 def test_cached_index_tree_json(i18n_app):
     assert cached_index_tree_json()
 
+    class MockIndexes:
+        calls = 0
+
+        @classmethod
+        @cached_index_tree_json(timeout=None, key_prefix="test_index_tree_json")
+        def get_tree(cls, pid=0, lang=None):
+            cls.calls += 1
+            return [{"id": str(pid), "lang": lang}]
+
+    i18n_app.config["WEKO_INDEX_TREE_UPDATED"] = False
+    with i18n_app.test_request_context(headers=[("Accept-Language", "en")]):
+        assert MockIndexes.get_tree(1, "en") == [{"id": "1", "lang": "en"}]
+        assert MockIndexes.get_tree(1, "en") == [{"id": "1", "lang": "en"}]
+        assert MockIndexes.calls == 1
+        assert MockIndexes.get_tree(2, "en") == [{"id": "2", "lang": "en"}]
+        assert MockIndexes.calls == 2
+
+        # a new generation invalidates the cache
+        update_index_tree_generation()
+        MockIndexes.get_tree(1, "en")
+        assert MockIndexes.calls == 3
+    i18n_app.config["WEKO_INDEX_TREE_UPDATED"] = True
+
+
+#+++ def get_index_tree_generation():
+#+++ def update_index_tree_generation():
+def test_index_tree_generation(i18n_app):
+    generation = get_index_tree_generation()
+    update_index_tree_generation()
+    assert get_index_tree_generation() == generation + 1
+
+    with patch("weko_index_tree.utils.RedisConnection.connection",
+               side_effect=Exception("test_error")):
+        assert get_index_tree_generation() is None
+        update_index_tree_generation()
+
+
+#+++ def get_reduced_tree(get_tree, pid=0, path=None, more_ids=None, ignore_more=False):
+def test_get_reduced_tree(i18n_app, users, db):
+    def _get_tree():
+        return [{
+            "id": "1",
+            "settings": {"isCollapsedOnInit": True, "checked": False},
+            "public_state": True,
+            "public_date": None,
+            "browsing_role": "3,-98,-99",
+            "contribute_role": "3,-98,-99",
+            "browsing_group": "",
+            "contribute_group": "",
+            "more_check": False,
+            "display_no": 5,
+            "children": [],
+        }]
+    get_tree = MagicMock(side_effect=_get_tree)
+
+    i18n_app.config["WEKO_INDEX_TREE_UPDATED"] = False
+    with patch("flask_login.utils._get_user", return_value=users[0]['obj']):
+        with i18n_app.test_request_context(
+                headers=[("Accept-Language", "en")]):
+            update_index_tree_generation()
+            tree = get_reduced_tree(get_tree)
+            assert [node["id"] for node in tree] == ["1"]
+            assert "browsing_role" not in tree[0]
+            tree = get_reduced_tree(get_tree)
+            assert [node["id"] for node in tree] == ["1"]
+            assert get_tree.call_count == 1
+
+            # contribute trees are cached per path
+            tree = get_reduced_tree(get_tree, path=["1"])
+            assert tree[0]["settings"]["checked"] is True
+            assert get_tree.call_count == 2
+
+    # the tree of a logged-in user without roles is not served to guests
+    def _get_logged_in_tree():
+        tree = _get_tree()
+        tree[0]["browsing_role"] = "3,-98"
+        return tree
+    get_tree = MagicMock(side_effect=_get_logged_in_tree)
+    with patch("flask_login.utils._get_user", return_value=users[0]['obj']):
+        with i18n_app.test_request_context(
+                headers=[("Accept-Language", "en")]):
+            update_index_tree_generation()
+            assert get_user_roles() == (False, [])
+            tree = get_reduced_tree(get_tree)
+            assert [node["id"] for node in tree] == ["1"]
+            assert get_tree.call_count == 1
+    with i18n_app.test_request_context(
+            headers=[("Accept-Language", "en")]):
+        assert not current_user.is_authenticated
+        tree = get_reduced_tree(get_tree)
+        assert tree == []
+        assert get_tree.call_count == 2
+    get_tree = MagicMock(side_effect=_get_tree)
+
+    # the cache is not used if the index tree is always rebuilt
+    i18n_app.config["WEKO_INDEX_TREE_UPDATED"] = True
+    with patch("flask_login.utils._get_user", return_value=users[0]['obj']):
+        with i18n_app.test_request_context(
+                headers=[("Accept-Language", "en")]):
+            get_reduced_tree(get_tree)
+            assert get_tree.call_count == 1
+
 
 # def reset_tree(tree, path=None, more_ids=None, ignore_more=False):
 # .tox/c1/bin/pytest --cov=weko_index_tree tests/test_utils.py::test_get_index_link_list -v -s -vv --cov-branch --cov-report=term --cov-config=tox.ini --basetemp=/code/modules/weko-index-tree/.tox/c1/tmp
@@ -147,9 +254,51 @@ def test_reset_tree(app, db, users):
             assert tree==[]
 
 
-#*** def get_tree_json(index_list, root_id):
-# def test_get_tree_json(i18n_app, db_records, indices, esindex):
-#     assert get_tree_json([indices['index_non_dict']], 0)
+#+++ def get_tree_json(index_list, root_id):
+def test_get_tree_json(i18n_app):
+    from collections import namedtuple
+    Row = namedtuple("Row", ["pid", "cid", "name", "link_name",
+                             "index_link_enabled", "position"])
+    index_list = [
+        Row(0, 1, "a", "", False, 0),
+        Row(0, 2, "b\n", "", False, 1),
+        Row(1, 3, "c", "", False, 1),
+        Row(1, 4, "d", "", False, 0),
+        Row(3, 5, "e", "", False, 0),
+    ]
+    tree = get_tree_json(index_list, 0)
+    assert [node["id"] for node in tree] == ["1", "2"]
+    assert "parent" not in tree[0]
+    assert tree[1]["name"] == "b<br\\>"
+    assert [node["id"] for node in tree[0]["children"]] == ["4", "3"]
+    assert tree[0]["children"][1]["parent"] == "1"
+    assert tree[0]["children"][1]["children"][0]["parent"] == "1/3"
+    assert tree[0]["settings"]["isCollapsedOnInit"] is True
+
+    tree = get_tree_json(index_list, 3)
+    assert tree[0]["id"] == "3"
+    assert "parent" not in tree[0]
+    assert tree[0]["children"][0]["parent"] == "3"
+
+
+#+++ def set_tree_expand_state(tree, list_index_expand=None):
+def test_set_tree_expand_state(i18n_app):
+    tree = [
+        {"id": "1", "settings": {"isCollapsedOnInit": True},
+         "children": [{"id": "2", "settings": {"isCollapsedOnInit": True},
+                       "children": []},
+                      {"id": "more", "value": "more..."}]},
+    ]
+    set_tree_expand_state(tree, [2])
+    assert tree[0]["settings"]["isCollapsedOnInit"] is True
+    assert tree[0]["children"][0]["settings"]["isCollapsedOnInit"] is False
+
+    with i18n_app.test_request_context():
+        from flask import session
+        session["index_tree_expand_state"] = ["1"]
+        set_tree_expand_state(tree)
+    assert tree[0]["settings"]["isCollapsedOnInit"] is False
+    assert tree[0]["children"][0]["settings"]["isCollapsedOnInit"] is True
 
 
 #+++ def get_user_roles():
@@ -414,6 +563,21 @@ def test_count_items(count_json_data):
     assert count_items(indexes_aggr)
 
 
+# def get_private_items_count(agg):
+# .tox/c1/bin/pytest --cov=weko_index_tree tests/test_utils.py::test_get_private_items_count -v -s -vv --cov-branch --cov-report=term --cov-config=tox.ini --basetemp=/code/modules/weko-index-tree/.tox/c1/tmp
+def test_get_private_items_count():
+    agg = {
+        "no_available": {"doc_count": 2},
+        "date_range": {"available": {"buckets": [
+            {"from": 1, "doc_count": 3},
+            {"to": 1, "doc_count": 5},
+        ]}},
+    }
+    assert get_private_items_count(agg) == 5
+    # The bucket is not modified.
+    assert agg["no_available"]["doc_count"] == 2
+
+
 #+++  def recorrect_private_items_count(agp):
 def test_recorrect_private_items_count(i18n_app, records):
     agp = records['aggregations']['path']['buckets']
@@ -45,8 +45,10 @@ from weko_redis.redis import RedisConnection
 from .models import Index
 from .utils import cached_index_tree_json, check_doi_in_index, \
     check_restrict_doi_with_indexes, filter_index_list_by_role, \
-    get_index_id_list, get_publish_index_id_list, get_tree_json, \
-    get_user_roles, is_index_locked, reset_tree, sanitize, save_index_trees_to_redis
+    get_index_id_list, get_publish_index_id_list, get_reduced_tree, \
+    get_tree_json, get_user_roles, is_index_locked, reset_tree, sanitize, \
+    save_index_trees_to_redis, set_tree_expand_state, \
+    update_index_tree_generation
 
 
 class Indexes(object):
@@ -169,6 +171,8 @@ class Indexes(object):
             del data
             if not is_ok:
                 db.session.rollback()
+            else:
+                update_index_tree_generation()
         return is_ok
 
     @classmethod
@@ -235,6 +239,7 @@ class Indexes(object):
                 index.owner_user_id = current_user.get_id()
                 db.session.merge(index)
             db.session.commit()
+            update_index_tree_generation()
             cls.update_set_info(index)
             return index
         except Exception as ex:
@@ -532,12 +537,19 @@ class Indexes(object):
                 ret['is_ok'] = False
                 ret['msg'] = str(ex)
                 current_app.logger.debug(ex)
+            if ret['is_ok']:
+                update_index_tree_generation()
         return ret
 
     @classmethod
-    @cached_index_tree_json(timeout=None,)
     def get_index_tree(cls, pid=0, lang=None):
-        """Get index tree json."""
+        """Get index tree json with the expand state of the current user."""
+        return set_tree_expand_state(cls.get_shared_index_tree(pid, lang))
+
+    @classmethod
+    @cached_index_tree_json(timeout=None,)
+    def get_shared_index_tree(cls, pid=0, lang=None):
+        """Get index tree json shared by all users."""
         return get_tree_json(cls.get_recursive_tree(pid, lang), pid)
 
     @classmethod
@@ -556,8 +568,8 @@ class Indexes(object):
         return browsing_info
 
     @classmethod
-    def get_browsing_tree(cls, pid=0):
-        """Get browsing tree."""
+    def get_browsing_base_tree(cls, pid=0):
+        """Get the shared tree the browsing trees are reduced from."""
         if pid == 0:
             try:
                 redis_connection = RedisConnection()
@@ -565,42 +577,32 @@ class Indexes(object):
                 v = datastore.get("index_tree_view_" + os.environ.get('INVENIO_WEB_HOST_NAME') + "_" + current_i18n.language).decode("UTF-8")
                 tree = json.loads(str(v))
             except RedisError:
-                tree = cls.get_index_tree(pid)
+                tree = cls.get_shared_index_tree(pid)
                 save_index_trees_to_redis(tree)
             except KeyError:
-                tree = cls.get_index_tree(pid)
+                tree = cls.get_shared_index_tree(pid)
                 save_index_trees_to_redis(tree)
         else:
-            tree = cls.get_index_tree(pid)
-        reset_tree(tree=tree)
+            tree = cls.get_shared_index_tree(pid)
         return tree
 
+    @classmethod
+    def get_browsing_tree(cls, pid=0):
+        """Get browsing tree."""
+        return get_reduced_tree(
+            partial(cls.get_browsing_base_tree, pid), pid)
+
     @classmethod
     def get_more_browsing_tree(cls, pid=0, more_ids=[]):
         """Get more browsing tree."""
-        tree = cls.get_index_tree(pid)
-        reset_tree(tree=tree, more_ids=more_ids)
-        return tree
+        return get_reduced_tree(
+            partial(cls.get_shared_index_tree, pid), pid, more_ids=more_ids)
 
     @classmethod
     def get_browsing_tree_ignore_more(cls, pid=0):
         """Get browsing tree ignore more."""
-        if pid == 0:
-            try:
-                redis_connection = RedisConnection()
-                datastore = redis_connection.connection(db=current_app.config['CACHE_REDIS_DB'], kv = True)
-                v = datastore.get("index_tree_view_" + os.environ.get('INVENIO_WEB_HOST_NAME') + "_" + current_i18n.language).decode("UTF-8")
-                tree = json.loads(str(v))
-            except RedisError:
-                tree = cls.get_index_tree(pid)
-                save_index_trees_to_redis(tree)
-            except KeyError:
-                tree = cls.get_index_tree(pid)
-                save_index_trees_to_redis(tree)
-        else:
-            tree = cls.get_index_tree(pid)
-        reset_tree(tree=tree, ignore_more=True)
-        return tree
+        return get_reduced_tree(
+            partial(cls.get_browsing_base_tree, pid), pid, ignore_more=True)
 
     @classmethod
     def get_browsing_tree_paths(cls, index_id: int = 0):
@@ -623,13 +625,10 @@ class Indexes(object):
         """Get Contrbute tree."""
         from weko_deposit.api import WekoRecord
         record = WekoRecord.get_record_by_pid(pid)
-        tree = cls.get_index_tree(root_node_id)
-        if record.get('_oai'):
-            reset_tree(tree=tree, path=record.get('path'))
-        else:
-            reset_tree(tree=tree, path=[])
-
-        return tree
+        path = record.get('path') if record.get('_oai') else []
+        return get_reduced_tree(
+            partial(cls.get_shared_index_tree, root_node_id), root_node_id,
+            path=path)
 
     @classmethod
     def get_recursive_tree(cls, pid: int = 0, lang: str = None):
@@ -740,6 +739,20 @@ class Indexes(object):
 
         return obj
 
+    @classmethod
+    def get_indexes_by_ids(cls, index_ids):
+        """Get indexes by their identifiers in one query.
+
+        :param index_ids: Identifiers of the indexes.
+        :return: list of index object
+        """
+        if not index_ids:
+            return []
+        with db.session.begin_nested():
+            obj = db.session.query(Index). \
+                filter(Index.id.in_(index_ids)).all()
+        return obj
+
     @classmethod
     def get_index_by_name(cls, index_name="", pid=0):
         """Validation importing zip file.
@@ -772,6 +785,22 @@ class Indexes(object):
                               Index.index_name == index_name)).all()
         return obj
 
+    @classmethod
+    def get_index_by_all_names(cls, index_names):
+        """Get indexes by index names (jp, eng).
+
+        :argument
+            index_names  -- {list} Index names.
+        :return
+            return       -- list of index object
+
+        """
+        with db.session.begin_nested():
+            obj = db.session.query(Index). \
+                filter(db.or_(Index.index_name_english.in_(index_names),
+                              Index.index_name.in_(index_names))).all()
+        return obj
+
     @classmethod
     def get_root_index_count(cls):
         """Get root index."""
@@ -63,8 +63,17 @@ WEKO_INDEX_TREE_REST_ENDPOINTS = dict(
     )
 )
 
-WEKO_INDEX_TREE_UPDATED = True
-"""For index tree cache."""
+WEKO_INDEX_TREE_UPDATED = False
+"""Rebuild the index tree on every request instead of using the cache."""
+
+WEKO_INDEX_TREE_GENERATION_KEY = "index_tree_generation"
+"""Redis key of the generation of the index tree."""
+
+WEKO_INDEX_TREE_REDUCED_CACHE_PREFIX = "index_tree_reduced"
+"""Cache key prefix of the index trees reduced by roles."""
+
+WEKO_INDEX_TREE_REDUCED_CACHE_TIMEOUT = 3600
+"""Timeout (sec) of the index trees reduced by roles."""
 
 WEKO_INDEX_TREE_RSS_DEFAULT_INDEX_ID = 0
 """Default number of the index_id in RSS."""
@@ -247,8 +247,8 @@ class IndexActionResource(ContentNegotiatedMethodView):
 
             langs = AdminLangSettings.get_registered_language()
             if "ja" in [lang["lang_code"] for lang in langs]:
-                tree_ja = self.record_class.get_index_tree(lang="ja")
-            tree = self.record_class.get_index_tree(lang="other_lang")
+                tree_ja = self.record_class.get_shared_index_tree(lang="ja")
+            tree = self.record_class.get_shared_index_tree(lang="other_lang")
             for lang in langs:
                 lang_code = lang["lang_code"]
                 if lang_code == "ja":
@@ -310,8 +310,8 @@ class IndexActionResource(ContentNegotiatedMethodView):
             #for role in roles:
             langs = AdminLangSettings.get_registered_language()
             if "ja" in [lang["lang_code"] for lang in langs]:
-                tree_ja = self.record_class.get_index_tree(lang="ja")
-            tree = self.record_class.get_index_tree(lang="other_lang")
+                tree_ja = self.record_class.get_shared_index_tree(lang="ja")
+            tree = self.record_class.get_shared_index_tree(lang="other_lang")
             for lang in langs:
                 lang_code = lang["lang_code"]
                 if lang_code == "ja":
@@ -342,8 +342,8 @@ class IndexActionResource(ContentNegotiatedMethodView):
 
         langs = AdminLangSettings.get_registered_language()
         if "ja" in [lang["lang_code"] for lang in langs]:
-            tree_ja = self.record_class.get_index_tree(lang="ja")
-        tree = self.record_class.get_index_tree(lang="other_lang")
+            tree_ja = self.record_class.get_shared_index_tree(lang="ja")
+        tree = self.record_class.get_shared_index_tree(lang="other_lang")
         for lang in langs:
             lang_code = lang["lang_code"]
             if lang_code == "ja":
@@ -523,8 +523,8 @@ class IndexTreeActionResource(ContentNegotiatedMethodView):
                 msg = _('Index moved successfully.')
             langs = AdminLangSettings.get_registered_language()
             if "ja" in [lang["lang_code"] for lang in langs]:
-                    tree_ja = self.record_class.get_index_tree(lang="ja")
-            tree = self.record_class.get_index_tree(lang="other_lang")
+                    tree_ja = self.record_class.get_shared_index_tree(lang="ja")
+            tree = self.record_class.get_shared_index_tree(lang="other_lang")
             for lang in langs:
                 lang_code = lang["lang_code"]
                 if lang_code == "ja":
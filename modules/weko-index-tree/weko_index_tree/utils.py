@@ -26,7 +26,8 @@ from operator import itemgetter
 
 from elasticsearch.exceptions import NotFoundError
 from elasticsearch_dsl.query import Bool, Exists, Q, QueryString
-from flask import Markup, current_app, session, json
+from flask import Markup, current_app, has_request_context, json, \
+    session
 from flask_babelex import get_locale
 from flask_babelex import gettext as _
 from flask_babelex import to_user_timezone, to_utc
@@ -67,19 +68,119 @@ def is_index_tree_updated():
     return current_app.config['WEKO_INDEX_TREE_UPDATED']
 
 
+def get_index_tree_generation():
+    """Get the generation of the index tree.
+
+    The generation is increased each time indexes are changed, and is part
+    of the keys of the cached index trees.
+    """
+    try:
+        redis_connection = RedisConnection()
+        datastore = redis_connection.connection(
+            db=current_app.config['CACHE_REDIS_DB'])
+        value = datastore.get(
+            current_app.config['WEKO_INDEX_TREE_GENERATION_KEY'])
+        return int(value) if value else 0
+    except Exception as ex:
+        current_app.logger.error(ex)
+        return None
+
+
+def update_index_tree_generation():
+    """Increase the generation of the index tree."""
+    try:
+        redis_connection = RedisConnection()
+        datastore = redis_connection.connection(
+            db=current_app.config['CACHE_REDIS_DB'])
+        datastore.incr(current_app.config['WEKO_INDEX_TREE_GENERATION_KEY'])
+    except Exception as ex:
+        current_app.logger.error(ex)
+
+
 def cached_index_tree_json(timeout=50, key_prefix='index_tree_json'):
-    """Cache index tree json."""
+    """Cache index tree json.
+
+    The tree is cached per index id, language and generation of the index
+    tree, so the cache is invalidated when the indexes are changed.
+    """
     def caching(f):
         @wraps(f)
-        def wrapper(*args, **kwargs):
-            cache_fun = current_cache.cached(
-                timeout=timeout, key_prefix=key_prefix + current_i18n.language,
-                forced_update=is_index_tree_updated)
-            return cache_fun(f)(*args, **kwargs)
+        def wrapper(cls, pid=0, lang=None):
+            generation = get_index_tree_generation()
+            if generation is None or is_index_tree_updated():
+                return f(cls, pid, lang)
+            cache_key = '{}_{}_{}_{}'.format(
+                key_prefix, generation, lang or current_i18n.language, pid)
+            tree = current_cache.get(cache_key)
+            if tree is None:
+                tree = f(cls, pid, lang)
+                current_cache.set(cache_key, tree, timeout=timeout)
+            return tree
         return wrapper
     return caching
 
 
+def get_reduced_tree(get_tree, pid=0, path=None, more_ids=None,
+                     ignore_more=False):
+    """Get the index tree reduced for the roles of the current user.
+
+    The reduced tree is cached per generation of the index tree, roles and
+    groups of the user and reset_tree arguments, so trees of common role
+    combinations are served without building the tree again.
+
+    :param get_tree: Function returning the shared index tree.
+    :param pid: Index id of the root of the tree.
+    :param path: Paths of the checked indexes for the contribute tree.
+    :param more_ids: Index ids whose children are all displayed.
+    :param ignore_more: Display all children.
+    :return: The reduced tree with the expand state of the user.
+    """
+    generation = get_index_tree_generation()
+    cache_key = None
+    if generation is not None and not is_index_tree_updated():
+        is_admin, role_ids = get_user_roles()
+        if is_admin:
+            role_key = 'admin'
+        elif not current_user.is_authenticated:
+            # guests are checked by -99 and have no groups
+            role_key = '-99'
+        else:
+            # logged-in users without roles are checked by -98
+            role_key = '{}-{}'.format(
+                ','.join(sorted(str(r) for r in role_ids or [])) or '-98',
+                ','.join(sorted(str(g) for g in get_user_groups())))
+        if path is not None and not isinstance(path, list):
+            path_key = str(path)
+        else:
+            path_key = ','.join(sorted(str(p) for p in path or []))
+        cache_key = '{}_{}_{}_{}_{}_{}_{}_{}_{}'.format(
+            current_app.config['WEKO_INDEX_TREE_REDUCED_CACHE_PREFIX'],
+            generation,
+            current_i18n.language,
+            pid,
+            role_key,
+            path_key if path is not None else '-',
+            ','.join(sorted(str(i) for i in more_ids or [])),
+            ignore_more,
+            # public dates of indexes are compared with the current time
+            datetime.utcnow().strftime('%Y%m%d%H')
+        )
+        tree = current_cache.get(cache_key)
+        if tree is not None:
+            return set_tree_expand_state(tree)
+
+    tree = get_tree()
+    if isinstance(path, list):
+        path = list(path)
+    reset_tree(tree=tree, path=path, more_ids=more_ids,
+               ignore_more=ignore_more)
+    if cache_key:
+        current_cache.set(
+            cache_key, tree,
+            timeout=current_app.config['WEKO_INDEX_TREE_REDUCED_CACHE_TIMEOUT'])
+    return set_tree_expand_state(tree)
+
+
 def reset_tree(tree, path=None, more_ids=None, ignore_more=False):
     """
     Reset the state of checked.
@@ -112,6 +213,10 @@ def reset_tree(tree, path=None, more_ids=None, ignore_more=False):
 def get_tree_json(index_list, root_id):
     """Get Tree Json.
 
+    The tree is built in one pass over index_list and does not depend on the
+    current user, so it can be cached and shared. The expand state of the
+    user is applied afterwards by set_tree_expand_state.
+
     :param index_list:
     :param root_id:
     :return:
@@ -126,15 +231,7 @@ def get_tree_json(index_list, root_id):
         index_relation[index_element.pid].append(index_element.cid)
         index_position[index_element.cid] = position
 
-    def get_user_list_expand():
-        """Get list index expand."""
-        key = current_app.config.get(
-            "WEKO_INDEX_TREE_STATE_PREFIX",
-            WEKO_INDEX_TREE_STATE_PREFIX
-        )
-        return session.get(key, [])
-
-    def generate_index_dict(index_element, is_root):
+    def generate_index_dict(index_element, parent_path):
         """Formats an index_element, which is a tuple, into a nicely formatted dictionary."""
         index_dict = index_element._asdict()
         index_name = str(index_element.name).replace("&EMPTY&", "")
@@ -144,16 +241,9 @@ def get_tree_json(index_list, root_id):
         index_link_name = str(index_element.link_name).replace("&EMPTY&", "")
         index_link_name = index_link_name.replace("\n", r"<br\>")
 
-        if not is_root:
-            pid = str(index_element.pid)
-            parent = index_list[index_position[index_element.pid]]
-            while parent.pid and parent.cid != root_id:
-                pid = '{}/{}'.format(parent.pid, pid)
-                parent = index_list[index_position[parent.pid]]
-            index_dict.update({'parent': pid})
+        if parent_path:
+            index_dict.update({'parent': parent_path})
 
-        list_index_expand = get_user_list_expand()
-        is_expand_on_init = str(index_element.cid) in list_index_expand
         index_dict.update({
             'id': str(index_element.cid),
             'value': index_name,
@@ -163,7 +253,7 @@ def get_tree_json(index_list, root_id):
             'position': index_element.position,
             'emitLoadNextLevel': False,
             'settings': {
-                'isCollapsedOnInit': not is_expand_on_init,
+                'isCollapsedOnInit': True,
                 'checked': False
             }
         })
@@ -182,16 +272,23 @@ def get_tree_json(index_list, root_id):
                 index_dict.update({attr: getattr(index_element, attr)})
         return index_dict
 
-    def get_children(parent_index_id):
-        """Recursively gets all children of a given index id."""
+    def get_children(parent_index_id, parent_path):
+        """Recursively gets all children of a given index id.
+
+        :param parent_index_id: Id of the parent index.
+        :param parent_path: Path of the parent index from the root index,
+            or None for the children of the top level.
+        """
         child_list = []
         for child_index_id in index_relation.get(parent_index_id, []):
             child_index = index_list[index_position[child_index_id]]
-            child_index_dict = generate_index_dict(
-                child_index, parent_index_id == 0)
+            child_index_dict = generate_index_dict(child_index, parent_path)
 
             # Recursively get grandchildren
-            child_index_dict['children'] = get_children(child_index_id)
+            child_path = str(child_index_id) if not parent_path \
+                else '{}/{}'.format(parent_path, child_index_id)
+            child_index_dict['children'] = get_children(
+                child_index_id, child_path)
 
             child_list.append(child_index_dict)
 
@@ -199,16 +296,51 @@ def get_tree_json(index_list, root_id):
         return child_list
 
     if root_id == 0:
-        index_tree = get_children(root_id)
+        index_tree = get_children(root_id, None)
     else:
         root_index = index_list[index_position[root_id]]
-        root_index_dict = generate_index_dict(root_index, True)
-        root_index_dict['children'] = get_children(root_id)
+        root_index_dict = generate_index_dict(root_index, None)
+        root_index_dict['children'] = get_children(root_id, str(root_id))
         index_tree = [root_index_dict]
 
     return index_tree
 
 
+def get_user_list_expand():
+    """Get list index expand of the current user."""
+    if not has_request_context():
+        return []
+    key = current_app.config.get(
+        "WEKO_INDEX_TREE_STATE_PREFIX",
+        WEKO_INDEX_TREE_STATE_PREFIX
+    )
+    return session.get(key, [])
+
+
+def set_tree_expand_state(tree, list_index_expand=None):
+    """Set the expand state of the current user to the index tree.
+
+    :param tree: Index tree built by get_tree_json.
+    :param list_index_expand: Expanded index ids. Defaults to the ones saved
+        in the session.
+    :return: The index tree.
+    """
+    if list_index_expand is None:
+        list_index_expand = get_user_list_expand()
+    expand_ids = set(str(index_id) for index_id in list_index_expand)
+    nodes = list(tree)
+    while nodes:
+        node = nodes.pop()
+        if not isinstance(node, dict):
+            continue
+        if isinstance(node.get('settings'), dict):
+            node['settings']['isCollapsedOnInit'] = \
+                node.get('id') not in expand_ids
+        if isinstance(node.get('children'), list):
+            nodes.extend(node['children'])
+    return tree
+
+
 def get_user_roles():
     """Get user roles."""
     def _check_admin():
@@ -555,6 +687,19 @@ def count_items(indexes_aggr):
     return pri_items, pub_items
 
 
+def get_private_items_count(agg):
+    """Get private item count including unpublished items.
+
+    :param agg: aggregation bucket of an index returned from ES
+    :return: count of private items
+    """
+    count = agg["no_available"]["doc_count"]
+    for bk in agg["date_range"]['available']['buckets']:
+        if bk.get("from"):
+            count += bk.get("doc_count")
+    return count
+
+
 def recorrect_private_items_count(agp):
     """Re-correct private item count in case of unpublished items.
 
@@ -562,11 +707,7 @@ def recorrect_private_items_count(agp):
     :return:
     """
     for agg in agp:
-        date_range = agg["date_range"]
-        bkt = date_range['available']['buckets']
-        for bk in bkt:
-            if bk.get("from"):
-                agg["no_available"]["doc_count"] += bk.get("doc_count")
+        agg["no_available"]["doc_count"] = get_private_items_count(agg)
 
 
 def check_doi_in_index(index_id):
@@ -978,6 +1119,7 @@ def perform_delete_index(index_id, record_class, action: str):
                         description='Could not delete data.')
             msg = 'Index deleted successfully.'
         db.session.commit()
+        update_index_tree_generation()
     except Exception as e:
         db.session.rollback()
         current_app.logger.erorr(e)
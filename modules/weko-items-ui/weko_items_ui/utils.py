@@ -1907,11 +1907,12 @@ def make_stats_file(item_type_id, recids, list_item_role, export_path=""):
     """
     from weko_records_ui.views import escape_newline, escape_str
 
-    item_type = ItemTypes.get_by_id(item_type_id).render
+    item_type = dict(ItemTypes.get_cached_record(item_type_id).model.render)
     list_hide = get_item_from_option(item_type_id)
     no_permission_show_hide = hide_meta_data_for_role(
         list_item_role.get(item_type_id))
     if no_permission_show_hide and item_type and item_type.get('table_row'):
+        item_type['table_row'] = list(item_type['table_row'])
         for name_hide in list_hide:
             item_type['table_row'] = hide_table_row(
                 item_type.get('table_row'), name_hide)
@@ -2288,7 +2289,7 @@ def make_stats_file(item_type_id, recids, list_item_role, export_path=""):
     ret_option = []
     multiple_option = ['.metadata.path', '.pos_index',
                        '.feedback_mail', '.file_path', '.thumbnail_path']
-    meta_list = item_type.get('meta_list', {})
+    meta_list = dict(item_type.get('meta_list', {}))
     meta_list.update(item_type.get('meta_fix', {}))
     form = item_type.get('table_row_map', {}).get('form', {})
     del_num = 0
@@ -3295,9 +3296,10 @@ def get_options_list(item_type_id, json_item=None):
     :return: options dict
     """
     if json_item is None:
-        json_item = ItemTypes.get_record(item_type_id)
-    meta_options = json_item.model.render.get('meta_fix')
-    meta_options.update(json_item.model.render.get('meta_list'))
+        json_item = ItemTypes.get_cached_record(item_type_id)
+    meta_options = copy.deepcopy(json_item.model.render.get('meta_fix'))
+    meta_options.update(
+        copy.deepcopy(json_item.model.render.get('meta_list')))
     return meta_options
 
 
@@ -1,4 +1,5 @@
-from weko_records_ui.ipaddr import  check_site_license_permission,match_ip_addr
+from weko_records_ui.ipaddr import  check_site_license_permission,match_ip_addr,SiteLicenseIndex,site_license_index
+from weko_records.models import SiteLicenseIpAddress
 from mock import patch
 from unittest.mock import MagicMock
 
@@ -29,9 +30,62 @@ def test_check_site_license_permission2(app,site_license_info,site_license_ipadd
     with app.test_request_context(headers={'X-Real-IP': '192.168.0.1','X-Forwarded-For': '192.168.254.1, 192.168.255.1'}):
         assert check_site_license_permission()==True
 
+# .tox/c1/bin/pytest --cov=weko_records_ui tests/test_ipaddr.py::test_check_site_license_permission_ipv6 -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-records-ui/.tox/c1/tmp
+def test_check_site_license_permission_ipv6(app,db,site_license_info,site_license_ipaddr):
+    with app.test_request_context(headers={'X-Real-IP': '2001:db8::1'}):
+        assert check_site_license_permission()==False
+
+    # the index is rebuilt when the site licenses are changed
+    record = SiteLicenseIpAddress(organization_id=1,organization_no=2,start_ip_address="2001:db8::",finish_ip_address="2001:db8::ffff")
+    with db.session.begin_nested():
+        db.session.add(record)
+    with app.test_request_context(headers={'X-Real-IP': '2001:db8::1'}):
+        assert check_site_license_permission()==True
+    with app.test_request_context(headers={'X-Real-IP': '2001:db8::1:0'}):
+        assert check_site_license_permission()==False
+    with app.test_request_context(headers={'X-Real-IP': '::ffff:192.168.0.1'}):
+        assert check_site_license_permission()==True
 
+    with patch("weko_records_ui.ipaddr.SiteLicense.get_records") as mock_get_records:
+        with app.test_request_context(headers={'X-Real-IP': '192.168.0.1'}):
+            assert check_site_license_permission()==True
+        mock_get_records.assert_not_called()
+
+
+# class SiteLicenseIndex(object):
+#     def build(site_licenses):
+# .tox/c1/bin/pytest --cov=weko_records_ui tests/test_ipaddr.py::test_site_license_index_build -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-records-ui/.tox/c1/tmp
+def test_site_license_index_build(app):
+    site_licenses = [
+        {"organization_name": "org1", "addresses": [
+            {"start_ip_address": "10.0.0.10", "finish_ip_address": "10.0.0.20"},
+            {"start_ip_address": "2001:db8::", "finish_ip_address": "2001:db8::ff"}]},
+        {"organization_name": "org2", "addresses": [
+            {"start_ip_address": "10.0.0.0", "finish_ip_address": "10.0.0.255"},
+            {"start_ip_address": "10.0.1.0", "finish_ip_address": "10.0.0.0"},
+            {"start_ip_address": "10.0.2.0", "finish_ip_address": "2001:db8::"},
+            {"start_ip_address": "invalid", "finish_ip_address": "10.0.3.0"}]},
+    ]
+    index = SiteLicenseIndex.build(site_licenses)
+    assert index[4] == (
+        [167772160, 167772170, 167772181],
+        [167772169, 167772180, 167772415],
+        ["org2", "org1", "org2"])
+    assert index[6] == (
+        [42540766411282592856903984951653826560],
+        [42540766411282592856903984951653826815],
+        ["org1"])
+
+    index = SiteLicenseIndex()
+    with patch("weko_records_ui.ipaddr.SiteLicense.get_records", return_value=site_licenses):
+        with patch("weko_records_ui.ipaddr.SiteLicense.get_generation", return_value=b"1"):
+            assert index.match("10.0.0.15") == "org1"
+            assert index.match("10.0.0.21") == "org2"
+            assert index.match("10.0.1.0") is None
+            assert index.match("2001:db8::10") == "org1"
+            assert index.match("2001:db8::100") is None
+            assert index.match("invalid") is None
 
-            
 
 # def match_ip_addr(addr, ip_addr):
 # .tox/c1/bin/pytest --cov=weko_records_ui tests/test_ipaddr.py::test_match_ip_addr -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-records-ui/.tox/c1/tmp
@@ -41,4 +95,8 @@ def test_match_ip_addr():
     assert match_ip_addr(addr,ip_addr) == True
     ip_addr = "192.168.1.100"
     assert match_ip_addr(addr,ip_addr) == False
+    ip_addr = "2001:db8::1"
+    assert match_ip_addr(addr,ip_addr) == False
+    addr = {"start_ip_address": "2001:db8::","finish_ip_address":"2001:db8::ffff"}
+    assert match_ip_addr(addr,ip_addr) == True
     
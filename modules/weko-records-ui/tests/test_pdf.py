@@ -1,7 +1,10 @@
+import uuid
+
 import pytest
 from mock import MagicMock, patch
 from six import BytesIO
-from weko_records_ui.pdf import get_east_asian_width_count,make_combined_pdf
+from weko_records_ui.pdf import get_east_asian_width_count,make_combined_pdf, \
+    get_cover_page_cache_key, make_cover_page, remove_expired_combined_pdfs
 from invenio_files_rest.models import Bucket, Location, ObjectVersion
 
 # def get_east_asian_width_count(text):
@@ -11,12 +14,12 @@ def test_get_east_asian_width_count():
     assert get_east_asian_width_count("english")==7
     
 
-# def make_combined_pdf(pid, fileobj, obj, lang_user):
+# def get_pid_object(pid_value):
+# def make_cover_page(pid):
 #     def pixels_to_mm(val):
 #     def resize_to_fit(imgFilename):
 #     def get_center_position(imgFilename):
 #     def get_right_position(imgFilename):
-#     def get_pid_object(pid_value):
 #     def get_current_activity_id(pid_object):
 #     def get_url(pid_value):
 #     def get_oa_policy(activity_id):
@@ -33,7 +36,10 @@ def test_make_combined_pdf(app,records,itemtypes,pdfcoverpagesetting):
         data1.header_output_image = "tests/data/image01.jpg"
         data2 = MagicMock()
 
-        with patch("weko_records_ui.pdf.PDFCoverPageSettings.find", return_value=data1):
+        # Render a new cover page for each call.
+        with patch("weko_records_ui.pdf.PDFCoverPageSettings.find", return_value=data1), \
+                patch("weko_records_ui.pdf.get_cover_page_cache_key",
+                      side_effect=lambda *args: uuid.uuid4().hex):
             with patch("weko_records_ui.pdf.get_record_permalink", return_value=""):
                 data1.header_display_position = "left"
                 assert make_combined_pdf(record.pid,data1,obj,None).status_code == 200
@@ -60,4 +66,83 @@ def test_make_combined_pdf(app,records,itemtypes,pdfcoverpagesetting):
                 }
                 
                 with patch("weko_records_ui.pdf.tempfile.gettempdir", return_value="tests/data"):
-                    assert make_combined_pdf(record.pid,data1,obj,None).status_code == 200
\ No newline at end of file
+                    assert make_combined_pdf(record.pid,data1,obj,None).status_code == 200
+
+
+# def get_cover_page_cache_key(pid, fileobj, obj):
+# .tox/c1/bin/pytest --cov=weko_records_ui tests/test_pdf.py::test_get_cover_page_cache_key -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-records-ui/.tox/c1/tmp
+def test_get_cover_page_cache_key(app,records,itemtypes,pdfcoverpagesetting):
+    indexer, results = records
+    record = results[0]["record"]
+    obj = results[0]['obj']
+    fileobj = record['item_1617605131499']
+    with app.test_request_context(headers=[("Accept-Language", "en")]):
+        key = get_cover_page_cache_key(record.pid,fileobj,obj)
+        assert key == get_cover_page_cache_key(record.pid,fileobj,obj)
+
+        with patch("weko_records_ui.pdf.current_i18n") as i18n:
+            i18n.language = "ja"
+            assert key != get_cover_page_cache_key(record.pid,fileobj,obj)
+
+        setting = MagicMock()
+        setting.header_output_image = ""
+        with patch("weko_records_ui.pdf.PDFCoverPageSettings.find", return_value=setting):
+            assert key != get_cover_page_cache_key(record.pid,fileobj,obj)
+
+        metadata = MagicMock()
+        metadata.revision_id = 100
+        with patch("weko_records_ui.pdf.ItemsMetadata.get_record", return_value=metadata):
+            assert key != get_cover_page_cache_key(record.pid,fileobj,obj)
+
+        assert key != get_cover_page_cache_key(record.pid,{"checksum": "md5:x"},obj)
+
+        with patch("weko_records_ui.pdf.item_setting_show_email", return_value=True):
+            key_show_email = get_cover_page_cache_key(record.pid,fileobj,obj)
+        with patch("weko_records_ui.pdf.item_setting_show_email", return_value=False):
+            assert key_show_email != get_cover_page_cache_key(record.pid,fileobj,obj)
+
+        item_type = MagicMock()
+        item_type.model.version_id = 100
+        with patch("weko_records_ui.pdf.ItemTypes.get_cached_record", return_value=item_type):
+            assert key != get_cover_page_cache_key(record.pid,fileobj,obj)
+
+
+# def get_cover_page(pid, cache_key):
+# .tox/c1/bin/pytest --cov=weko_records_ui tests/test_pdf.py::test_make_combined_pdf_cached -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-records-ui/.tox/c1/tmp
+def test_make_combined_pdf_cached(app,records,itemtypes,pdfcoverpagesetting,tmpdir):
+    indexer, results = records
+    record = results[0]["record"]
+    obj = results[0]['obj']
+    fileobj = record['item_1617605131499']
+    cache_key = uuid.uuid4().hex
+    with app.test_request_context(headers=[("Accept-Language", "en")]):
+        with patch("weko_records_ui.pdf.tempfile.gettempdir", return_value=str(tmpdir)), \
+                patch("weko_records_ui.pdf.get_cover_page_cache_key", return_value=cache_key):
+            with patch("weko_records_ui.pdf.make_cover_page", wraps=make_cover_page) as cover:
+                assert make_combined_pdf(record.pid,fileobj,obj,None).status_code == 200
+                assert cover.call_count == 1
+                assert tmpdir.join("comb_pdfs", cache_key + ".pdf").check()
+
+                # The combined PDF file is sent without being rendered again.
+                assert make_combined_pdf(record.pid,fileobj,obj,None).status_code == 200
+                assert cover.call_count == 1
+
+                # The cover page is taken from the cache.
+                tmpdir.join("comb_pdfs", cache_key + ".pdf").remove()
+                assert make_combined_pdf(record.pid,fileobj,obj,None).status_code == 200
+                assert cover.call_count == 1
+                assert tmpdir.join("comb_pdfs", cache_key + ".pdf").check()
+
+
+# def remove_expired_combined_pdfs(dir_path):
+# .tox/c1/bin/pytest --cov=weko_records_ui tests/test_pdf.py::test_remove_expired_combined_pdfs -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-records-ui/.tox/c1/tmp
+def test_remove_expired_combined_pdfs(app,tmpdir):
+    old = tmpdir.join("old.pdf")
+    old.write("old")
+    old.setmtime(0)
+    new = tmpdir.join("new.pdf")
+    new.write("new")
+    with app.app_context():
+        remove_expired_combined_pdfs(str(tmpdir))
+    assert not old.check()
+    assert new.check()
@@ -645,3 +645,15 @@ WEKO_RECORDS_UI_DISPLAY_RESOURCE_TYPE = False
 
 WEKO_RECORDS_UI_DISPLAY_ITEM_TYPE = True
 """ Display item type name on item detail. """
+
+WEKO_RECORDS_UI_SITE_LICENSE_CHECK_INTERVAL = 5
+"""Seconds between checks of the site license generation in Redis."""
+
+WEKO_RECORDS_UI_COVER_PAGE_CACHE_KEY = 'weko_records_ui_cover_page::{key}'
+"""Redis key of a rendered PDF cover page."""
+
+WEKO_RECORDS_UI_COVER_PAGE_CACHE_TTL = 60 * 60 * 24
+"""Seconds a rendered cover page and a combined PDF file are kept."""
+
+WEKO_RECORDS_UI_COMBINED_PDF_DIR = 'comb_pdfs'
+"""Directory under the temporary directory to keep combined PDF files."""
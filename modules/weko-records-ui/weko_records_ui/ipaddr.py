@@ -20,13 +20,147 @@
 
 """Utilities for site license check."""
 
+import heapq
 import ipaddress
+import threading
+import time
+from bisect import bisect_right
 
 from flask import current_app, request
 from flask_security import current_user
 from weko_accounts.utils import get_remote_addr
 from weko_records.api import SiteLicense
 
+from .config import WEKO_RECORDS_UI_SITE_LICENSE_CHECK_INTERVAL
+
+
+class SiteLicenseIndex(object):
+    """Per process interval index of the site license address ranges.
+
+    The ranges are compiled into sorted disjoint intervals of integer
+    addresses for each IP version, so that an address is looked up with a
+    binary search. Where ranges overlap the first organization wins, as in
+    the order of :meth:`SiteLicense.get_records`. The index is rebuilt when
+    the site licenses are changed in this process or their generation in
+    Redis is incremented.
+    """
+
+    def __init__(self):
+        """Initialize the index."""
+        self._index = None
+        self._lock = threading.Lock()
+        self._changes = None
+        self._generation = None
+        self._checked_at = 0
+
+    def clear(self):
+        """Clear the index of this process."""
+        self._index = None
+
+    def validate(self):
+        """Clear the index if the site licenses have been updated."""
+        if self._changes != SiteLicense.changes:
+            self._changes = SiteLicense.changes
+            self.clear()
+        now = time.time()
+        if now - self._checked_at < current_app.config.get(
+                'WEKO_RECORDS_UI_SITE_LICENSE_CHECK_INTERVAL',
+                WEKO_RECORDS_UI_SITE_LICENSE_CHECK_INTERVAL):
+            return
+        self._checked_at = now
+        generation = SiteLicense.get_generation()
+        if generation is None or generation != self._generation:
+            self._generation = generation
+            self.clear()
+
+    @staticmethod
+    def build(site_licenses):
+        """Compile the address ranges of site licenses.
+
+        :param site_licenses: Site licenses of :meth:`SiteLicense.get_records`.
+        :return: Dict of IP version to tuple of the lists of interval starts,
+            interval ends and organization names.
+        """
+        ranges = {4: [], 6: []}
+        for order, site_license in enumerate(site_licenses):
+            for addr in site_license.get('addresses') or []:
+                try:
+                    start = ipaddress.ip_address(
+                        addr.get('start_ip_address'))
+                    finish = ipaddress.ip_address(
+                        addr.get('finish_ip_address'))
+                except ValueError:
+                    current_app.logger.warning(
+                        'Invalid site license address: {}'.format(addr))
+                    continue
+                if start.version != finish.version or start > finish:
+                    continue
+                ranges[start.version].append(
+                    (int(start), int(finish), order,
+                     site_license.get('organization_name')))
+
+        index = {}
+        for version, intervals in ranges.items():
+            intervals.sort()
+            bounds = sorted(set([i[0] for i in intervals]
+                                + [i[1] + 1 for i in intervals]))
+            starts, ends, names = [], [], []
+            active = []
+            pos = 0
+            for i, bound in enumerate(bounds[:-1]):
+                while pos < len(intervals) and intervals[pos][0] == bound:
+                    _, finish, order, name = intervals[pos]
+                    heapq.heappush(active, (order, finish, name))
+                    pos += 1
+                while active and active[0][1] < bound:
+                    heapq.heappop(active)
+                if not active:
+                    continue
+                order, _, name = active[0]
+                end = bounds[i + 1] - 1
+                if ends and ends[-1] + 1 == bound and names[-1][0] == order:
+                    ends[-1] = end
+                else:
+                    starts.append(bound)
+                    ends.append(end)
+                    names.append((order, name))
+            index[version] = (starts, ends, [n[1] for n in names])
+        return index
+
+    def get(self):
+        """Get the index, build it if needed."""
+        self.validate()
+        index = self._index
+        if index is None:
+            with self._lock:
+                index = self._index
+                if index is None:
+                    index = self.build(SiteLicense.get_records())
+                    self._index = index
+        return index
+
+    def match(self, ip_addr):
+        """Find the site license of an address.
+
+        :param ip_addr: IPv4 or IPv6 address.
+        :return: Organization name, None if no site license matches.
+        """
+        try:
+            ip_addr = ipaddress.ip_address(ip_addr)
+        except ValueError:
+            return None
+        if ip_addr.version == 6 and ip_addr.ipv4_mapped:
+            ip_addr = ip_addr.ipv4_mapped
+        starts, ends, names = self.get()[ip_addr.version]
+        value = int(ip_addr)
+        pos = bisect_right(starts, value) - 1
+        if pos >= 0 and value <= ends[pos]:
+            return names[pos]
+        return None
+
+
+site_license_index = SiteLicenseIndex()
+
 
 def check_site_license_permission():
     """Check Site License Permission.
@@ -35,18 +169,12 @@ def check_site_license_permission():
     """
     ip_addr = get_remote_addr()
 
-    sl_lst = SiteLicense.get_records()
     if ip_addr:
-        for lst in sl_lst:
-            current_app.logger.debug(lst)
-            addresses = lst.get('addresses')
-            for adr in addresses:
-                
-                if match_ip_addr(adr, ip_addr):
-                    current_user.site_license_flag = True
-                    current_user.site_license_name = \
-                        lst.get('organization_name')
-                    return True
+        name = site_license_index.match(ip_addr)
+        if name is not None:
+            current_user.site_license_flag = True
+            current_user.site_license_name = name
+            return True
     return False
 
 
@@ -57,25 +185,13 @@ def match_ip_addr(addr, ip_addr):
     :param ip_addr:
     :return: True or False
     """
-    s_ddr = addr.get('start_ip_address')
-    f_ddr = addr.get('finish_ip_address')
-    ipaddress.ip_address(s_ddr)
-    ipaddress.ip_address(f_ddr)
+    s_ddr = ipaddress.ip_address(addr.get('start_ip_address'))
+    f_ddr = ipaddress.ip_address(addr.get('finish_ip_address'))
+    ip_addr = ipaddress.ip_address(ip_addr)
+    if ip_addr.version == 6 and ip_addr.ipv4_mapped:
+        ip_addr = ip_addr.ipv4_mapped
 
-    ip_addr = ip_addr.split('.')
-    s_ddr = s_ddr.split('.')
-    f_ddr = f_ddr.split('.')
-
-    str0 = ""
-    str1 = ""
-    str2 = ""
-
-    for i in range(4):
-        str0 += '{:0>3}'.format(ip_addr[i])
-        str1 += '{:0>3}'.format(s_ddr[i])
-        str2 += '{:0>3}'.format(f_ddr[i])
-
-    if (int(str1) <= int(str0)) and (int(str0) <= int(str2)):
-        return True
-
-    return False
+    if s_ddr.version != ip_addr.version \
+            or f_ddr.version != ip_addr.version:
+        return False
+    return s_ddr <= ip_addr <= f_ddr
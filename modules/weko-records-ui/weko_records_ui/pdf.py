@@ -21,10 +21,13 @@
 """Utilities for making the PDF cover page and newly combined PDFs."""
 
 import errno
+import hashlib
 import io
 import json
 import os
+import pickle
 import tempfile
+import time
 import unicodedata
 from datetime import datetime
 
@@ -39,15 +42,18 @@ from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from PyPDF2 import PdfFileReader, PdfFileWriter
 from weko_deposit.api import WekoRecord
 from weko_items_autofill.utils import get_workflow_journal
-from weko_records.api import ItemsMetadata
+from weko_records.api import ItemsMetadata, ItemTypes
 from weko_records.serializers.feed import WekoFeedGenerator
 from weko_records.serializers.utils import get_mapping
 from weko_records.utils import get_value_by_selected_lang
+from weko_redis.redis import RedisConnection
 from weko_workflow.api import WorkActivity
 
 from weko_records_ui.utils import get_record_permalink, \
     item_setting_show_email
 
+from .config import WEKO_RECORDS_UI_COMBINED_PDF_DIR, \
+    WEKO_RECORDS_UI_COVER_PAGE_CACHE_KEY, WEKO_RECORDS_UI_COVER_PAGE_CACHE_TTL
 from .models import PDFCoverPageSettings
 from .utils import get_license_pdf, get_pair_value
 
@@ -63,14 +69,28 @@ def get_east_asian_width_count(text):
     return count
 
 
-def make_combined_pdf(pid, fileobj, obj, lang_user):
-    """Make the cover-page-combined PDF file.
+def get_pid_object(pid_value):
+    """Get the PID of the record version shown on the cover page.
+
+    :param pid_value: PID value of the record
+    :return: PID object
+    """
+    pid_object = PersistentIdentifier.get('recid', pid_value)
+    pv = PIDVersioning(child=pid_object)
+    latest_pid = PIDVersioning(parent=pv.parent, child=pid_object).get_children(
+        pid_status=PIDStatus.REGISTERED).filter(
+        PIDRelation.relation_type == 2).order_by(
+        PIDRelation.index.desc()).first()
+    cur_pid = pid_object if '.' in pid_value else latest_pid
+
+    return cur_pid
+
+
+def make_cover_page(pid):
+    """Render the PDF cover page of the record.
 
     :param pid: PID object
-    :param fileobj: File metadata
-    :param obj: File object
-    :param lang_user: LANGUAGE of access user
-    :return: cover-page-combined PDF file object
+    :return: tuple of the cover page PDF bytes and the item title
     """
     DPI = 96
     MM_IN_INCH = 25.4
@@ -121,17 +141,6 @@ def make_combined_pdf(pid, fileobj, obj, lang_user):
 
         return position_x, position_y
 
-    def get_pid_object(pid_value):
-        pid_object = PersistentIdentifier.get('recid', pid_value)
-        pv = PIDVersioning(child=pid_object)
-        latest_pid = PIDVersioning(parent=pv.parent, child=pid_object).get_children(
-            pid_status=PIDStatus.REGISTERED).filter(
-            PIDRelation.relation_type == 2).order_by(
-            PIDRelation.index.desc()).first()
-        cur_pid = pid_object if '.' in pid_value else latest_pid
-
-        return cur_pid
-
     def get_current_activity_id(pid_object):
         activity = WorkActivity()
         latest_workflow = activity.get_workflow_activity_by_item_id(
@@ -594,20 +603,154 @@ def make_combined_pdf(pid, fileobj, obj, lang_user):
 
     # Convert PDF cover page data as bytecode
     output = pdf.output(dest='S').encode('latin-1')
-    b_output = io.BytesIO(output)
 
-    # Combine cover page and existing pages
-    cover_page = PdfFileReader(b_output, strict=False)
-    f = obj.file.storage().open()
-    existing_pages = PdfFileReader(f)
+    return output, title
+
 
-    # In the case the PDF file is encrypted by the password, ''(i.e. not
-    # encrypted intentionally)
-    if existing_pages.isEncrypted:
+def get_cover_page_cache_key(pid, fileobj, obj):
+    """Get the key identifying a cover page and its combined PDF file.
 
+    The key changes with the record revision, the item type, the PDF cover
+    page settings, the email display setting, the language and the file
+    content, so that the cached cover pages and combined PDF files are not
+    used after any of them has changed.
+
+    :param pid: PID object
+    :param fileobj: File metadata
+    :param obj: File object
+    :return: key string
+    """
+    pid_object = get_pid_object(pid.pid_value)
+    item_metadata = ItemsMetadata.get_record(pid_object.object_uuid)
+    item_type_id = ItemsMetadata.get_by_object_id(
+        pid_object.object_uuid).item_type_id
+    # The hidden items are set in the render of the item type.
+    item_type = ItemTypes.get_cached_record(item_type_id, with_deleted=True)
+    setting = PDFCoverPageSettings.find(1)
+    header_image = setting.header_output_image
+    header_image_mtime = None
+    if isinstance(header_image, str) and os.path.isfile(header_image):
+        header_image_mtime = os.path.getmtime(header_image)
+    values = [
+        str(pid_object.object_uuid),
+        getattr(item_metadata, 'revision_id', None),
+        item_type_id,
+        item_type.model.version_id if item_type else None,
+        item_type.model.updated if item_type else None,
+        setting.updated_at,
+        item_setting_show_email(),
+        header_image,
+        header_image_mtime,
+        current_i18n.language,
+        request.host_url,
+        obj.file_id,
+        fileobj.get('checksum'),
+    ]
+    return hashlib.sha256(
+        json.dumps(values, default=str).encode('utf-8')).hexdigest()
+
+
+def get_cover_page(pid, cache_key):
+    """Get the cover page of the record from cache or render it.
+
+    :param pid: PID object
+    :param cache_key: Key made by get_cover_page_cache_key
+    :return: tuple of the cover page PDF bytes and the item title
+    """
+    redis_key = current_app.config.get(
+        'WEKO_RECORDS_UI_COVER_PAGE_CACHE_KEY',
+        WEKO_RECORDS_UI_COVER_PAGE_CACHE_KEY).format(key=cache_key)
+    datastore = None
+    try:
+        datastore = RedisConnection().connection(
+            db=current_app.config['CACHE_REDIS_DB'], kv=True)
+        if datastore.redis.exists(redis_key):
+            cached = pickle.loads(datastore.get(redis_key))
+            return cached['cover'], cached['title']
+    except Exception as ex:
+        current_app.logger.warning(ex)
+
+    cover, title = make_cover_page(pid)
+    if datastore is not None:
         try:
-            existing_pages.decrypt('')
-        except BaseException:  # Errors such as NotImplementedError
+            datastore.put(
+                redis_key,
+                pickle.dumps({'cover': cover, 'title': title}),
+                ttl_secs=current_app.config.get(
+                    'WEKO_RECORDS_UI_COVER_PAGE_CACHE_TTL',
+                    WEKO_RECORDS_UI_COVER_PAGE_CACHE_TTL))
+        except Exception as ex:
+            current_app.logger.warning(ex)
+    return cover, title
+
+
+def remove_expired_combined_pdfs(dir_path):
+    """Remove the combined PDF files which are not used for a while.
+
+    :param dir_path: Directory of the combined PDF files
+    """
+    expired = time.time() - current_app.config.get(
+        'WEKO_RECORDS_UI_COVER_PAGE_CACHE_TTL',
+        WEKO_RECORDS_UI_COVER_PAGE_CACHE_TTL)
+    for entry in os.scandir(dir_path):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < expired:
+                os.remove(entry.path)
+        except OSError:
+            # Removed by another process.
+            pass
+
+
+def make_combined_pdf(pid, fileobj, obj, lang_user):
+    """Make the cover-page-combined PDF file.
+
+    The cover page is cached in Redis and the combined PDF file is kept in
+    the temporary directory by the key made by get_cover_page_cache_key, so
+    the same file is sent without being rendered and merged again.
+
+    :param pid: PID object
+    :param fileobj: File metadata
+    :param obj: File object
+    :param lang_user: LANGUAGE of access user
+    :return: cover-page-combined PDF file object
+    """
+    title = None
+    cache_key = get_cover_page_cache_key(pid, fileobj, obj)
+    dir_path = os.path.join(
+        tempfile.gettempdir(),
+        current_app.config.get('WEKO_RECORDS_UI_COMBINED_PDF_DIR',
+                               WEKO_RECORDS_UI_COMBINED_PDF_DIR), '')
+    combined_filepath = dir_path + '{}.pdf'.format(cache_key)
+
+    if not os.path.isfile(combined_filepath):
+        output, title = get_cover_page(pid, cache_key)
+        b_output = io.BytesIO(output)
+
+        # Combine cover page and existing pages
+        cover_page = PdfFileReader(b_output, strict=False)
+        f = obj.file.storage().open()
+        existing_pages = PdfFileReader(f)
+
+        # In the case the PDF file is encrypted by the password, ''(i.e. not
+        # encrypted intentionally)
+        if existing_pages.isEncrypted:
+
+            try:
+                existing_pages.decrypt('')
+            except BaseException:  # Errors such as NotImplementedError
+                return ObjectResource.send_object(
+                    obj.bucket, obj,
+                    expected_chksum=fileobj.get('checksum'),
+                    logger_data={
+                        'bucket_id': obj.bucket_id,
+                        'pid_type': pid.pid_type,
+                        'pid_value': pid.pid_value,
+                    },
+                    as_attachment=False
+                )
+
+        # In the case the PDF file is encrypted by the password except ''
+        if existing_pages.isEncrypted:
             return ObjectResource.send_object(
                 obj.bucket, obj,
                 expected_chksum=fileobj.get('checksum'),
@@ -619,43 +762,25 @@ def make_combined_pdf(pid, fileobj, obj, lang_user):
                 as_attachment=False
             )
 
-    # In the case the PDF file is encrypted by the password except ''
-    if existing_pages.isEncrypted:
-        return ObjectResource.send_object(
-            obj.bucket, obj,
-            expected_chksum=fileobj.get('checksum'),
-            logger_data={
-                'bucket_id': obj.bucket_id,
-                'pid_type': pid.pid_type,
-                'pid_value': pid.pid_value,
-            },
-            as_attachment=False
-        )
-
-    combined_pages = PdfFileWriter()
-    combined_pages.addPage(cover_page.getPage(0))
-
-    for page_num in range(existing_pages.numPages):
-        existing_page = existing_pages.getPage(page_num)
-        combined_pages.addPage(existing_page)
-
-    # Download the newly generated combined PDF file
-    try:
-        combined_filename = 'CV_' + datetime.now().strftime('%Y%m%d') + '_' + \
-                            fileobj['filename']
-    except (KeyError, IndexError):
-        combined_filename = 'CV_' + title + '.pdf'
-
-    dir_path = tempfile.gettempdir() + '/comb_pdfs/'
+        combined_pages = PdfFileWriter()
+        combined_pages.addPage(cover_page.getPage(0))
 
-    if not os.path.isdir(dir_path):
-        os.mkdir(dir_path)
+        for page_num in range(existing_pages.numPages):
+            existing_page = existing_pages.getPage(page_num)
+            combined_pages.addPage(existing_page)
 
-    combined_filepath = dir_path + '{}.pdf'.format(combined_filename)
-
-    with open(combined_filepath, 'wb') as f:
+        tmp_filepath = None
         try:
-            combined_pages.write(f)
+            os.makedirs(dir_path, exist_ok=True)
+            remove_expired_combined_pdfs(dir_path)
+            # Write to a temporary file first so that a partially written
+            # file is never sent to the other requests.
+            with tempfile.NamedTemporaryFile(
+                    dir=dir_path, suffix='.tmp', delete=False) as tmp:
+                tmp_filepath = tmp.name
+                combined_pages.write(tmp)
+            os.replace(tmp_filepath, combined_filepath)
+            tmp_filepath = None
         except FileNotFoundError as ex:
             current_app.logger.error(ex)
             err_txt = ''.join((
@@ -695,6 +820,12 @@ def make_combined_pdf(pid, fileobj, obj, lang_user):
                         '<pid_value>', pid.pid_value
                     )
                 )
+            current_app.logger.error(ex)
+            return redirect(
+                current_app.config['RECORDS_UI_ENDPOINTS']['recid']['route'].replace(
+                    '<pid_value>', pid.pid_value
+                )
+            )
         except Exception as ex:
             import traceback
             current_app.logger.error(traceback.print_exc())
@@ -705,6 +836,18 @@ def make_combined_pdf(pid, fileobj, obj, lang_user):
                     '<pid_value>', pid.pid_value
                 )
             )
+        finally:
+            if tmp_filepath and os.path.isfile(tmp_filepath):
+                os.remove(tmp_filepath)
+
+    # Download the newly generated combined PDF file
+    try:
+        combined_filename = 'CV_' + datetime.now().strftime('%Y%m%d') + '_' + \
+                            fileobj['filename']
+    except (KeyError, IndexError):
+        if title is None:
+            __, title = get_cover_page(pid, cache_key)
+        combined_filename = 'CV_' + title + '.pdf'
 
     return send_file(
         combined_filepath,
@@ -36,7 +36,8 @@ from sqlalchemy.orm.exc import NoResultFound
 
 from weko_records.api import FeedbackMailList, FilesMetadata, ItemLink, \
     ItemsMetadata, ItemTypeEditHistory, ItemTypeNames, ItemTypeProps, \
-    ItemTypes, Mapping, SiteLicense, RecordBase, WekoRecord
+    ItemTypes, Mapping, SiteLicense, RecordBase, WekoRecord, item_type_cache, \
+    TransactionHook
 from weko_records.models import ItemType, ItemTypeName, \
     SiteLicenseInfo, SiteLicenseIpAddress
 from jsonschema.validators import Draft4Validator
@@ -502,6 +503,104 @@ def test_itemtypes_get_record(app, db):
     assert item_type.model.render=={}
     assert item_type.model.tag==1
 
+# class ItemTypes(RecordBase):
+#     def get_cached_record(cls, id_, with_deleted=False):
+# .tox/c1/bin/pytest --cov=weko_records tests/test_api.py::test_itemtypes_get_cached_record -v -s -vv --cov-branch --cov-report=term --cov-config=tox.ini --basetemp=/code/modules/weko-records/.tox/c1/tmp
+def test_itemtypes_get_cached_record(app, db):
+    ItemTypes.create(name='test', schema={'properties': {}})
+    it = ItemTypes.create(name='test2')
+    ItemTypes.delete(it)
+    db.session.commit()
+
+    with patch.object(ItemTypes, 'get_record',
+                      wraps=ItemTypes.get_record) as mock_get:
+        item_type = ItemTypes.get_cached_record(1)
+        assert item_type=={'properties': {}}
+        assert item_type.id==1
+        assert item_type.model.item_type_name.name=='test'
+        assert item_type.model.render=={}
+        assert item_type.model.tag==1
+        assert ItemTypes.get_cached_record(1) is item_type
+        assert mock_get.call_count==1
+
+        assert ItemTypes.get_cached_record(2)==None
+        assert ItemTypes.get_cached_record(2, True).model.item_type_name.name=='test2'
+        assert mock_get.call_count==3
+
+        # updated item type is loaded again
+        obj = ItemType.query.filter_by(id=1).one()
+        obj.render = {'table_row': []}
+        db.session.commit()
+        item_type = ItemTypes.get_cached_record(1)
+        assert item_type.model.render=={'table_row': []}
+        assert mock_get.call_count==4
+
+        # updated in other process
+        app.config['WEKO_RECORDS_ITEM_TYPE_CACHE_CHECK_INTERVAL'] = 0
+        with patch.object(item_type_cache, '_datastore') as mock_datastore:
+            mock_datastore.return_value.get.return_value = b'test-1'
+            ItemTypes.get_cached_record(1)
+            assert mock_get.call_count==5
+            ItemTypes.get_cached_record(1)
+            assert mock_get.call_count==5
+            mock_datastore.return_value.get.return_value = b'test-2'
+            ItemTypes.get_cached_record(1)
+            assert mock_get.call_count==6
+
+        # loaded again after the max age
+        app.config['WEKO_RECORDS_ITEM_TYPE_CACHE_CHECK_INTERVAL'] = 3600
+        ItemTypes.get_cached_record(1)
+        count = mock_get.call_count
+        ItemTypes.get_cached_record(1)
+        assert mock_get.call_count==count
+        app.config['WEKO_RECORDS_ITEM_TYPE_CACHE_MAX_AGE'] = -1
+        ItemTypes.get_cached_record(1)
+        assert mock_get.call_count==count + 1
+        app.config['WEKO_RECORDS_ITEM_TYPE_CACHE_MAX_AGE'] = 3600
+
+        # generation is updated after the outermost commit only
+        with patch.object(item_type_cache, 'invalidate') as mock_invalidate:
+            with db.session.begin_nested():
+                obj = ItemType.query.filter_by(id=1).one()
+                obj.tag = 2
+            mock_invalidate.assert_not_called()
+            db.session.commit()
+            mock_invalidate.assert_called_once()
+
+# class TransactionHook(object):
+# .tox/c1/bin/pytest --cov=weko_records tests/test_api.py::test_transaction_hook -v -s -vv --cov-branch --cov-report=term --cov-config=tox.ini --basetemp=/code/modules/weko-records/.tox/c1/tmp
+def test_transaction_hook(app, db):
+    on_commit = MagicMock()
+    on_rollback = MagicMock()
+    hook = TransactionHook('test_changes', on_commit, on_rollback)
+    hook.register()
+    try:
+        # SAVEPOINT release and rollback keep the changes
+        with db.session.begin_nested():
+            hook.add(db.session, 'a')
+        with pytest.raises(ValueError):
+            with db.session.begin_nested():
+                hook.add(db.session, 'b', 2)
+                raise ValueError
+        on_commit.assert_not_called()
+        on_rollback.assert_not_called()
+
+        db.session.commit()
+        on_commit.assert_called_once_with(db.session, {'a': True, 'b': 2})
+        assert 'test_changes' not in db.session.info
+
+        hook.add(db.session, 'c')
+        db.session.rollback()
+        on_rollback.assert_called_once_with(db.session, {'c': True})
+        assert on_commit.call_count == 1
+    finally:
+        hook.unregister()
+
+    hook.add(db.session, 'd')
+    db.session.commit()
+    assert on_commit.call_count == 1
+    db.session.info.pop('test_changes', None)
+
 # class ItemTypes(RecordBase):
 #     def get_records(cls, ids, with_deleted=False):
 # .tox/c1/bin/pytest --cov=weko_records tests/test_api.py::test_itemtypes_get_records -v -s -vv --cov-branch --cov-report=term --cov-config=tox.ini --basetemp=/code/modules/weko-records/.tox/c1/tmp
@@ -937,6 +1036,12 @@ def test_mapping_get_record(app, db):
     assert mapping.model.item_type_id==2
     assert mapping.model.mapping=={}
 
+    mapping = Mapping.get_cached_record(1)
+    assert mapping=={'mapping': 'test'}
+    assert mapping.model.item_type_id==1
+    assert Mapping.get_cached_record(1) is mapping
+    assert Mapping.get_cached_record(0)==None
+
     mappings = Mapping.get_records([0], False)
     assert len(mappings)==0
     # need to fix
@@ -1627,6 +1732,19 @@ def test_site_license_update(app, db, site_license_info):
     assert records[0]['mail_address']=='nii@nii.co.jp'
     assert records[0]['addresses']==[{'finish_ip_address': '255.255.255.255', 'start_ip_address': '0.0.0.0'}]
 
+    _test_obj['site_license'][0]['addresses'] = [
+        {'start_ip_address': '2001:db8::', 'finish_ip_address': '2001:db8::ffff'}]
+    changes = SiteLicense.changes
+    with patch("weko_records.api.SiteLicense.invalidate") as mock_invalidate:
+        with db.session.begin_nested():
+            SiteLicense.update(_test_obj)
+        assert SiteLicense.changes > changes
+        mock_invalidate.assert_not_called()
+        db.session.commit()
+        mock_invalidate.assert_called_once()
+    records = SiteLicense.get_records()
+    assert records[0]['addresses']==[{'finish_ip_address': '2001:db8::ffff', 'start_ip_address': '2001:db8::'}]
+
 # class RevisionsIterator(object):
 #     def __init__(self, model):
 #     def __len__(self):
@@ -26,10 +26,14 @@ from typing import Union
 import json
 import copy
 import re
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
 
 from elasticsearch.exceptions import NotFoundError
 from elasticsearch_dsl.query import QueryString
-from flask import current_app, request
+from flask import current_app, has_app_context, request
 from flask_babelex import gettext as _
 from invenio_db import db
 from invenio_pidstore.models import PersistentIdentifier, PIDStatus
@@ -41,13 +45,21 @@ from invenio_records.signals import after_record_delete, after_record_insert, \
     before_record_insert, before_record_revert, before_record_update
 from invenio_search import RecordsSearch
 from jsonpatch import apply_patch
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session, object_session
 from sqlalchemy.orm.attributes import flag_modified
 from sqlalchemy.sql.expression import desc
+from weko_redis.redis import RedisConnection
 from werkzeug.local import LocalProxy
 
 
 
+from .config import WEKO_RECORDS_ITEM_TYPE_CACHE_CHECK_INTERVAL, \
+    WEKO_RECORDS_ITEM_TYPE_CACHE_GENERATION_KEY, \
+    WEKO_RECORDS_ITEM_TYPE_CACHE_MAX_AGE, \
+    WEKO_RECORDS_ITEM_TYPE_CACHE_SIZE, \
+    WEKO_RECORDS_SITE_LICENSE_GENERATION_KEY
 from .fetchers import weko_record_fetcher
 from .models import FeedbackMailList as _FeedbackMailList
 from .models import FileMetadata, ItemMetadata, ItemReference, ItemType
@@ -60,6 +72,218 @@ _records_state = LocalProxy(
     lambda: current_app.extensions['invenio-records'])
 
 
+class ItemTypeCache(object):
+    """Per process LRU cache of item types and mappings.
+
+    The cached records are shared and must not be modified. The cache is
+    validated against a generation counter in Redis which is incremented
+    when item types or mappings are committed, and the records are loaded
+    again after WEKO_RECORDS_ITEM_TYPE_CACHE_MAX_AGE seconds.
+    """
+
+    def __init__(self):
+        """Initialize the cache."""
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self._checked_at = 0
+
+    def clear(self):
+        """Clear the cache of this process."""
+        with self._lock:
+            self._records.clear()
+
+    def _datastore(self):
+        return RedisConnection().connection(
+            db=current_app.config['CACHE_REDIS_DB'])
+
+    def _generation_key(self):
+        return current_app.config.get(
+            'WEKO_RECORDS_ITEM_TYPE_CACHE_GENERATION_KEY',
+            WEKO_RECORDS_ITEM_TYPE_CACHE_GENERATION_KEY)
+
+    def validate(self):
+        """Clear the cache if item types or mappings have been updated."""
+        now = time.time()
+        if now - self._checked_at < current_app.config.get(
+                'WEKO_RECORDS_ITEM_TYPE_CACHE_CHECK_INTERVAL',
+                WEKO_RECORDS_ITEM_TYPE_CACHE_CHECK_INTERVAL):
+            return
+        self._checked_at = now
+        try:
+            generation = self._datastore().get(self._generation_key())
+        except Exception as ex:
+            current_app.logger.warning(
+                'Failed to get item type cache generation: {}'.format(ex))
+            generation = None
+            self.clear()
+        if generation != self._generation:
+            self._generation = generation
+            self.clear()
+
+    def invalidate(self):
+        """Increment the generation to clear the caches of all processes."""
+        self.clear()
+        try:
+            self._datastore().incr(self._generation_key())
+        except Exception as ex:
+            current_app.logger.warning(
+                'Failed to update item type cache generation: {}'.format(ex))
+
+    def get(self, key, loader):
+        """Get a record from the cache or load it.
+
+        :param key: Cache key.
+        :param loader: Function to load the record, returns None if the
+            record does not exist.
+        :returns: The record.
+        """
+        self.validate()
+        now = time.time()
+        with self._lock:
+            if key in self._records:
+                loaded_at, record = self._records[key]
+                if now - loaded_at < current_app.config.get(
+                        'WEKO_RECORDS_ITEM_TYPE_CACHE_MAX_AGE',
+                        WEKO_RECORDS_ITEM_TYPE_CACHE_MAX_AGE):
+                    self._records.move_to_end(key)
+                    return record
+                del self._records[key]
+        record = loader()
+        if record is not None:
+            with self._lock:
+                self._records[key] = (now, record)
+                while len(self._records) > current_app.config.get(
+                        'WEKO_RECORDS_ITEM_TYPE_CACHE_SIZE',
+                        WEKO_RECORDS_ITEM_TYPE_CACHE_SIZE):
+                    self._records.popitem(last=False)
+        return record
+
+
+item_type_cache = ItemTypeCache()
+
+
+class TransactionHook(object):
+    """Run a callback when the outermost transaction of a session ends.
+
+    Changes are collected in ``session.info`` until the transaction ends.
+    SQLAlchemy also emits ``after_commit`` when a SAVEPOINT is released and
+    ``after_soft_rollback`` when a SAVEPOINT or a subtransaction is rolled
+    back, so those events are ignored and the changes are kept until the
+    outermost transaction is committed or rolled back.
+    """
+
+    def __init__(self, name, on_commit, on_rollback=None):
+        """Initialize the hook.
+
+        :param name: Key of the changes in ``session.info``.
+        :param on_commit: Called with the session and the dict of the changes
+            after the outermost transaction is committed.
+        :param on_rollback: Called with the session and the dict of the
+            changes after the outermost transaction is rolled back.
+        """
+        self.name = name
+        self.on_commit = on_commit
+        self.on_rollback = on_rollback
+
+    def register(self):
+        """Listen to the transaction events of all the sessions."""
+        event.listen(Session, 'after_commit', self._committed)
+        event.listen(Session, 'after_soft_rollback', self._rolled_back)
+
+    def unregister(self):
+        """Stop listening to the transaction events."""
+        if event.contains(Session, 'after_commit', self._committed):
+            event.remove(Session, 'after_commit', self._committed)
+        if event.contains(Session, 'after_soft_rollback', self._rolled_back):
+            event.remove(Session, 'after_soft_rollback', self._rolled_back)
+
+    def add(self, session, key=None, value=True):
+        """Record a change in the current transaction of a session.
+
+        :param session: Session of the change, ignored if None.
+        :param key: Key of the change.
+        :param value: Value of the change, replaces the value of the key.
+        """
+        if session is not None:
+            session.info.setdefault(self.name, {})[key] = value
+
+    def _committed(self, session):
+        # the transaction is not closed yet while after_commit is emitted
+        transaction = session.transaction
+        if transaction is not None and transaction.parent is not None:
+            return
+        changes = session.info.pop(self.name, None)
+        if changes:
+            self.on_commit(session, changes)
+
+    def _rolled_back(self, session, previous_transaction):
+        if previous_transaction.parent is not None:
+            return
+        changes = session.info.pop(self.name, None)
+        if changes and self.on_rollback:
+            self.on_rollback(session, changes)
+
+
+def _item_type_committed(session, changes):
+    """Invalidate the item type cache of all processes."""
+    if has_app_context():
+        item_type_cache.invalidate()
+    else:
+        item_type_cache.clear()
+
+
+def _item_type_rolled_back(session, changes):
+    """Drop records cached from the rolled back changes."""
+    item_type_cache.clear()
+
+
+item_type_hook = TransactionHook(
+    'weko_item_type_changed', _item_type_committed, _item_type_rolled_back)
+item_type_hook.register()
+
+
+def _item_type_changed(mapper, connection, target):
+    """Mark the session to invalidate the item type cache on commit."""
+    item_type_cache.clear()
+    item_type_hook.add(object_session(target))
+
+
+for _model in (ItemType, ItemTypeName, ItemTypeMapping):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _item_type_changed)
+
+
+def _site_license_committed(session, changes):
+    """Invalidate the site license caches of all processes."""
+    if has_app_context():
+        SiteLicense.invalidate()
+    else:
+        SiteLicense.changes += 1
+
+
+def _site_license_rolled_back(session, changes):
+    """Drop caches built from the rolled back site licenses."""
+    SiteLicense.changes += 1
+
+
+site_license_hook = TransactionHook(
+    'weko_site_license_changed', _site_license_committed,
+    _site_license_rolled_back)
+site_license_hook.register()
+
+
+def _site_license_changed(mapper, connection, target):
+    """Mark the session to invalidate the site license caches on commit."""
+    SiteLicense.changes += 1
+    site_license_hook.add(object_session(target))
+
+
+for _model in (SiteLicenseInfo, SiteLicenseIpAddress):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _site_license_changed)
+
+
 class RecordBase(dict):
     """Base class for Record and RecordBase."""
 
@@ -617,6 +841,44 @@ class ItemTypes(RecordBase):
                 return None
             return cls(obj.schema, model=obj)
 
+    @classmethod
+    def get_cached_record(cls, id_, with_deleted=False):
+        """Retrieve the item type by id from the cache.
+
+        The returned item type is shared, its schema and model must not be
+        modified.
+
+        :param id_: Identifier of item type.
+        :param with_deleted: If `True` then it includes deleted item types.
+        :returns: The :class:`ItemTypes` instance.
+        """
+        def _load():
+            record = cls.get_record(id_, with_deleted=with_deleted)
+            if record is None:
+                return None
+            obj = record.model
+            model = SimpleNamespace(
+                id=obj.id,
+                name_id=obj.name_id,
+                item_type_name=SimpleNamespace(
+                    id=obj.item_type_name.id,
+                    name=obj.item_type_name.name,
+                    has_site_license=obj.item_type_name.has_site_license,
+                    is_active=obj.item_type_name.is_active),
+                harvesting_type=obj.harvesting_type,
+                schema=obj.schema,
+                form=obj.form,
+                render=obj.render,
+                tag=obj.tag,
+                version_id=obj.version_id,
+                is_deleted=obj.is_deleted,
+                created=obj.created,
+                updated=obj.updated)
+            return cls(obj.schema, model=model)
+
+        return item_type_cache.get(
+            ('item_type', str(id_), with_deleted), _load)
+
     @classmethod
     def get_records(cls, ids, with_deleted=False):
         """Retrieve multiple item types by id.
@@ -1106,6 +1368,33 @@ class Mapping(RecordBase):
                 return None
             return cls(obj.mapping, model=obj)
 
+    @classmethod
+    def get_cached_record(cls, item_type_id, with_deleted=False):
+        """Retrieve the mapping by item type id from the cache.
+
+        The returned mapping is shared and must not be modified.
+
+        :param item_type_id: ID of item type.
+        :param with_deleted: If `True` then it includes deleted records.
+        :returns: The :class:`Record` instance.
+        """
+        def _load():
+            record = cls.get_record(item_type_id, with_deleted=with_deleted)
+            if record is None:
+                return None
+            obj = record.model
+            model = SimpleNamespace(
+                id=obj.id,
+                item_type_id=obj.item_type_id,
+                mapping=obj.mapping,
+                version_id=obj.version_id,
+                created=obj.created,
+                updated=obj.updated)
+            return cls(obj.mapping, model=model)
+
+        return item_type_cache.get(
+            ('mapping', str(item_type_id), with_deleted), _load)
+
     @classmethod
     def get_records(cls, ids, with_deleted=False):
         """Retrieve multiple records by id.
@@ -1950,6 +2239,45 @@ class RecordRevision(RecordBase):
 class SiteLicense(RecordBase):
     """Define API for SiteLicense creation and manipulation."""
 
+    changes = 0
+    """Number of changes of the site licenses in this process."""
+
+    @classmethod
+    def _generation_key(cls):
+        return current_app.config.get(
+            'WEKO_RECORDS_SITE_LICENSE_GENERATION_KEY',
+            WEKO_RECORDS_SITE_LICENSE_GENERATION_KEY)
+
+    @classmethod
+    def get_generation(cls):
+        """Get the generation of the site licenses in Redis.
+
+        The generation is incremented when site licenses are committed, so
+        that the caches built from them can be validated.
+
+        :returns: The generation, None if it is not available.
+        """
+        try:
+            return RedisConnection().connection(
+                db=current_app.config['CACHE_REDIS_DB']).get(
+                cls._generation_key())
+        except Exception as ex:
+            current_app.logger.warning(
+                'Failed to get site license generation: {}'.format(ex))
+            return None
+
+    @classmethod
+    def invalidate(cls):
+        """Invalidate the caches of the site licenses of all processes."""
+        cls.changes += 1
+        try:
+            RedisConnection().connection(
+                db=current_app.config['CACHE_REDIS_DB']).incr(
+                cls._generation_key())
+        except Exception as ex:
+            current_app.logger.warning(
+                'Failed to update site license generation: {}'.format(ex))
+
     @classmethod
     def get_records(cls):
         """Retrieve multiple records.
@@ -1967,13 +2295,17 @@ class SiteLicense(RecordBase):
         def get_addr(lst, id_):
             if lst and isinstance(lst, list):
                 sld = []
+                def join_addr(addr):
+                    # IPv6 addresses are given as they are
+                    return addr if isinstance(addr, str) else '.'.join(addr)
+
                 for j in range(len(lst)):
                     sl = SiteLicenseIpAddress(
                         organization_id=id_,
                         organization_no=j + 1,
-                        start_ip_address='.'.join(
+                        start_ip_address=join_addr(
                             lst[j].get('start_ip_address')),
-                        finish_ip_address='.'.join(
+                        finish_ip_address=join_addr(
                             lst[j].get('finish_ip_address'))
                     )
                     sld.append(sl)
@@ -1986,6 +2318,9 @@ class SiteLicense(RecordBase):
             # delete all rows first
             SiteLicenseIpAddress.query.delete()
             SiteLicenseInfo.query.delete()
+            # bulk deletes do not emit the mapper events
+            SiteLicense.changes += 1
+            site_license_hook.add(db.session)
             # add new rows
             if site_license:
                 sif = []
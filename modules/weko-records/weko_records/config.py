@@ -252,3 +252,18 @@ COPY_NEW_FIELD = True
 
 WEKO_RECORDS_SYSTEM_COMMA = "-,-"
 """The system comma used to break metadata subitems."""
+
+WEKO_RECORDS_ITEM_TYPE_CACHE_SIZE = 128
+"""Maximum number of item types and mappings cached in a process."""
+
+WEKO_RECORDS_ITEM_TYPE_CACHE_CHECK_INTERVAL = 5
+"""Seconds between checks of the item type cache generation in Redis."""
+
+WEKO_RECORDS_ITEM_TYPE_CACHE_GENERATION_KEY = 'weko_records_item_type_generation'
+"""Redis key of the generation of the item type cache."""
+
+WEKO_RECORDS_ITEM_TYPE_CACHE_MAX_AGE = 3600
+"""Seconds after which a cached item type or mapping is loaded again."""
+
+WEKO_RECORDS_SITE_LICENSE_GENERATION_KEY = 'weko_records_site_license_generation'
+"""Redis key of the generation of the site licenses."""
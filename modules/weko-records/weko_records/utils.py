@@ -105,14 +105,15 @@ def json_loader(data, pid, owner_id=None, with_deleted=False):
     )
 
     # get item type mappings
-    ojson = ItemTypes.get_record(item_type_id, with_deleted=with_deleted)
-    mjson = Mapping.get_record(item_type_id, with_deleted=with_deleted)
+    ojson = ItemTypes.get_cached_record(item_type_id, with_deleted=with_deleted)
+    mjson = Mapping.get_cached_record(item_type_id, with_deleted=with_deleted)
 
 
     if not (ojson and mjson):
         raise RuntimeError("Item Type {} does not exist.".format(item_type_id))
 
     mp = mjson.dumps()
+    properties = dict(ojson["properties"])
     data.get("$schema")
     author_link = []
     for k, v in data.items():
@@ -123,8 +124,8 @@ def json_loader(data, pid, owner_id=None, with_deleted=False):
         item.clear()
         try:
             item["attribute_name"] = (
-                ojson["properties"][k]["title"]
-                if ojson["properties"][k].get("title") is not None
+                properties[k]["title"]
+                if properties[k].get("title") is not None
                 else k
             )
         except Exception:
@@ -133,14 +134,14 @@ def json_loader(data, pid, owner_id=None, with_deleted=False):
                 "title": "Publish Date",
                 "format": "datetime",
             }
-            ojson["properties"]["pubdate"] = pub_date_setting
+            properties["pubdate"] = pub_date_setting
             item["attribute_name"] = "Publish Date"
         # set a identifier to add a link on detail page when is a creator field
         # creator = mp.get(k, {}).get('jpcoar_mapping', {})
         # creator = creator.get('creator') if isinstance(
         #     creator, dict) else None
         iscreator = False
-        creator = ojson["properties"][k]
+        creator = properties[k]
         if "object" == creator["type"]:
             creator = creator["properties"]
             if "iscreator" in creator:
@@ -152,7 +153,7 @@ def json_loader(data, pid, owner_id=None, with_deleted=False):
         if iscreator:
             item["attribute_type"] = "creator"
 
-        item_data = ojson["properties"][k]
+        item_data = properties[k]
         if "array" == item_data.get("type"):
             properties_data = item_data["items"]["properties"]
             if "filename" in properties_data:
@@ -831,10 +832,12 @@ def get_options_and_order_list(item_type_id, ojson=None):
     :return: options dict and sorted list
     """
     if ojson is None:
-        ojson = ItemTypes.get_record(item_type_id)
+        ojson = ItemTypes.get_cached_record(item_type_id)
     solst = find_items(ojson.model.form)
-    meta_options = ojson.model.render.get("meta_fix")
-    meta_options.update(ojson.model.render.get("meta_list"))
+    meta_options = pickle.loads(pickle.dumps(
+        ojson.model.render.get("meta_fix"), -1))
+    meta_options.update(pickle.loads(pickle.dumps(
+        ojson.model.render.get("meta_list"), -1)))
     return solst, meta_options
 
 
@@ -1,10 +1,128 @@
 # -*- coding: utf-8 -*-
 
+import os
+import threading
+import time
+
 import redis
 from redis import sentinel
 from flask import current_app
 from simplekv.memory.redisstore import RedisStore
 
+WEKO_REDIS_MAX_CONNECTIONS = None
+"""Maximum number of connections of a pooled client, None is unlimited."""
+
+WEKO_REDIS_HEALTH_CHECK_INTERVAL = 30
+"""Seconds between health checks of a pooled client."""
+
+_clients = {}
+_clients_lock = threading.Lock()
+_clients_pid = os.getpid()
+
+
+class _PooledClient:
+    """A pooled Redis client of the registry."""
+
+    def __init__(self, client, sentinels=None):
+        self.client = client
+        self.sentinels = sentinels
+        self.checked_at = time.time()
+
+
+def get_client(key, factory):
+    """
+    Get a pooled Redis client of this process.
+
+    The clients are shared per key in a process. The registry is cleared in
+    a forked process so that the connections of the parent process are not
+    used. A client is checked by PING at intervals and created again if the
+    check fails.
+
+    Args:
+        key (tuple): The key of the client, e.g. (mode, host, port, db).
+        factory (callable): Creates the client and the sentinels if any.
+
+    Returns:
+        object: The Redis store object.
+    """
+    global _clients_pid
+    interval = current_app.config.get(
+        'WEKO_REDIS_HEALTH_CHECK_INTERVAL', WEKO_REDIS_HEALTH_CHECK_INTERVAL)
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        pooled = _clients.get(key)
+        if pooled is None:
+            pooled = _PooledClient(*factory())
+            _clients[key] = pooled
+            return pooled.client
+        if time.time() - pooled.checked_at < interval:
+            return pooled.client
+        pooled.checked_at = time.time()
+    try:
+        pooled.client.ping()
+    except redis.RedisError:
+        current_app.logger.warning(
+            'Redis health check failed: {}'.format(key))
+        pooled.client.connection_pool.disconnect()
+        with _clients_lock:
+            if _clients.get(key) is pooled:
+                pooled = _PooledClient(*factory())
+                _clients[key] = pooled
+            else:
+                pooled = _clients[key]
+    return pooled.client
+
+
+def get_pool_stats():
+    """
+    Get the connection pool metrics of the pooled clients of this process.
+
+    Returns:
+        dict: The metrics by key of the client.
+    """
+    stats = {}
+    with _clients_lock:
+        for key, pooled in _clients.items():
+            pool = pooled.client.connection_pool
+            stats[key] = {
+                'max_connections': pool.max_connections,
+                'created_connections': pool._created_connections,
+                'available_connections': len(pool._available_connections),
+                'in_use_connections': len(pool._in_use_connections),
+            }
+    return stats
+
+
+def _redis_client(host, port, db):
+    """Create a Redis client with a connection pool."""
+    def factory():
+        redis_url = 'redis://' + host + ':' + str(port) + '/' + str(db)
+        kwargs = {}
+        max_connections = current_app.config.get(
+            'WEKO_REDIS_MAX_CONNECTIONS', WEKO_REDIS_MAX_CONNECTIONS)
+        if max_connections:
+            kwargs['max_connections'] = max_connections
+        return (redis.StrictRedis.from_url(redis_url, **kwargs),)
+    return get_client(('redis', host, str(port), db), factory)
+
+
+def _sentinel_client(hosts, master, db):
+    """Create a Redis client of the master found by Sentinel."""
+    def factory():
+        sentinels = sentinel.Sentinel(hosts, decode_responses=False)
+        kwargs = {}
+        max_connections = current_app.config.get(
+            'WEKO_REDIS_MAX_CONNECTIONS', WEKO_REDIS_MAX_CONNECTIONS)
+        if max_connections:
+            kwargs['max_connections'] = max_connections
+        return sentinels.master_for(master, db=db, **kwargs), sentinels
+    key = tuple(tuple(h) if isinstance(h, (list, tuple)) else h
+                for h in hosts)
+    return get_client(('redissentinel', key, master, db), factory)
+
+
 class RedisConnection:
     """
     Redis Connection for app.
@@ -62,8 +180,8 @@ class RedisConnection:
         """
         store = None
         try:
-            redis_url = 'redis://' + current_app.config['CACHE_REDIS_HOST'] + ':' + current_app.config['REDIS_PORT'] + '/' + str(db)
-            store = redis.StrictRedis.from_url(redis_url)
+            store = _redis_client(current_app.config['CACHE_REDIS_HOST'],
+                                  current_app.config['REDIS_PORT'], db)
         except Exception as ex:
             raise ex
 
@@ -81,9 +199,9 @@ class RedisConnection:
         """
         store = None
         try:
-            sentinels = sentinel.Sentinel(current_app.config['CACHE_REDIS_SENTINELS'], decode_responses=False)
-            store = sentinels.master_for(
-                current_app.config['CACHE_REDIS_SENTINEL_MASTER'], db= db)
+            store = _sentinel_client(
+                current_app.config['CACHE_REDIS_SENTINELS'],
+                current_app.config['CACHE_REDIS_SENTINEL_MASTER'], db)
         except Exception as ex:
             raise ex
             
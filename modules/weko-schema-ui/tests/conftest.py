@@ -184,6 +184,7 @@ from weko_schema_ui.config import (
 )
 from weko_schema_ui.models import OAIServerSchema
 from weko_schema_ui.rest import create_blueprint
+from weko_schema_ui.schema import clear_schema_plans
 from weko_schema_ui.views import blueprint as weko_schema_ui_blueprint
 
 
@@ -312,6 +313,7 @@ def base_app(instance_path):
 @pytest.yield_fixture()
 def app(base_app):
     """Flask application fixture."""
+    clear_schema_plans()
     with base_app.app_context():
         yield base_app
 
@@ -6,6 +6,8 @@ from weko_schema_ui.schema import (
     delete_schema,
     delete_schema_cache,
     get_oai_metadata_formats,
+    get_schema_plan,
+    clear_schema_plans,
 )
 import pytest
 from lxml import etree
@@ -498,6 +500,56 @@ def test_cache_schema(db_oaischema):
     
 
 
+# def get_schema_plan(schema_name, item_type_id=None):
+# .tox/c1/bin/pytest --cov=weko_schema_ui tests/test_schema.py::test_get_schema_plan -vv --cov-branch --cov-report=term --basetemp=/code/modules/weko-schema-ui/.tox/c1/tmp
+def test_get_schema_plan(app, db, db_oaischema, db_itemtype):
+    clear_schema_plans()
+    plan = get_schema_plan("jpcoar_mapping", "1")
+    rec = cache_schema("jpcoar_mapping")
+    assert plan.root_name == rec.get("root_name")
+    assert plan.namespaces == rec.get("namespaces")
+    assert plan.schema == rec.get("schema")
+    assert "title" in plan.path_list
+    assert plan.key_paths == {}
+    assert plan.mapping is not None
+
+    # cached per schema and item type
+    with patch("weko_schema_ui.schema.cache_schema") as mock_cache:
+        assert get_schema_plan("jpcoar_mapping", "1") is plan
+        mock_cache.assert_not_called()
+
+    # compiled again after the TTL
+    app.config["WEKO_SCHEMA_UI_PLAN_CACHE_TTL"] = -1
+    assert get_schema_plan("jpcoar_mapping", "1") is not plan
+    app.config["WEKO_SCHEMA_UI_PLAN_CACHE_TTL"] = 300
+
+    plan = get_schema_plan("jpcoar_mapping", "1")
+    delete_schema_cache("jpcoar_mapping")
+    assert get_schema_plan("jpcoar_mapping", "1") is not plan
+
+    assert get_schema_plan("none_mapping", "1") is None
+
+    # compiled again after the item type is updated
+    plan = get_schema_plan("jpcoar_mapping", "1")
+    item_type = Mock()
+    item_type.model.version_id = 100
+    with patch("weko_schema_ui.schema.ItemTypes.get_cached_record",
+               return_value=item_type):
+        new_plan = get_schema_plan("jpcoar_mapping", "1")
+        assert new_plan is not plan
+        assert get_schema_plan("jpcoar_mapping", "1") is new_plan
+
+    # the shared plan is not changed by the trees
+    record = {"metadata": {"item_type_id": "1", "_buckets": {}, "_deposit": {}}}
+    plan = get_schema_plan("jpcoar_mapping", "1")
+    mapping = plan.mapping
+    tree = SchemaTree(record=copy.deepcopy(record), schema_name="jpcoar_mapping")
+    assert tree._plan is plan
+    assert tree._schema_obj is plan.schema
+    tree._record["tmp"] = {"jpcoar_mapping": {}}
+    assert plan.mapping == mapping
+
+
 # .tox/c1/bin/pytest --cov=weko_schema_ui tests/test_schema.py::test_delete_schema_cache -v --cov-branch --cov-report=term --basetemp=/code/modules/weko-schema-ui/.tox/c1/tmp
 # def delete_schema_cache(schema_name):
 def test_delete_schema_cache(app,db_oaischema):
@@ -177,3 +177,9 @@ WEKO_SCHEMA_RELATION_TYPE = [
     'isSupplementTo','isIdenticalTo','isDerivedFrom','isSourceOf'
 ]
 """jpcoar:relation relationType Controlled Vocabularies"""
+
+WEKO_SCHEMA_UI_PLAN_CACHE_SIZE = 256
+"""Maximum number of serialization plans cached in a process."""
+
+WEKO_SCHEMA_UI_PLAN_CACHE_TTL = 300
+"""Seconds before a cached serialization plan is compiled again."""
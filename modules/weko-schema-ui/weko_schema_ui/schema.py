@@ -22,6 +22,9 @@
 
 import copy
 import json
+import pickle
+import threading
+import time
 from collections import Iterable, OrderedDict
 from functools import partial
 
@@ -32,13 +35,15 @@ from flask import abort, current_app, request, url_for
 from lxml import etree
 from lxml.builder import ElementMaker
 from simplekv.memory.redisstore import RedisStore
-from weko_records.api import ItemLink, Mapping
+from weko_records.api import ItemLink, ItemTypes, Mapping
 from weko_redis import RedisConnection
 from xmlschema.validators import XsdAnyAttribute, XsdAnyElement, \
     XsdAtomicBuiltin, XsdAtomicRestriction, XsdEnumerationFacet, XsdGroup, \
     XsdPatternsFacet, XsdSingleFacet, XsdUnion
 
 from .api import WekoSchema
+from .config import WEKO_SCHEMA_UI_PLAN_CACHE_SIZE, \
+    WEKO_SCHEMA_UI_PLAN_CACHE_TTL
 from .models import OAIServerSchema
 
 
@@ -234,6 +239,7 @@ class SchemaTree:
         self._record = record["metadata"] \
             if record and record.get("metadata") else None
         self._schema_name = schema_name if schema_name else None
+        self._plan = None
         if self._record:
             self._root_name, self._ns, self._schema_obj, self._item_type_id = \
                 self.get_mapping_data()
@@ -247,6 +253,13 @@ class SchemaTree:
         self._separate_nodes = None
         self._location = ''
         self._target_namespace = ''
+        if self._plan:
+            self._location = self._plan.location
+            self._target_namespace = self._plan.target_namespace
+            if self._item_type_id:
+                self._ignore_list_all = self._plan.ignore_list_all
+                self._ignore_list = self._plan.ignore_list
+            return
         schemas = WekoSchema.get_all()
         if self._record and self._item_type_id:
             self._ignore_list_all, self._ignore_list = \
@@ -284,35 +297,28 @@ class SchemaTree:
         :return: root name, namespace and schema
 
         """
-        # Get Schema info
-        rec = cache_schema(self._schema_name)
-
-        if not rec:
+        item_type_id = None
+        if isinstance(self._record, dict):
+            item_type_id = self._record.get("item_type_id")
+        # Get Schema info and mapping compiled for the item type
+        plan = get_schema_plan(self._schema_name, item_type_id)
+        if not plan:
             return None, None, None, None
-
-        def get_mapping():
-
-            if isinstance(self._record, dict):
-                _id = self._record.pop("item_type_id")
-                self._record.pop("_buckets", {})
-                self._record.pop("_deposit", {})
-                mjson = Mapping.get_record(_id)
-                self.item_type_mapping = mjson
-                if isinstance(mjson, Mapping):
-                    mp = mjson.dumps()
-                    if isinstance(mp, dict):
-                        for k, v in mp.items():
-                            if k in self._record:
-                                self._record[k].update({self._schema_name: v.get(self._schema_name)})
-                            else:
-                                self._record[k] = {self._schema_name: v.get(self._schema_name)}
-                return _id
-
+        self._plan = plan
 
         # inject mappings info to record
-        item_type_id = get_mapping()
-        return rec.get('root_name'), rec.get('namespaces'), rec.get(
-            'schema'), item_type_id
+        if isinstance(self._record, dict):
+            self._record.pop("item_type_id")
+            self._record.pop("_buckets", {})
+            self._record.pop("_deposit", {})
+            self.item_type_mapping = plan.item_type_mapping
+            if plan.mapping:
+                for k, v in pickle.loads(plan.mapping).items():
+                    if k in self._record:
+                        self._record[k].update({self._schema_name: v})
+                    else:
+                        self._record[k] = {self._schema_name: v}
+        return plan.root_name, plan.namespaces, plan.schema, item_type_id
 
     def __converter(self, node):
         description_type = "descriptionType"
@@ -1050,8 +1056,9 @@ class SchemaTree:
                             if vlst_child[0]:
                                 vlst.extend(vlst_child)
                     else:
-                        from weko_records.models import ItemType
-                        item_type = ItemType.query.filter_by(id=self._item_type_id).one_or_none()
+                        from weko_records.api import ItemTypes
+                        item_type = ItemTypes.get_cached_record(
+                            self._item_type_id, with_deleted=True).model
                         # current_app.logger.error(item_type.schema["properties"][key_item_parent])
                         atr_name = ""
                         if "title" in item_type.schema["properties"][key_item_parent]:
@@ -1606,7 +1613,7 @@ class SchemaTree:
             self.__build_jpcoar_relation(list_json_xml)
 
         node_tree = self.find_nodes(list_json_xml)
-        ns = self._ns
+        ns = dict(self._ns)
         xsi = 'http://www.w3.org/2001/XMLSchema-instance'
         ns.update({'xml': "http://www.w3.org/XML/1998/namespace"})
         ns.update({'xsi': xsi})
@@ -1820,19 +1827,23 @@ class SchemaTree:
                     if value:
                         yield value
 
+        plst = self._plan.path_list if self._plan else self.to_list()
+
         def get_path_list(key):
+            if self._plan and key in self._plan.key_paths:
+                return self._plan.key_paths[key]
             klst = []
-            plst = self.to_list()
             for i in range(len(plst)):
                 if key in plst[i].split('.')[0]:
                     klst.append(plst[i])
+            if self._plan:
+                self._plan.key_paths[key] = klst
             return klst
 
-        ndic = copy.deepcopy(self._schema_obj)
         # start
         # ---------------------------------------------------------------------------------------------------
         nlst = []
-        for k, v in ndic.items():
+        for k, v in self._schema_obj.items():
             key = cut_pre(k)
             # get nested path list
             klst = get_path_list(key)
@@ -1942,6 +1953,120 @@ def cache_schema(schema_name, delete=False):
     return data
 
 
+class SchemaPlan(object):
+    """Serialization plan of a schema for an item type.
+
+    The plan holds everything of :class:`SchemaTree` which does not depend
+    on the record. It is shared by the trees of the records of the item type
+    and must not be modified.
+    """
+
+    def __init__(self, schema_name, schema, item_type_id=None,
+                 item_type_mapping=None):
+        """Compile the plan.
+
+        :param schema_name: Schema name.
+        :param schema: Schema cached by :func:`cache_schema`.
+        :param item_type_id: Item type id.
+        :param item_type_mapping: Mapping of the item type.
+        """
+        self.root_name = schema.get('root_name')
+        self.namespaces = schema.get('namespaces')
+        self.schema = schema.get('schema')
+        self.location = ''
+        self.target_namespace = ''
+        schemas = WekoSchema.get_all()
+        if isinstance(schemas, list):
+            for _schema in schemas:
+                if isinstance(_schema, OAIServerSchema) \
+                        and schema_name == _schema.schema_name:
+                    self.location = _schema.schema_location
+                    self.target_namespace = _schema.target_namespace
+
+        self.item_type_mapping = item_type_mapping
+        # the mapping is copied for each record by unpickling
+        self.mapping = None
+        if isinstance(item_type_mapping, Mapping):
+            self.mapping = pickle.dumps(
+                {k: v.get(schema_name) for k, v in item_type_mapping.items()},
+                -1)
+
+        self.ignore_list_all = {}
+        self.ignore_list = []
+        if item_type_id:
+            tree = SchemaTree(schema_name=schema_name)
+            tree._item_type_id = item_type_id
+            self.ignore_list_all, self.ignore_list = \
+                tree.get_ignore_item_from_option()
+
+        tree = SchemaTree(schema_name=schema_name)
+        tree._schema_obj = self.schema
+        self.path_list = tree.to_list()
+        self.key_paths = {}
+
+
+_schema_plans = OrderedDict()
+_schema_plans_lock = threading.Lock()
+
+
+def get_schema_plan(schema_name, item_type_id=None):
+    """
+    Get the serialization plan of a schema for an item type.
+
+    The plans are cached in the process by schema name and item type id,
+    and validated by the revisions of the item type mapping and of the item
+    type, whose options give the ignored items.
+
+    :param schema_name: Schema name.
+    :param item_type_id: Item type id.
+    :return: :class:`SchemaPlan` instance, None if the schema does not exist.
+
+    """
+    item_type_mapping = Mapping.get_cached_record(item_type_id) \
+        if item_type_id else None
+    revision = (item_type_mapping.model.id, item_type_mapping.model.version_id) \
+        if item_type_mapping else None
+    item_type = ItemTypes.get_cached_record(item_type_id, with_deleted=True) \
+        if item_type_id else None
+    if item_type:
+        revision = (revision, item_type.model.version_id,
+                    item_type.model.updated)
+    key = (schema_name, str(item_type_id))
+    now = time.time()
+    with _schema_plans_lock:
+        cached = _schema_plans.get(key)
+        if cached and cached[1] == revision and now - cached[0] < \
+                current_app.config.get('WEKO_SCHEMA_UI_PLAN_CACHE_TTL',
+                                       WEKO_SCHEMA_UI_PLAN_CACHE_TTL):
+            _schema_plans.move_to_end(key)
+            return cached[2]
+
+    schema = cache_schema(schema_name)
+    if not schema:
+        return None
+    plan = SchemaPlan(schema_name, schema, item_type_id, item_type_mapping)
+    with _schema_plans_lock:
+        _schema_plans[key] = (now, revision, plan)
+        while len(_schema_plans) > current_app.config.get(
+                'WEKO_SCHEMA_UI_PLAN_CACHE_SIZE',
+                WEKO_SCHEMA_UI_PLAN_CACHE_SIZE):
+            _schema_plans.popitem(last=False)
+    return plan
+
+
+def clear_schema_plans(schema_name=None):
+    """
+    Clear the cached serialization plans of the process.
+
+    :param schema_name: Schema name, clear all the plans if None.
+
+    """
+    with _schema_plans_lock:
+        for key in list(_schema_plans):
+            if schema_name is None or key[0] == schema_name:
+                del _schema_plans[key]
+
+
 def delete_schema_cache(schema_name):
     """
     Delete schema cache on redis.
@@ -1950,6 +2075,7 @@ def delete_schema_cache(schema_name):
     :return:
 
     """
+    clear_schema_plans(schema_name)
     try:
         # schema cached on Redis by schema name
         redis_connection = RedisConnection()
@@ -244,10 +244,15 @@ def test_IndexSearchResource_get(i18n_app, users, client_request_args):
             default_media_type=None
         )
 
-        with patch("weko_index_tree.api.Indexes.get_index", return_value=MagicMock()):
+        with patch("weko_index_tree.api.Indexes.get_index", return_value=MagicMock()), \
+                patch("weko_index_tree.api.Indexes.get_indexes_by_ids", return_value=[]):
             with patch("weko_index_tree.api.Indexes.get_self_list", return_value=[return_data_1]):
                 assert isinstance(test.get(), tuple)
                 assert isinstance(test.get()[1], dict)
+                # The ES buckets are returned as they are.
+                aggs = test.get()[1]["aggregations"]
+                assert "name" not in aggs["aggregations"][0]
+                assert aggs["path"]["buckets"] == [[]]
                 assert test.get()[1]["hits"]["total"] == total_hit_count
                 assert test.get()[2]["self"] == top_page
                 assert test.get()[2]["next"] == next_page
@@ -11,8 +11,11 @@ from weko_index_tree.api import Indexes
 from weko_search_ui.tasks import (
     check_import_items_task,
     import_item,
+    import_items_chunk,
     remove_temp_dir_task,
     export_all_task,
+    finish_export_all_task,
+    export_all_error_task,
     delete_exported_task,
     is_import_running,
     check_celery_is_run,
@@ -37,6 +40,14 @@ def test_import_item(i18n_app, users):
         assert not import_item("item", "request_info")
 
 
+# def import_items_chunk(items, request_info):
+def test_import_items_chunk(i18n_app, users):
+    with patch("weko_search_ui.tasks.import_items_chunk_to_system", return_value=[{"success": True}]):
+        assert import_items_chunk([{"id": "1"}], "request_info") == [{"success": True}]
+    with patch("weko_search_ui.tasks.import_items_chunk_to_system", side_effect=Exception("test error")):
+        assert not import_items_chunk([{"id": "1"}], "request_info")
+
+
 # def remove_temp_dir_task(path):
 def test_remove_temp_dir_task(i18n_app, users, indices):
     current_path = os.path.dirname(os.path.abspath(__file__))
@@ -100,6 +111,119 @@ def test_export_all_task(i18n_app, users):
                 )
 
 
+def test_export_all_task_parallel(i18n_app, users, mocker):
+    i18n_app.config["WEKO_SEARCH_UI_BULK_EXPORT_PARALLEL"] = True
+    user_id = users[3]['obj'].id
+    item_types = [("1", "type1"), ("2", "type2")]
+    mocker.patch("weko_search_ui.tasks.prepare_export_all",
+                 return_value=("/tmp/export", item_types, "", ""))
+    mock_reset = mocker.patch("weko_admin.utils.reset_redis_cache")
+    mock_checkpoint = mocker.patch("weko_search_ui.tasks.ExportCheckpoint")
+    mock_checkpoint.return_value.get.return_value = None
+    mock_chord = mocker.patch("weko_search_ui.tasks.chord")
+    # the task ids are recorded before the subtasks are sent
+    mock_chord.return_value.side_effect = lambda callback: \
+        mock_checkpoint.return_value.set.assert_called_once()
+
+    assert export_all_task.acks_late
+    assert not export_all_task("/", user_id, {}, "Asia/Tokyo")
+    header = list(mock_chord.call_args[0][0])
+    sub_task_ids = [sub_task.id for sub_task in header]
+    assert len(sub_task_ids) == 2 and all(sub_task_ids)
+    mock_checkpoint.return_value.set.assert_called_with(
+        mock_checkpoint.TASK_IDS, sub_task_ids)
+    callback = mock_chord.return_value.call_args[0][0]
+    assert callback.id
+    mock_reset.assert_called_with(
+        "admin_cache_KEY_EXPORT_ALL_{}".format(user_id), callback.id)
+    errback = callback.options["link_error"][0]
+    assert errback["task"] == "weko_search_ui.tasks.export_all_error_task"
+    assert errback["kwargs"] == {"user_id": user_id,
+                                 "export_path": "/tmp/export",
+                                 "sub_task_ids": sub_task_ids}
+
+    # a redelivered task does not send the subtasks again
+    mock_chord.reset_mock()
+    mock_checkpoint.return_value.get.return_value = sub_task_ids
+    assert not export_all_task("/", user_id, {}, "Asia/Tokyo")
+    mock_chord.assert_not_called()
+    mock_checkpoint.return_value.get.return_value = None
+
+    # failed to start the subtasks
+    mock_chord.return_value.side_effect = Exception("error")
+    mock_finish = mocker.patch("weko_search_ui.tasks.finish_export_all",
+                               return_value="")
+    mock_save = mocker.patch("weko_search_ui.tasks._save_export_uri")
+    assert not export_all_task("/", user_id, {}, "Asia/Tokyo")
+    mock_finish.assert_called_with(user_id, "/tmp/export", False)
+    mock_save.assert_called_with(user_id, "")
+    i18n_app.config["WEKO_SEARCH_UI_BULK_EXPORT_PARALLEL"] = False
+
+
+def test_finish_export_all_task(i18n_app, users, mocker):
+    mock_finish = mocker.patch("weko_search_ui.tasks.finish_export_all",
+                               return_value="/uri")
+    mock_save = mocker.patch("weko_search_ui.tasks._save_export_uri")
+    finish_export_all_task([True, False], 1, "/tmp/export")
+    mock_finish.assert_called_with(1, "/tmp/export", False)
+    mock_save.assert_called_with(1, "/uri")
+
+
+# def export_all_error_task(self, task_id, user_id=None, export_path=None, sub_task_ids=None):
+# .tox/c1/bin/pytest --cov=weko_search_ui tests/test_tasks.py::test_export_all_error_task -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-search-ui/.tox/c1/tmp
+def test_export_all_error_task(i18n_app, users, tmpdir, mocker):
+    from celery.exceptions import Retry
+    task_key = "admin_cache_KEY_EXPORT_ALL_1"
+    cache = {task_key: "callback_task"}
+    mocker.patch("weko_search_ui.tasks.get_redis_cache",
+                 side_effect=lambda key: cache.get(key))
+    mocker.patch("weko_admin.utils.reset_redis_cache",
+                 side_effect=lambda key, value: cache.update({key: value}))
+    mock_revoke = mocker.patch("weko_search_ui.tasks.revoke")
+    mock_result = mocker.patch("weko_search_ui.tasks.AsyncResult")
+    mock_retry = mocker.patch.object(export_all_error_task, "retry",
+                                     side_effect=Retry())
+    mock_finish = mocker.patch("weko_search_ui.tasks.finish_export_all",
+                               return_value="")
+    mock_save = mocker.patch("weko_search_ui.tasks._save_export_uri")
+    kwargs = {"user_id": 1, "export_path": "/tmp/export",
+              "sub_task_ids": ["sub1", "sub2"]}
+
+    # waits until the subtasks have stopped
+    mock_result.return_value.ready.side_effect = [True, False]
+    export_all_error_task.push_request(id="error_task", retries=0)
+    with pytest.raises(Retry):
+        export_all_error_task("callback_task", **kwargs)
+    export_all_error_task.pop_request()
+    assert cache[task_key] == "error_task"
+    assert mock_revoke.call_count == 2
+    mock_retry.assert_called_with(countdown=10)
+    mock_finish.assert_not_called()
+
+    mock_revoke.reset_mock()
+    mock_result.return_value.ready.side_effect = None
+    mock_result.return_value.ready.return_value = True
+    export_all_error_task.push_request(id="error_task", retries=1)
+    export_all_error_task("callback_task", **kwargs)
+    export_all_error_task.pop_request()
+    mock_revoke.assert_not_called()
+    mock_finish.assert_called_with(1, "/tmp/export", False)
+    mock_save.assert_called_with(1, "")
+
+    # only the files are deleted once a new export has been started
+    mock_finish.reset_mock()
+    cache[task_key] = "new_task"
+    export_path = os.path.join(str(tmpdir), "export", "20240101000000")
+    os.makedirs(export_path)
+    kwargs["export_path"] = export_path
+    export_all_error_task.push_request(id="error_task", retries=1)
+    export_all_error_task("callback_task", **kwargs)
+    export_all_error_task.pop_request()
+    assert cache[task_key] == "new_task"
+    assert not os.path.exists(os.path.dirname(export_path))
+    mock_finish.assert_not_called()
+
+
 # def delete_exported_task(uri, cache_key):
 # .tox/c1/bin/pytest --cov=weko_search_ui tests/test_tasks.py::test_delete_exported_task -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-search-ui/.tox/c1/tmp
 def test_delete_exported_task(i18n_app, db, users, file_instance_mock, redis_connect):
@@ -31,12 +31,14 @@ from weko_search_ui.config import (
 )
 from weko_search_ui.utils import (
     DefaultOrderedDict,
+    prefetch_exist_records,
     cancel_export_all,
     check_import_items,
     check_index_access_permissions,
     check_permission,
     check_sub_item_is_system,
     clean_thumbnail_file,
+    clear_export_all,
     convert_nested_item_to_list,
     create_deposit,
     create_flow_define,
@@ -45,7 +47,11 @@ from weko_search_ui.utils import (
     define_default_dict,
     delete_exported,
     delete_records,
+    ExportCheckpoint,
     export_all,
+    export_item_type,
+    iter_export_records,
+    prepare_export_all,
     get_change_identifier_mode_content,
     get_content_workflow,
     get_current_language,
@@ -99,6 +105,7 @@ from weko_search_ui.utils import (
     handle_set_change_identifier_flag,
     handle_validate_item_import,
     handle_workflow,
+    import_items_chunk_to_system,
     import_items_to_system,
     make_file_by_line,
     make_stats_file,
@@ -695,6 +702,38 @@ def test_update_publish_status(i18n_app, es_item_file_pipeline, es_records):
     # Doesn't return a value
     assert not update_publish_status(item_id, status)
 
+    es_records_list = []
+    with patch("weko_search_ui.utils.WekoIndexer.update_es_data") as mock_update:
+        assert not update_publish_status(item_id, "1", es_records_list)
+        mock_update.assert_not_called()
+    assert len(es_records_list) == 1
+    assert es_records_list[0]["publish_status"] == "1"
+
+
+# def import_items_chunk_to_system(items: list, request_info=None):
+# .tox/c1/bin/pytest --cov=weko_search_ui tests/test_utils.py::test_import_items_chunk_to_system -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-search-ui/.tox/c1/tmp
+def test_import_items_chunk_to_system(i18n_app):
+    def _import(item, request_info=None, es_records=None):
+        if item["id"] == "2":
+            raise Exception("test error")
+        if item["id"] == "3":
+            return {"success": False, "error_id": None}
+        es_records.append(item["id"])
+        return {"success": True, "recid": item["id"]}
+
+    items = [{"id": "1"}, {"id": "2"}, {"id": "3"}]
+    with patch("weko_search_ui.utils.import_items_to_system", side_effect=_import):
+        with patch("weko_search_ui.utils.WekoIndexer.bulk_update_es_data") as mock_bulk:
+            results = import_items_chunk_to_system(items, {"user_id": 1})
+            mock_bulk.assert_called_once_with(["1"], field="publish_status")
+    assert len(results) == 3
+    assert results[0]["success"] == True
+    assert results[0]["recid"] == "1"
+    assert results[0]["start_date"]
+    assert results[0]["end_date"]
+    assert results[1] is None
+    assert results[2]["success"] == False
+
 
 # def handle_workflow(item: dict):
 # .tox/c1/bin/pytest --cov=weko_search_ui tests/test_utils.py::test_handle_workflow -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-search-ui/.tox/c1/tmp
@@ -2295,6 +2334,27 @@ def test_handle_check_duplication_item_id(i18n_app):
     assert not handle_check_duplication_item_id(ids)
 
 
+# def iter_export_records(item_type_id, fromid="", toid="", batch_size=None):
+def test_iter_export_records(i18n_app, db_records2):
+    with i18n_app.app_context():
+        result = list(iter_export_records("1"))
+        recids = [recid for recid, _ in result]
+        assert all("." not in recid for recid in recids)
+        assert recids == sorted(recids, key=float)
+        assert all(
+            record.get("publish_status") in ["0", "1"] for _, record in result
+        )
+
+        # paging with a small batch returns the same records
+        assert [recid for recid, _ in iter_export_records(
+            "1", batch_size=1)] == recids
+
+        # pid range is inclusive
+        ranged = [recid for recid, _ in iter_export_records(
+            "1", fromid="2", toid="3", batch_size=1)]
+        assert ranged == [recid for recid in recids if 2 <= float(recid) <= 3]
+
+
 # def export_all(root_url, user_id, data): *** not yet done
 def test_export_all(db_activity, i18n_app, users, item_type, db_records2):
     root_url = "/"
@@ -2308,6 +2368,108 @@ def test_export_all(db_activity, i18n_app, users, item_type, db_records2):
     assert not export_all(root_url, user_id, data3)
 
 
+# class ExportCheckpoint(object):
+def test_export_checkpoint(i18n_app, users):
+    checkpoint = ExportCheckpoint(users[3]["obj"].id)
+    checkpoint.clear()
+    assert checkpoint.get("1") is None
+
+    checkpoint.set("1", {"part": 2, "counter": 1000, "max": "1001"})
+    checkpoint.set(ExportCheckpoint.EXPORT_PATH, "/tmp/export")
+    assert checkpoint.get("1") == {"part": 2, "counter": 1000, "max": "1001"}
+    assert ExportCheckpoint(users[3]["obj"].id).get(
+        ExportCheckpoint.EXPORT_PATH) == "/tmp/export"
+
+    checkpoint.clear()
+    assert checkpoint.get("1") is None
+
+
+# def clear_export_all(user_id, export_path=None):
+# def prepare_export_all(user_id, data):
+# .tox/c1/bin/pytest --cov=weko_search_ui tests/test_utils.py::test_prepare_export_all -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-search-ui/.tox/c1/tmp
+def test_prepare_export_all(i18n_app, users, mocker):
+    user_id = users[3]["obj"].id
+    mocker.patch("weko_search_ui.utils.reset_redis_cache")
+    mocker.patch("weko_search_ui.utils.get_redis_cache", return_value=None)
+    mocker.patch("weko_search_ui.utils.get_export_item_types",
+                 return_value=[("1", "test")])
+    checkpoint = ExportCheckpoint(user_id)
+    checkpoint.clear()
+
+    export_path, item_types, fromid, toid = prepare_export_all(
+        user_id, {"item_type_id": "1", "item_id_range": "2-5"})
+    assert os.path.isdir(export_path)
+    assert item_types == [("1", "test")]
+    assert (fromid, toid) == ("2", "5")
+    checkpoint.set("1", {"part": 2, "counter": 1000, "max": "1001"})
+
+    # a retried export resumes in the same directory
+    assert prepare_export_all(user_id, {})[0] == export_path
+    assert checkpoint.get("1") == {"part": 2, "counter": 1000, "max": "1001"}
+
+    # invalid range
+    assert prepare_export_all(user_id, {"item_id_range": "5-2"}) is None
+
+    clear_export_all(user_id)
+    assert not os.path.exists(os.path.dirname(export_path))
+    assert checkpoint.get(ExportCheckpoint.EXPORT_PATH) is None
+    assert checkpoint.get("1") is None
+
+    # a new export after the clear uses a new directory
+    new_path = prepare_export_all(user_id, {})[0]
+    assert new_path != export_path
+
+    # the files of an older export do not clear the checkpoint of a newer one
+    clear_export_all(user_id, export_path)
+    assert checkpoint.get(ExportCheckpoint.EXPORT_PATH) == new_path
+    clear_export_all(user_id, new_path)
+    assert checkpoint.get(ExportCheckpoint.EXPORT_PATH) is None
+    assert not os.path.exists(os.path.dirname(new_path))
+
+
+# def export_item_type(root_url, user_id, export_path, item_type, timezone, fromid="", toid="", retrys=0):
+def test_export_item_type(i18n_app, users, tmpdir, mocker):
+    user_id = users[3]["obj"].id
+    checkpoint = ExportCheckpoint(user_id)
+    checkpoint.clear()
+    checkpoint.set(ExportCheckpoint.EXPORT_PATH, str(tmpdir))
+    mocker.patch("weko_search_ui.utils.reset_redis_cache")
+    mocker.patch("weko_search_ui.utils.WEKO_SEARCH_UI_BULK_EXPORT_LIMIT", 2)
+    mock_write = mocker.patch("weko_search_ui.utils.write_export_files")
+    records = [(str(i), {"publish_status": "0"}) for i in range(1, 6)]
+    mocker.patch("weko_search_ui.utils.iter_export_records",
+                 return_value=iter(records))
+
+    assert export_item_type("/", user_id, str(tmpdir), ("1", "test"),
+                            "Asia/Tokyo")
+    names = [args[0][0]["name"] for args in mock_write.call_args_list]
+    assert names == ["test(1).part1", "test(1).part2", "test(1).part3"]
+    assert checkpoint.get("1") == {"part": 3, "counter": 5, "done": True}
+
+    # finished item type is not exported again
+    mock_write.reset_mock()
+    assert export_item_type("/", user_id, str(tmpdir), ("1", "test"),
+                            "Asia/Tokyo")
+    mock_write.assert_not_called()
+
+    # a cleared export is not continued
+    checkpoint.clear()
+    assert not export_item_type("/", user_id, str(tmpdir), ("1", "test"),
+                                "Asia/Tokyo")
+    mock_write.assert_not_called()
+
+    # the progress is not saved once a new export has been started
+    checkpoint.set(ExportCheckpoint.EXPORT_PATH, str(tmpdir))
+    mocker.patch("weko_search_ui.utils.iter_export_records",
+                 return_value=iter(records))
+    mock_write.side_effect = lambda *args: checkpoint.set(
+        ExportCheckpoint.EXPORT_PATH, "/tmp/new_export")
+    assert not export_item_type("/", user_id, str(tmpdir), ("1", "test"),
+                                "Asia/Tokyo")
+    assert checkpoint.get("1") is None
+    checkpoint.clear()
+
+
 # def delete_exported(uri, cache_key):
 def test_delete_exported(i18n_app, file_instance_mock):
     file_path = os.path.join(
@@ -2871,6 +3033,25 @@ def test_handle_fill_system_item_issue34520(app, doi_records, item_id, before_do
         assert after_list == before_list
 
 
+# def prefetch_exist_records(list_record):
+# .tox/c1/bin/pytest --cov=weko_search_ui tests/test_utils.py::test_prefetch_exist_records -v -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-search-ui/.tox/c1/tmp
+def test_prefetch_exist_records(app, doi_records):
+    list_record = [
+        {"id": 1, "uri": "http://TEST_SERVER/records/1"},
+        {"id": 2, "uri": "http://TEST_SERVER/records/1"},
+        {"id": 1000, "uri": "http://TEST_SERVER/records/1000"},
+        {"id": None, "uri": None},
+    ]
+    with app.test_request_context():
+        pids, records = prefetch_exist_records(list_record)
+        assert list(pids.keys()) == ["1"]
+        assert pids["1"].pid_type == "depid"
+        assert list(records.keys()) == [pids["1"].object_uuid]
+        assert records[pids["1"].object_uuid].get("recid") == "1"
+
+        assert prefetch_exist_records([{"id": None, "uri": None}]) == ({}, {})
+
+
 # .tox/c1/bin/pytest --cov=weko_search_ui tests/test_utils.py::test_handle_check_exist_record_issue35315 -v -vv -s --cov-branch --cov-report=term --basetemp=/code/modules/weko-search-ui/.tox/c1/tmp
 @pytest.mark.parametrize(
     "id, uri, warnings, errors,status",
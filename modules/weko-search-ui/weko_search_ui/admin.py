@@ -68,6 +68,7 @@ from .tasks import (
     check_import_items_task,
     export_all_task,
     import_item,
+    import_items_chunk,
     is_import_running,
     remove_temp_dir_task,
 )
@@ -75,6 +76,7 @@ from .utils import (
     cancel_export_all,
     check_import_items,
     check_sub_item_is_system,
+    clear_export_all,
     create_flow_define,
     delete_records,
     get_change_identifier_mode_content,
@@ -454,27 +456,48 @@ class ItemImportView(BaseView):
         ]
         import_start_time = ""
         if list_record:
-            group_tasks = []
-            for item in list_record:
+            chunk_size = current_app.config.get(
+                "WEKO_SEARCH_UI_IMPORT_CHUNK_SIZE", 1)
+            import_records = []
+            try:
+                create_flow_define()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(e)
+                list_record = []
+            for idx, item in enumerate(list_record):
                 try:
                     item["root_path"] = data_path + "/data"
-                    create_flow_define()
-                    handle_workflow(item)
-                    group_tasks.append(import_item.s(item, request_info))
-                    db.session.commit()
+                    with db.session.begin_nested():
+                        handle_workflow(item)
+                    import_records.append(item)
                 except Exception as e:
-                    db.session.rollback()
                     current_app.logger.error(e)
+                if (idx + 1) % chunk_size == 0:
+                    db.session.commit()
+            db.session.commit()
 
             # handle import tasks
+            if chunk_size > 1:
+                chunks = [import_records[i:i + chunk_size]
+                          for i in range(0, len(import_records), chunk_size)]
+                group_tasks = [import_items_chunk.s(chunk, request_info)
+                               for chunk in chunks]
+            else:
+                chunks = [[item] for item in import_records]
+                group_tasks = [import_item.s(item, request_info)
+                               for item in import_records]
             import_task = chord(group_tasks)(remove_temp_dir_task.si(data_path))
-            for idx, task in enumerate(import_task.parent.results):
-                tasks.append(
-                    {
+            for chunk, task in zip(chunks, import_task.parent.results):
+                for idx, item in enumerate(chunk):
+                    task_item = {
                         "task_id": task.task_id,
-                        "item_id": list_record[idx].get("id"),
+                        "item_id": item.get("id"),
                     }
-                )
+                    if chunk_size > 1:
+                        task_item["chunk_index"] = idx
+                    tasks.append(task_item)
             # save start time of import progress into cache
             import_start_time = datetime.now().strftime("%Y-%m-%dT%H:%M:%S%z")
             update_cache_data("import_start_time", import_start_time, 0)
@@ -495,9 +518,18 @@ class ItemImportView(BaseView):
             for task_item in data.get("tasks"):
                 task_id = task_item.get("task_id")
                 task = import_item.AsyncResult(task_id)
+                task_result = task.result
+                if "chunk_index" in task_item:
+                    # the result of the item in the chunk
+                    task_result = (
+                        task_result[task_item["chunk_index"]]
+                        if isinstance(task_result, list)
+                        and len(task_result) > task_item["chunk_index"]
+                        else None
+                    )
                 start_date = (
-                    task.result.get("start_date")
-                    if task and isinstance(task.result, dict)
+                    task_result.get("start_date")
+                    if task and isinstance(task_result, dict)
                     else ""
                 )
                 end_date = (
@@ -505,14 +537,16 @@ class ItemImportView(BaseView):
                     if task.successful() or task.failed()
                     else ""
                 )
+                if isinstance(task_result, dict) and task_result.get("end_date"):
+                    end_date = task_result.get("end_date")
                 item_id = task_item.get("item_id", None)
-                if not item_id and task.result:
-                    item_id = task.result.get("recid", None)
+                if not item_id and task_result:
+                    item_id = task_result.get("recid", None)
                 result.append(
                     dict(
                         **{
                             "task_status": task.status,
-                            "task_result": task.result,
+                            "task_result": task_result,
                             "start_date": start_date,
                             "end_date": task_item.get("end_date") or end_date,
                             "task_id": task_id,
@@ -761,6 +795,8 @@ class ItemBulkExport(BaseView):
         timezone = str(current_app.config["STATS_WEKO_DEFAULT_TIMEZONE"]())
 
         if not export_status:
+            # Start a new export instead of resuming the previous one
+            clear_export_all(user_id)
             export_task = export_all_task.apply_async(args=(request.url_root, user_id, data, timezone))
             reset_redis_cache(_cache_key, str(export_task.task_id))
 
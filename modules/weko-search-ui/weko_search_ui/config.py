@@ -715,15 +715,37 @@ WEKO_SEARCH_UI_BULK_EXPORT_TASKID_EXPIRED_TIME = 1
 WEKO_SEARCH_UI_BULK_EXPORT_LIMIT = 1000
 """The number of items exported to tsv/csv file each once."""
 
+WEKO_SEARCH_UI_BULK_EXPORT_BATCH_SIZE = 100
+"""The number of records loaded from the database each once on export."""
+
 WEKO_SEARCH_UI_BULK_EXPORT_RETRY = 5
 """Number of export retries."""
 
+WEKO_SEARCH_UI_BULK_EXPORT_CHECKPOINT = "CHECKPOINT_EXPORT_ALL"
+"""Bulk export checkpoint."""
+
+WEKO_SEARCH_UI_BULK_EXPORT_PARALLEL = False
+"""Export each item type in its own celery task.
+
+The export directory must be shared by all the celery workers.
+"""
+
+WEKO_SEARCH_UI_BULK_EXPORT_CLEANUP_INTERVAL = 10
+"""Seconds between checks of the subtasks of a failed parallel export."""
+
 WEKO_SEARCH_UI_IMPORT_TMP_PREFIX = "weko_import_"
 """Import tmp prefix."""
 
 WEKO_SEARCH_UI_IMPORT_UNUSE_FILES_URI = "import_unuse_files_uri_{}"
 """Cache key unuse file. uri."""
 
+WEKO_SEARCH_UI_IMPORT_CHUNK_SIZE = 1
+"""Number of items imported by a celery task.
+
+With more than one item per task, the items of a task are imported in the
+same worker and their publish status is sent to ES in a bulk request.
+"""
+
 WEKO_SEARCH_UI_BULK_EXPORT_RETRY_INTERVAL = 1
 """ retry interval(sec) """
 
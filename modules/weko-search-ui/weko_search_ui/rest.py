@@ -20,7 +20,6 @@
 
 """Blueprint for Index Search rest."""
 
-import pickle
 from functools import partial
 
 from flask import Blueprint, abort, current_app, jsonify, redirect, request, url_for
@@ -52,8 +51,8 @@ from webargs import fields
 from webargs.flaskparser import use_kwargs
 from weko_admin.models import SearchManagement as sm
 from weko_index_tree.api import Indexes
-from weko_index_tree.utils import count_items, recorrect_private_items_count
-from weko_records.models import ItemType
+from weko_index_tree.utils import count_items, get_private_items_count
+from weko_records.api import ItemTypes
 from werkzeug.utils import secure_filename
 
 
@@ -256,121 +255,97 @@ class IndexSearchResource(ContentNegotiatedMethodView):
             paths = Indexes.get_self_list(q, community_id)
         except BaseException:
             paths = []
-        import pickle
         agp = rd["aggregations"]["path"]["buckets"]
-        rd["aggregations"]["aggregations"] = pickle.loads(pickle.dumps(agp, -1))
+        # The ES buckets are not modified, the index tree nodes are made
+        # from copies of them.
+        rd["aggregations"]["aggregations"] = agp
         nlst = []
+        buckets = dict()
         items_count = dict()
-        public_indexes = Indexes.get_public_indexes_list()
-        recorrect_private_items_count(agp)
+        public_indexes = set(Indexes.get_public_indexes_list())
         for i in agp:
+            no_available = get_private_items_count(i)
+            buckets.setdefault(i["key"], (i, no_available))
             items_count[i["key"]] = {
                 "key": i["key"],
                 "doc_count": i["doc_count"],
-                "no_available": i["no_available"]["doc_count"],
+                "no_available": no_available,
                 "public_state": True if i["key"] in public_indexes else False,
             }
 
         is_perm_paths = qs_kwargs.get("is_perm_paths", [])
-        if is_search == 1:
-            for k in range(len(agp)):
-                if q == agp[k].get("key"):
-                    current_idx = {}
-                    _child_indexes = [] 
-                    p = {}
-                    for path in paths:
-                        if path.path == agp[k].get("key"):
-                            p = path
-                            break
-                    if hasattr(p,"name"):
-                        agp[k]["name"] = p.name if p.name and lang == "ja" else p.name_en
-                        agp[k]["date_range"] = dict()
-                        comment = p.comment
-                        agp[k]["comment"] = (comment,)
-                        result = agp.pop(k)
-                        result["comment"] = comment
-                        current_idx = result
-                        for _path in is_perm_paths:
-                            if (
-                                _path.startswith(str(p.path) + "/") or _path == p.path
-                            ) and items_count.get(str(_path.split("/")[-1])):
-                                _child_indexes.append(items_count[str(_path.split("/")[-1])])
-                        private_count, public_count = count_items(_child_indexes)
-                        current_idx["date_range"]["pub_cnt"] = public_count
-                        current_idx["date_range"]["un_pub_cnt"] = private_count
-                        nlst.append(current_idx)
-                        break
-            for p in paths:
-                current_idx = {}
-                _child_indexes = []
-                if p.path == q:
-                    continue
-                index_id = p.cid
+        perm_paths = set(is_perm_paths)
+        # Item counts of the permitted indexes under each path.
+        child_indexes = dict()
+        for _path in is_perm_paths:
+            count = items_count.get(str(_path.split("/")[-1]))
+            if count:
+                nodes = _path.split("/")
+                for n in range(1, len(nodes) + 1):
+                    child_indexes.setdefault(
+                        "/".join(nodes[:n]), []).append(count)
+
+        index_infos = {
+            str(index.id): index
+            for index in Indexes.get_indexes_by_ids([p.cid for p in paths])
+        }
+
+        def get_index_info(index_id):
+            index_info = index_infos.get(str(index_id))
+            if index_info is None:
                 index_info = Indexes.get_index(index_id=index_id)
-                rss_status = index_info.rss_status
-                nd = {
+            return index_info
+
+        def make_node(p, bucket=None):
+            if bucket is None:
+                return {
                     "doc_count": 0,
                     "key": p.path,
                     "name": p.name if p.name and lang == "ja" else p.name_en,
                     "date_range": {"pub_cnt": 0, "un_pub_cnt": 0},
-                    "rss_status": rss_status,
+                    "rss_status": get_index_info(p.cid).rss_status,
                     "comment": p.comment,
                 }
-                current_idx = nd
-                for _path in is_perm_paths:
-                    if (
-                        _path.startswith(str(p.path) + "/") or _path == p.path
-                    ) and items_count.get(str(_path.split("/")[-1])):
-                        _child_indexes.append(items_count[str(_path.split("/")[-1])])
-                private_count, public_count = count_items(_child_indexes)
-                current_idx["date_range"]["pub_cnt"] = public_count
-                current_idx["date_range"]["un_pub_cnt"] = private_count
-                if p.path in is_perm_paths:
+            bucket, no_available = bucket
+            node = dict(bucket)
+            node["no_available"] = dict(
+                bucket["no_available"], doc_count=no_available)
+            node["name"] = p.name if p.name and lang == "ja" else p.name_en
+            node["date_range"] = dict()
+            node["comment"] = p.comment
+            return node
+
+        def set_items_count(node, p):
+            private_count, public_count = count_items(
+                child_indexes.get(str(p.path), []))
+            node["date_range"]["pub_cnt"] = public_count
+            node["date_range"]["un_pub_cnt"] = private_count
+            return node
+
+        if is_search == 1:
+            if q in buckets:
+                for p in paths:
+                    if p.path == q:
+                        nlst.append(set_items_count(
+                            make_node(p, buckets.pop(q)), p))
+                        break
+            for p in paths:
+                if p.path == q:
+                    continue
+                current_idx = set_items_count(make_node(p), p)
+                if p.path in perm_paths:
                     nlst.append(current_idx)
         else:
             for p in paths:
-                m = 0
-                current_idx = {}
-                for k in range(len(agp)):
-                    if p.path == agp[k].get("key"):
-                        agp[k]["name"] = p.name if p.name and lang == "ja" else p.name_en
-                        agp[k]["date_range"] = dict()
-                        comment = p.comment
-                        agp[k]["comment"] = (comment,)
-                        result = agp.pop(k)
-                        result["comment"] = comment
-                        current_idx = result
-                        m = 1
-                        break
-                if m == 0:
-                    index_id = p.cid
-                    index_info = Indexes.get_index(index_id=index_id)
-                    rss_status = index_info.rss_status
-                    nd = {
-                        "doc_count": 0,
-                        "key": p.path,
-                        "name": p.name if p.name and lang == "ja" else p.name_en,
-                        "date_range": {"pub_cnt": 0, "un_pub_cnt": 0},
-                        "rss_status": rss_status,
-                        "comment": p.comment,
-                    }
-                    current_idx = nd
-                _child_indexes = []
-                for _path in is_perm_paths:
-                    if (
-                        _path.startswith(str(p.path) + "/") or _path == p.path
-                    ) and items_count.get(str(_path.split("/")[-1])):
-                        _child_indexes.append(items_count[str(_path.split("/")[-1])])
-                private_count, public_count = count_items(_child_indexes)
-                current_idx["date_range"]["pub_cnt"] = public_count
-                current_idx["date_range"]["un_pub_cnt"] = private_count
-                if p.path in is_perm_paths:
+                current_idx = set_items_count(
+                    make_node(p, buckets.pop(p.path, None)), p)
+                if p.path in perm_paths:
                     nlst.append(current_idx)
-        agp.clear()
+        index_info = None
         # process index tree image info
         if len(nlst):
             index_id = nlst[0].get("key").split("/")[-1]
-            index_info = Indexes.get_index(index_id=index_id)
+            index_info = get_index_info(index_id)
             # update by weko_dev17 at 2019/04/04
             if len(index_info.image_name) > 0:
                 nlst[0]["img"] = index_info.image_name
@@ -379,9 +354,9 @@ class IndexSearchResource(ContentNegotiatedMethodView):
         # Update rss_status for index child
         for idx in range(0, len(nlst)):
             index_id = nlst[idx].get("key").split("/")[-1]
-            index_info = Indexes.get_index(index_id=index_id)
+            index_info = get_index_info(index_id)
             nlst[idx]["rss_status"] = index_info.rss_status
-        agp.append(nlst)
+        rd["aggregations"]["path"]["buckets"] = [nlst]
         for hit in rd["hits"]["hits"]:
             try:
                 # Register comment
@@ -399,15 +374,12 @@ class IndexSearchResource(ContentNegotiatedMethodView):
 
         # add info (headings & page info)
         try:
-            item_type_list = {}
             for hit in rd["hits"]["hits"]:
                 # get item type schema
                 item_type_id = hit["_source"]["_item_metadata"]["item_type_id"]
-                if item_type_id in item_type_list:
-                    item_type = pickle.loads(pickle.dumps(item_type_list[item_type_id], -1))
-                else:
-                    item_type = ItemType.query.filter_by(id=item_type_id).first()
-                    item_type_list[item_type_id] = pickle.loads(pickle.dumps(item_type, -1))
+                item_type = ItemTypes.get_cached_record(
+                    item_type_id, with_deleted=True)
+                item_type = item_type.model if item_type else None
                 # heading
                 heading = get_heading_info(hit, lang, item_type)
                 hit["_source"]["heading"] = heading
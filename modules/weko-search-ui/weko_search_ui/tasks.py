@@ -19,12 +19,13 @@
 # MA 02111-1307, USA.
 
 """WEKO3 module docstring."""
+import os
 import shutil
 from datetime import datetime, timedelta
 
-from celery import shared_task
+from celery import chord, shared_task, uuid
 from celery.result import AsyncResult
-from celery.task.control import inspect
+from celery.task.control import inspect, revoke
 from flask import current_app
 from weko_admin.api import TempDirInfo
 from weko_admin.utils import get_redis_cache
@@ -32,11 +33,23 @@ from weko_redis.redis import RedisConnection
 from invenio_db import db
 
 from .utils import (
+    ExportCheckpoint,
     check_import_items,
+    clear_export_all,
     delete_exported,
     export_all,
+    export_item_type,
+    finish_export_all,
     get_lifetime,
+    import_items_chunk_to_system,
     import_items_to_system,
+    prepare_export_all,
+)
+
+
+IMPORT_TASK_NAMES = (
+    "weko_search_ui.tasks.import_item",
+    "weko_search_ui.tasks.import_items_chunk",
 )
 
 
@@ -86,6 +99,15 @@ def import_item(item, request_info):
         current_app.logger.error(ex)
 
 
+@shared_task(ignore_results=False)
+def import_items_chunk(items, request_info):
+    """Import a chunk of items."""
+    try:
+        return import_items_chunk_to_system(items, request_info)
+    except Exception as ex:
+        current_app.logger.error(ex)
+
+
 @shared_task
 def remove_temp_dir_task(path):
     """Import Item ."""
@@ -103,9 +125,8 @@ def delete_task_id_cache(task_id, cache_key):
             datastore = redis_connection.connection(db=current_app.config['CACHE_REDIS_DB'], kv = True)
             datastore.delete(cache_key)
 
-@shared_task
-def export_all_task(root_url, user_id, data, timezone):
-    """Export all items."""
+def _save_export_uri(user_id, uri):
+    """Save the uri of the exported file and schedule its deletion."""
     from weko_admin.utils import reset_redis_cache
 
     _task_config = current_app.config["WEKO_SEARCH_UI_BULK_EXPORT_URI"]
@@ -120,7 +141,6 @@ def export_all_task(root_url, user_id, data, timezone):
         user_id=user_id
     )
 
-    uri = export_all(root_url, user_id, data, timezone)
     reset_redis_cache(_cache_key, uri)
     delete_exported_task.apply_async(
         args=(
@@ -132,6 +152,120 @@ def export_all_task(root_url, user_id, data, timezone):
     )
 
 
+@shared_task(acks_late=True)
+def export_all_task(root_url, user_id, data, timezone):
+    """Export all items.
+
+    The task is acknowledged late so that it is redelivered if the worker
+    dies, and the export resumes from the export checkpoint.
+
+    When WEKO_SEARCH_UI_BULK_EXPORT_PARALLEL is enabled, each item type is
+    exported by its own subtask and the files are packaged by a chord
+    callback, whose task id replaces this task id in the export status.
+    """
+    from weko_admin.utils import reset_redis_cache
+
+    if not current_app.config.get("WEKO_SEARCH_UI_BULK_EXPORT_PARALLEL"):
+        uri = export_all(root_url, user_id, data, timezone)
+        _save_export_uri(user_id, uri)
+        return
+
+    checkpoint = ExportCheckpoint(user_id)
+    if checkpoint.get(ExportCheckpoint.TASK_IDS):
+        # The subtasks of a redelivered export have been sent already and
+        # resume from the checkpoint by themselves.
+        return
+    prepared = prepare_export_all(user_id, data)
+    if not prepared:
+        _save_export_uri(user_id, "")
+        return
+    export_path, item_types, fromid, toid = prepared
+    if not item_types:
+        _save_export_uri(user_id, finish_export_all(user_id, export_path, True))
+        return
+
+    _task_key = current_app.config["WEKO_ADMIN_CACHE_PREFIX"].format(
+        name=current_app.config["WEKO_SEARCH_UI_BULK_EXPORT_TASK"],
+        user_id=user_id
+    )
+    # The task ids are recorded before the tasks are sent, so that the
+    # checkpoint is not written again after the export has finished.
+    header = [
+        export_item_type_task.s(
+            root_url, user_id, export_path, item_type, timezone, fromid, toid
+        ).set(task_id=uuid())
+        for item_type in item_types
+    ]
+    sub_task_ids = [sub_task.id for sub_task in header]
+    callback = finish_export_all_task.s(user_id, export_path).set(
+        task_id=uuid()
+    ).on_error(export_all_error_task.s(
+        user_id=user_id, export_path=export_path, sub_task_ids=sub_task_ids
+    ))
+    checkpoint.set(ExportCheckpoint.TASK_IDS, sub_task_ids)
+    reset_redis_cache(_task_key, callback.id)
+    try:
+        chord(header)(callback)
+    except Exception as ex:
+        current_app.logger.error(ex)
+        _save_export_uri(user_id, finish_export_all(user_id, export_path, False))
+
+
+@shared_task(acks_late=True)
+def export_item_type_task(root_url, user_id, export_path, item_type, timezone,
+                          fromid="", toid=""):
+    """Export the items of an item type.
+
+    The task is acknowledged late so that it is redelivered if the worker
+    dies, and resumes from the export checkpoint.
+    """
+    return export_item_type(root_url, user_id, export_path, item_type,
+                            timezone, fromid, toid)
+
+
+@shared_task
+def finish_export_all_task(results, user_id, export_path):
+    """Package the files written by the export subtasks."""
+    uri = finish_export_all(user_id, export_path, all(results))
+    _save_export_uri(user_id, uri)
+
+
+@shared_task(bind=True, max_retries=None)
+def export_all_error_task(self, task_id, user_id=None, export_path=None,
+                          sub_task_ids=None):
+    """Record the failure of a parallel export and delete its files.
+
+    Called as the error callback of the chord with the id of the callback.
+    The subtasks write into the same export directory, so the waiting ones
+    are revoked and the directory is deleted only after all of them have
+    stopped. The export is shown as running until then.
+    """
+    from weko_admin.utils import reset_redis_cache
+
+    _task_key = current_app.config["WEKO_ADMIN_CACHE_PREFIX"].format(
+        name=current_app.config["WEKO_SEARCH_UI_BULK_EXPORT_TASK"],
+        user_id=user_id
+    )
+    if get_redis_cache(_task_key) == task_id:
+        reset_redis_cache(_task_key, str(self.request.id))
+    sub_task_ids = sub_task_ids or []
+    if not self.request.retries:
+        current_app.logger.error(
+            "Export of user {} failed: {}".format(user_id, task_id))
+        for sub_task_id in sub_task_ids:
+            revoke(sub_task_id)
+    if not all(AsyncResult(sub_task_id).ready()
+               for sub_task_id in sub_task_ids):
+        raise self.retry(countdown=current_app.config[
+            "WEKO_SEARCH_UI_BULK_EXPORT_CLEANUP_INTERVAL"])
+
+    if get_redis_cache(_task_key) != str(self.request.id):
+        # A new export has been started, only the files are deleted.
+        shutil.rmtree(os.path.dirname(export_path), ignore_errors=True)
+        return
+    _save_export_uri(user_id, finish_export_all(user_id, export_path, False))
+
+
 @shared_task
 def delete_exported_task(uri, cache_key, task_key):
     """Delete expired exported file."""
@@ -155,13 +289,13 @@ def is_import_running():
     active = inspect().active()
     for worker in active:
         for task in active[worker]:
-            if task["name"] == "weko_search_ui.tasks.import_item":
+            if task["name"] in IMPORT_TASK_NAMES:
                 return "is_import_running"
 
     reserved = inspect().reserved()
     for worker in reserved:
         for task in reserved[worker]:
-            if task["name"] == "weko_search_ui.tasks.import_item":
+            if task["name"] in IMPORT_TASK_NAMES:
                 return "is_import_running"
 
 
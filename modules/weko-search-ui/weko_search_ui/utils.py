@@ -37,7 +37,7 @@ from functools import partial, reduce, wraps
 import io
 from io import StringIO
 from operator import getitem
-from time import sleep
+from time import sleep, time
 import pickle
 
 import bagit
@@ -990,6 +990,7 @@ def handle_check_exist_record(list_record) -> list:
     """
     result = []
     current_app.logger.debug("handle_check_exist_record")
+    pids, records = prefetch_exist_records(list_record)
     for item in list_record:
         item = dict(**item, **{"status": "new"})
         current_app.logger.debug("item:{}".format(item))
@@ -1003,13 +1004,19 @@ def handle_check_exist_record(list_record) -> list:
                 item["status"] = None
             else:
                 item_exist = None
-                try:
-                    item_exist = WekoRecord.get_record_by_pid(item_id)
-                except PIDDoesNotExistError:
+                pid = pids.get(str(item_id))
+                if not pid:
                     item["status"] = None
                     errors.append(_("Item does not exits" " in the system"))
+                elif pid.object_uuid in records:
+                    item_exist = records[pid.object_uuid]
+                else:
+                    item_exist = WekoRecord.get_record_by_pid(item_id)
                 if item_exist:
-                    if item_exist.pid.is_deleted():
+                    deposit_id = str(item_exist.get("_deposit", {}).get("id"))
+                    exist_pid = pids[deposit_id] \
+                        if deposit_id in pids else item_exist.pid
+                    if exist_pid.is_deleted():
                         item["status"] = None
                         errors.append(_("Item already DELETED" " in the system"))
                     else:
@@ -1042,6 +1049,39 @@ def handle_check_exist_record(list_record) -> list:
     return result
 
 
+def prefetch_exist_records(list_record):
+    """Get the existing records of the import rows in bulk.
+
+    :argument
+        list_record -- {list} list record import.
+    :return
+        return      -- dict of item id to deposit PID and
+                       dict of record UUID to record.
+
+    """
+    item_ids = set()
+    for item in list_record:
+        item_id = item.get("id")
+        if item_id and item.get("uri") == \
+                request.host_url + "records/" + str(item_id):
+            item_ids.add(str(item_id))
+    if not item_ids:
+        return {}, {}
+
+    pids = {}
+    query = PersistentIdentifier.query.filter(
+        PersistentIdentifier.pid_type == "depid",
+        PersistentIdentifier.pid_value.in_(item_ids))
+    for pid in query.all():
+        pids[pid.pid_value] = pid
+    records = {}
+    if pids:
+        for record in WekoRecord.get_records(
+                [pid.object_uuid for pid in pids.values()]):
+            records[record.id] = record
+    return pids, records
+
+
 def make_file_by_line(lines):
     """Make TSV/CSV file."""
     file_format = current_app.config.get('WEKO_ADMIN_OUTPUT_FORMAT', 'tsv').lower()
@@ -1391,18 +1431,23 @@ def register_item_metadata(item, root_path, owner, is_gakuninrdm=False):
                 )
 
 
-def update_publish_status(item_id, status):
+def update_publish_status(item_id, status, es_records=None):
     """Handle get title.
 
     :argument
         item_id     -- {str} Item Id.
         status      -- {str} Publish status (0: public, 1: private)
+        es_records  -- {list} Records to update on ES later,
+                       ES is updated at once if None.
     :return
 
     """
     record = WekoRecord.get_record_by_pid(item_id)
     record["publish_status"] = status
     record.commit()
+    if es_records is not None:
+        es_records.append(record)
+        return
     indexer = WekoIndexer()
     indexer.update_es_data(record, update_revision=False, field='publish_status')
 
@@ -1488,13 +1533,16 @@ def send_item_created_event_to_es(item, request_info):
         )
 
 
-def import_items_to_system(item: dict, request_info=None, is_gakuninrdm=False):
+def import_items_to_system(item: dict, request_info=None, is_gakuninrdm=False,
+                           es_records=None):
     """Validation importing zip file.
 
     :argument
         item        -- Items Metadata.
         request_info -- Information from request.
         is_gakuninrdm - Is call by gakuninrdm api.
+        es_records  -- {list} Records of which publish status is updated
+                       on ES later, ES is updated at once if None.
     :return
         return      -- Json response.
 
@@ -1517,6 +1565,8 @@ def import_items_to_system(item: dict, request_info=None, is_gakuninrdm=False):
     else:
         bef_metadata = None
         bef_last_ver_metadata = None
+        # the records are given to es_records when the item is committed
+        item_es_records = [] if es_records is not None else None
         try:
             # current_app.logger.debug("item: {0}".format(item))
             status = item.get("status")
@@ -1546,11 +1596,14 @@ def import_items_to_system(item: dict, request_info=None, is_gakuninrdm=False):
                 status_number = WEKO_IMPORT_PUBLISH_STATUS.index(
                     item.get("publish_status")
                 )
-                register_item_update_publish_status(item, str(status_number))
+                register_item_update_publish_status(
+                    item, str(status_number), item_es_records)
                 if item.get("status") == "new":
                     # Send item_created event to ES.
                     send_item_created_event_to_es(item, request_info)
             db.session.commit()
+            if item_es_records:
+                es_records.extend(item_es_records)
 
             # clean unuse file content in keep mode if import success
             cache_key = current_app.config[
@@ -1664,6 +1717,46 @@ def import_items_to_system(item: dict, request_info=None, is_gakuninrdm=False):
     return {"success": True, "recid": item["id"]}
 
 
+def import_items_chunk_to_system(items: list, request_info=None):
+    """Import a chunk of items.
+
+    Each item is imported and committed as by ``import_items_to_system``,
+    so a failed item does not affect the others. The publish status of the
+    imported items is sent to ES in a bulk request for the chunk.
+
+    :argument
+        items       -- {list} Items Metadata.
+        request_info -- Information from request.
+    :return
+        return      -- list of the results of the items.
+
+    """
+    results = []
+    es_records = []
+    start = time()
+    for item in items:
+        start_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            result = import_items_to_system(
+                item, request_info, es_records=es_records) or dict()
+        except Exception as ex:
+            current_app.logger.error(ex)
+            result = None
+        if result is not None:
+            result["start_date"] = start_date
+            result["end_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        results.append(result)
+    try:
+        WekoIndexer().bulk_update_es_data(es_records, field='publish_status')
+    except ElasticsearchException as ex:
+        current_app.logger.error(ex)
+    elapsed = time() - start
+    current_app.logger.info(
+        "imported {} items in {:.1f}s ({:.1f} items/min)".format(
+            len(items), elapsed, len(items) * 60 / elapsed if elapsed else 0))
+    return results
+
+
 def handle_item_title(list_record):
     """Prepare item title.
 
@@ -1758,6 +1851,31 @@ def handle_check_and_prepare_index_tree(list_record, all_index_permission, can_e
 
     errors = []
     warnings = []
+    path_split = current_app.config['WEKO_ITEMS_UI_INDEX_PATH_SPLIT']
+
+    def get_index_key(index_id):
+        try:
+            return int(index_id)
+        except (TypeError, ValueError):
+            return None
+
+    # get all the specified indexes at once
+    index_keys = set()
+    index_names = set()
+    for item in list_record:
+        for index_id in item.get("metadata", {}).get("path", []):
+            if get_index_key(index_id) is not None:
+                index_keys.add(get_index_key(index_id))
+        for index_name_path in item.get("pos_index", []) or []:
+            if index_name_path and index_name_path.strip():
+                index_names.add(index_name_path.strip().split(path_split)[-1])
+    indexes_by_name = Indexes.get_index_by_all_names(list(index_names)) \
+        if index_names else []
+    index_keys.update(index.id for index in indexes_by_name)
+    path_infos = {}
+    if index_keys:
+        for info in Indexes.get_path_list(list(index_keys)):
+            path_infos[info.cid] = info
 
     def check(index_id, index_name_path):
         """Check index_id/index_name.
@@ -1772,7 +1890,9 @@ def handle_check_and_prepare_index_tree(list_record, all_index_permission, can_e
         """
         temp_res = []
         index_info = None
-        index_info = Indexes.get_path_list([index_id])
+        index_key = get_index_key(index_id)
+        index_info = [path_infos[index_key]] \
+            if index_key in path_infos else []
 
         msg_not_exist = _("The specified {} does not exist in system.")
         if index_info and len(index_info) == 1:
@@ -1792,8 +1912,10 @@ def handle_check_and_prepare_index_tree(list_record, all_index_permission, can_e
         elif index_name_path:          # has pos_index info
             index_path_list = index_name_path.split(
                 current_app.config['WEKO_ITEMS_UI_INDEX_PATH_SPLIT'])
-            index_all_name = Indexes.get_index_by_all_name(index_path_list[-1])
-            index_infos = Indexes.get_path_list([i.id for i in index_all_name])
+            index_infos = [
+                path_infos[i.id] for i in indexes_by_name
+                if index_path_list[-1] in (i.index_name_english, i.index_name)
+                and i.id in path_infos]
             if index_infos:      # index exists by index name
                 for info in index_infos:
                     index_info = None
@@ -2441,12 +2563,13 @@ def register_item_doi(item):
         deposit.publish_without_commit()
 
 
-def register_item_update_publish_status(item, status):
+def register_item_update_publish_status(item, status, es_records=None):
     """Update Publish Status.
 
     :argument
         item    -- {object} Record item.
         status  -- {str} Publish Status.
+        es_records -- {list} Records to update on ES later.
     :return
         response -- {object} Process status.
 
@@ -2454,9 +2577,9 @@ def register_item_update_publish_status(item, status):
     item_id = str(item.get("id"))
     lastest_version_id = item_id + "." + str(get_latest_version_id(item_id) - 1)
 
-    update_publish_status(item_id, status)
+    update_publish_status(item_id, status, es_records)
     if lastest_version_id:
-        update_publish_status(lastest_version_id, status)
+        update_publish_status(lastest_version_id, status, es_records)
 
 
 def handle_doi_required_check(record):
@@ -3300,301 +3423,448 @@ def handle_check_duplication_item_id(ids: list):
     return list(set(result))
 
 
-def export_all(root_url, user_id, data, timezone):
-    """Gather all the item data and export and return as a JSON or BIBTEX.
+def iter_export_records(item_type_id, fromid="", toid="", batch_size=None):
+    """Yield the exportable records of an item type in pid order.
 
-    Parameter
-        path is the path if file temparory
-        post_data is the data items
-    :return: JSON, BIBTEX
+    Records are read with keyset pagination on the numeric pid value and
+    loaded one batch at a time, so memory use is bounded by the batch size
+    instead of the number of items of the item type.
+
+    :param item_type_id: Item type id.
+    :param fromid: The smallest pid value to export (inclusive).
+    :param toid: The largest pid value to export (inclusive).
+    :param batch_size: Number of records loaded per query.
+    :return: Generator of (pid_value, WekoRecord).
     """
-    from weko_items_ui.utils import make_stats_file_with_permission, package_export_file
+    to_number_format = current_app.config["WEKO_SEARCH_UI_TO_NUMBER_FORMAT"]
+    batch_size = batch_size or current_app.config.get(
+        "WEKO_SEARCH_UI_BULK_EXPORT_BATCH_SIZE", 100)
+    publish_status = [PublishStatus.PUBLIC.value, PublishStatus.PRIVATE.value]
+    pid_number = _func.to_number(
+        PersistentIdentifier.pid_value, to_number_format)
+
+    last_pid = None
+    while True:
+        query = db.session.query(
+            PersistentIdentifier.pid_value,
+            PersistentIdentifier.object_uuid,
+        ).join(
+            ItemMetadata,
+            PersistentIdentifier.object_uuid == ItemMetadata.id,
+        ).filter(
+            PersistentIdentifier.pid_type == "recid",
+            PersistentIdentifier.status == PIDStatus.REGISTERED,
+            PersistentIdentifier.pid_value.notlike("%.%"),
+            ItemMetadata.item_type_id == item_type_id
+        )
+        if last_pid is not None:
+            query = query.filter(pid_number > last_pid)
+        elif fromid:
+            query = query.filter(pid_number >= fromid)
+        if toid:
+            query = query.filter(pid_number <= toid)
+        pids = query.order_by(pid_number).limit(batch_size).all()
+        if not pids:
+            break
+        last_pid = pids[-1].pid_value
 
-    _cache_prefix = current_app.config["WEKO_ADMIN_CACHE_PREFIX"]
-    _msg_config = current_app.config["WEKO_SEARCH_UI_BULK_EXPORT_MSG"]
-    _msg_key = _cache_prefix.format(
-        name=_msg_config,
-        user_id=user_id
-    )
-    _run_msg_config = current_app.config["WEKO_SEARCH_UI_BULK_EXPORT_RUN_MSG"]
-    _run_msg_key = _cache_prefix.format(
-        name=_run_msg_config,
+        records = {
+            record.id: record for record in
+            WekoRecord.get_records([pid.object_uuid for pid in pids])
+        }
+        for pid in pids:
+            record = records.get(pid.object_uuid)
+            if record and record.get("publish_status") in publish_status:
+                yield pid.pid_value, record
+
+        if len(pids) < batch_size:
+            break
+
+
+class ExportCheckpoint(object):
+    """Progress of a bulk export persisted in Redis.
+
+    Each item type keeps its own field so that several export workers can
+    update their progress at the same time, and an interrupted export can
+    resume from the last part file written.
+    """
+
+    EXPORT_PATH = "export_path"
+    TASK_IDS = "task_ids"
+
+    def __init__(self, user_id):
+        """Initialize checkpoint of the bulk export of an user.
+
+        :param user_id: Id of the user running the export.
+        """
+        self.key = current_app.config["WEKO_ADMIN_CACHE_PREFIX"].format(
+            name=current_app.config["WEKO_SEARCH_UI_BULK_EXPORT_CHECKPOINT"],
+            user_id=user_id
+        )
+        redis_connection = RedisConnection()
+        self.redis = redis_connection.connection(
+            db=current_app.config['CACHE_REDIS_DB'])
+
+    def get(self, field):
+        """Get a checkpoint value.
+
+        :param field: Item type id or one of the reserved fields.
+        :return: The stored value or None.
+        """
+        value = self.redis.hget(self.key, field)
+        return json.loads(value.decode("utf-8")) if value else None
+
+    def set(self, field, value):
+        """Store a checkpoint value.
+
+        :param field: Item type id or one of the reserved fields.
+        :param value: JSON serializable value.
+        """
+        self.redis.hset(self.key, field, json.dumps(value))
+
+    def clear(self):
+        """Delete the checkpoint."""
+        self.redis.delete(self.key)
+
+
+def _export_cache_key(config_name, user_id):
+    """Get the redis cache key of a bulk export setting for an user."""
+    return current_app.config["WEKO_ADMIN_CACHE_PREFIX"].format(
+        name=current_app.config[config_name],
         user_id=user_id
     )
-    _file_format = current_app.config.get('WEKO_ADMIN_OUTPUT_FORMAT', 'tsv').lower()
 
+
+def clear_export_all(user_id, export_path=None):
+    """Delete the files and the checkpoint of a bulk export.
+
+    :param user_id: Id of the user running the export.
+    :param export_path: Directory of the export. The directory saved in the
+        checkpoint is used if not given.
+    """
+    checkpoint = ExportCheckpoint(user_id)
+    saved_path = checkpoint.get(ExportCheckpoint.EXPORT_PATH)
+    export_path = export_path or saved_path
+    if export_path:
+        shutil.rmtree(os.path.dirname(export_path), ignore_errors=True)
+    # the checkpoint of a newer export is kept
+    if saved_path in (None, export_path):
+        checkpoint.clear()
+
+
+def get_export_item_types(item_type_id):
+    """Get the item types to export.
+
+    :param item_type_id: Item type id or "-1" for all item types.
+    :return: List of (item type id, file name of the item type).
+    """
     def _itemtype_name(name):
         """Check a list of allowed characters in filenames."""
         return re.sub(r'[\/:*"<>|\s]', "_", name)
 
-    def _write_files(item_datas, export_path):
-        """Write TSV/CSV data to files.
+    item_types = []
+    try:
+        # get all item type
+        if str(item_type_id) == "-1":
+            item_type_all = ItemTypes.get_all()
+            item_types = [
+                (str(it.id), _itemtype_name(it.item_type_name.name))
+                for it in item_type_all
+            ]
+        else:
+            it = ItemTypes.get_by_id(item_type_id)
+            item_types = [(str(it.id), _itemtype_name(it.item_type_name.name))]
+    except Exception as ex:
+        current_app.logger.error(ex)
+    return item_types
+
 
-        @param item_datas:
-        @param export_path:
-        @param list_item_role:
-        @return:
-        """
-        permissions = dict(
-            permission_show_hide=lambda a: True,
-            check_created_id=lambda a: True,
-            hide_meta_data_for_role=lambda a: True,
-            current_language=lambda: True,
-        )
-        headers, records = make_stats_file_with_permission(
-            item_datas["item_type_id"],
-            item_datas["recids"],
-            item_datas["data"],
-            permissions,
-            export_path
+def write_export_files(item_datas, export_path):
+    """Write TSV/CSV data to files.
+
+    :param item_datas: Data of the items of a part file.
+    :param export_path: Directory of the export.
+    """
+    from weko_items_ui.utils import make_stats_file_with_permission, \
+        package_export_file
+
+    _file_format = current_app.config.get(
+        'WEKO_ADMIN_OUTPUT_FORMAT', 'tsv').lower()
+    permissions = dict(
+        permission_show_hide=lambda a: True,
+        check_created_id=lambda a: True,
+        hide_meta_data_for_role=lambda a: True,
+        current_language=lambda: True,
+    )
+    headers, records = make_stats_file_with_permission(
+        item_datas["item_type_id"],
+        item_datas["recids"],
+        item_datas["data"],
+        permissions,
+        export_path
+    )
+    keys, labels, is_systems, options = headers
+    item_datas["recids"].sort()
+    item_datas["keys"] = keys
+    item_datas["labels"] = labels
+    item_datas["is_systems"] = is_systems
+    item_datas["options"] = options
+    item_datas["data"] = records
+    item_type_data = item_datas
+
+    file_full_path = "{}/{}.{}".format(
+        export_path, item_type_data.get("name"), _file_format)
+    with open(file_full_path, "w", encoding="utf-8-sig") as file:
+        file_output = package_export_file(item_type_data)
+        file.write(file_output.getvalue())
+
+
+def prepare_export_all(user_id, data):
+    """Prepare the directory and the checkpoint of a bulk export.
+
+    :param user_id: Id of the user running the export.
+    :param data: Export conditions (item_type_id, item_id_range).
+    :return: (export_path, item_types, fromid, toid), or None when the
+        item id range is invalid.
+    """
+    _msg_key = _export_cache_key("WEKO_SEARCH_UI_BULK_EXPORT_MSG", user_id)
+    _run_msg_key = _export_cache_key(
+        "WEKO_SEARCH_UI_BULK_EXPORT_RUN_MSG", user_id)
+    reset_redis_cache(_msg_key, "")
+    reset_redis_cache(_run_msg_key, "")
+
+    # Delete old file
+    _uri_key = _export_cache_key("WEKO_SEARCH_UI_BULK_EXPORT_URI", user_id)
+    prev_uri = get_redis_cache(_uri_key)
+    if prev_uri:
+        delete_exported(prev_uri, _uri_key)
+
+    fromid = ""
+    toid = ""
+    item_id_range = data.get('item_id_range', "")
+    if item_id_range:
+        if "-" in item_id_range:
+            item_id_split = item_id_range.split("-")
+            fromid = item_id_split[0]
+            toid = item_id_split[1]
+        else:
+            fromid = item_id_range
+            toid = item_id_range
+    if fromid and toid and int(fromid) > int(toid):
+        reset_redis_cache(_msg_key, "Export failed. Please check item id range.")
+        return None
+
+    # A retried export continues in the directory of the checkpoint,
+    # which is cleared when a new export is started.
+    checkpoint = ExportCheckpoint(user_id)
+    export_path = checkpoint.get(ExportCheckpoint.EXPORT_PATH)
+    if not export_path or not os.path.isdir(export_path):
+        temp_path = tempfile.mkdtemp(
+            prefix=current_app.config["WEKO_ITEMS_UI_EXPORT_TMP_PREFIX"]
         )
-        keys, labels, is_systems, options = headers
-        item_datas["recids"].sort()
-        item_datas["keys"] = keys
-        item_datas["labels"] = labels
-        item_datas["is_systems"] = is_systems
-        item_datas["options"] = options
-        item_datas["data"] = records
-        item_type_data = item_datas
-
-        file_full_path = "{}/{}.{}".format(export_path, item_type_data.get("name"), _file_format)
-        with open(file_full_path, "w", encoding="utf-8-sig") as file:
-            file_output = package_export_file(item_type_data)
-            file.write(file_output.getvalue())
-
-    def _get_item_type_list(item_type_id):
-        """Get item type list."""
-        item_types = []
-        try:
-            # get all item type
-            if item_type_id == "-1":
-                item_type_all = ItemTypes.get_all()
-                item_types = [
-                    (str(it.id), _itemtype_name(it.item_type_name.name))
-                    for it in item_type_all
-                ]
-            else:
-                it = ItemTypes.get_by_id(item_type_id)
-                item_types = [(str(it.id), _itemtype_name(it.item_type_name.name))]
-        except Exception as ex:
-            current_app.logger.error(ex)
-        return item_types
+        export_path = temp_path + "/" + \
+            datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        os.makedirs(export_path, exist_ok=True)
+        checkpoint.set(ExportCheckpoint.EXPORT_PATH, export_path)
 
-    def _get_export_data(export_path, item_types, retrys, fromid="", toid="", retry_info={}):
-        try:
-            for it in item_types.copy():
-                item_type_id = it[0]
-                item_type_name = it[1]
-                item_datas = {}
-                if item_type_id in retry_info:
-                    counter = retry_info[item_type_id]["counter"]
-                    file_part = retry_info[item_type_id]["part"]
-                    from_pid = retry_info[item_type_id]["max"]
-                else:
-                    counter = 0
-                    file_part = 1
-                    from_pid = fromid if fromid else "1"
-                current_app.logger.info(
-                    "Start processing item type {}({}).".format(
-                        item_type_name, item_type_id
-                    )
-                )
-                # get all record id
-                if toid:
-                    recids = db.session.query(
-                        PersistentIdentifier.pid_value,
-                        PersistentIdentifier.object_uuid,
-                        RecordMetadata.json
-                    ).join(
-                        ItemMetadata,
-                        PersistentIdentifier.object_uuid == ItemMetadata.id,
-                    ).join(
-                        RecordMetadata,
-                        PersistentIdentifier.object_uuid == RecordMetadata.id,
-                    ).filter(
-                        PersistentIdentifier.pid_type == "recid",
-                        PersistentIdentifier.status == PIDStatus.REGISTERED,
-                        PersistentIdentifier.pid_value.notlike("%.%"),
-                        _func.to_number(
-                            PersistentIdentifier.pid_value,
-                            current_app.config["WEKO_SEARCH_UI_TO_NUMBER_FORMAT"]
-                        ) >= from_pid,
-                        _func.to_number(
-                            PersistentIdentifier.pid_value,
-                            current_app.config["WEKO_SEARCH_UI_TO_NUMBER_FORMAT"]
-                        ) <= toid,
-                        ItemMetadata.item_type_id == item_type_id
-                    ).order_by(_func.to_number(
-                        PersistentIdentifier.pid_value,
-                        current_app.config["WEKO_SEARCH_UI_TO_NUMBER_FORMAT"]
-                    )).all()
-                else:
-                    recids = db.session.query(
-                        PersistentIdentifier.pid_value,
-                        PersistentIdentifier.object_uuid,
-                        RecordMetadata.json
-                    ).join(
-                        ItemMetadata,
-                        PersistentIdentifier.object_uuid == ItemMetadata.id,
-                    ).join(
-                        RecordMetadata,
-                        PersistentIdentifier.object_uuid == RecordMetadata.id,
-                    ).filter(
-                        PersistentIdentifier.pid_type == "recid",
-                        PersistentIdentifier.status == PIDStatus.REGISTERED,
-                        PersistentIdentifier.pid_value.notlike("%.%"),
-                        _func.to_number(
-                            PersistentIdentifier.pid_value,
-                            current_app.config["WEKO_SEARCH_UI_TO_NUMBER_FORMAT"]
-                        ) >= from_pid,
-                        ItemMetadata.item_type_id == item_type_id
-                    ).order_by(_func.to_number(
-                        PersistentIdentifier.pid_value,
-                        current_app.config["WEKO_SEARCH_UI_TO_NUMBER_FORMAT"]
-                    )).all()
-
-                if len(recids) == 0:
-                    item_types.remove(it)
-                    continue
+    item_types = get_export_item_types(data.get('item_type_id', "-1"))
+    return export_path, item_types, fromid, toid
 
-                record_ids = [(recid.pid_value, recid.object_uuid) 
-                    for recid in recids if 'publish_status' in recid.json 
-                    and recid.json['publish_status'] in [PublishStatus.PUBLIC.value, PublishStatus.PRIVATE.value]]
-                for recid, uuid in record_ids:
-                    if counter % WEKO_SEARCH_UI_BULK_EXPORT_LIMIT == 0 and item_datas:
-                        # Create export info file
-                        item_datas["name"] = "{}.part{}".format(
-                            item_datas["name"], file_part
-                        )
-                        _write_files(item_datas, export_path)
-                        reset_redis_cache(
-                            _run_msg_key,
-                            "The latest {} file was created on {}.".format(
-                                _file_format,
-                                datetime.now(pytz.timezone(timezone)).strftime("%Y/%m/%d %H:%M:%S"))
-                            + " Number of retries: {} times.".format(retrys)
-                        )
-                        current_app.logger.info(
-                            "{}.{} has been created.".format(item_datas["name"], _file_format)
-                        )
-                        item_datas = {}
-                        file_part += 1
-                        retry_info[item_type_id] = {
-                            "part": file_part,
-                            "counter": counter,
-                            "max": recid,
-                        }
 
-                    record = WekoRecord.get_record_by_uuid(uuid)
-
-                    if not item_datas:
-                        item_datas = {
-                            "item_type_id": item_type_id,
-                            "name": "{}({})".format(item_type_name, item_type_id),
-                            "root_url": root_url,
-                            "jsonschema": "items/jsonschema/" + item_type_id,
-                            "keys": [],
-                            "labels": [],
-                            "recids": [],
-                            "data": {},
-                        }
+def export_item_type(root_url, user_id, export_path, item_type, timezone,
+                     fromid="", toid="", retrys=0):
+    """Export the items of an item type into part files.
 
-                    item_datas["recids"].append(recid)
-                    item_datas["data"][recid] = record
-                    counter += 1
+    The progress is saved in the export checkpoint after each part file, so
+    a retried or redelivered export continues from the last written part.
 
-                if file_part != 1:
-                    item_datas["name"] = "{}.part{}".format(
-                        item_datas["name"], file_part
-                    )
+    :param root_url: Root url of the site.
+    :param user_id: Id of the user running the export.
+    :param export_path: Directory of the export.
+    :param item_type: (item type id, file name of the item type).
+    :param timezone: Timezone of the progress message.
+    :param fromid: The smallest pid value to export.
+    :param toid: The largest pid value to export.
+    :param retrys: Number of retries done.
+    :return: True if the export succeeded.
+    """
+    _run_msg_key = _export_cache_key(
+        "WEKO_SEARCH_UI_BULK_EXPORT_RUN_MSG", user_id)
+    _file_format = current_app.config.get(
+        'WEKO_ADMIN_OUTPUT_FORMAT', 'tsv').lower()
+    item_type_id, item_type_name = item_type
+    checkpoint = ExportCheckpoint(user_id)
+
+    def _is_current():
+        # A cleared or newer export owns the checkpoint otherwise
+        return checkpoint.get(ExportCheckpoint.EXPORT_PATH) == export_path
+
+    def _save_progress(progress):
+        if not _is_current():
+            raise FileNotFoundError(export_path)
+        checkpoint.set(item_type_id, progress)
+
+    def _write_part(item_datas):
+        write_export_files(item_datas, export_path)
+        reset_redis_cache(
+            _run_msg_key,
+            "The latest {} file was created on {}.".format(
+                _file_format,
+                datetime.now(pytz.timezone(timezone)).strftime("%Y/%m/%d %H:%M:%S"))
+            + " Number of retries: {} times.".format(retrys)
+        )
+        current_app.logger.info(
+            "{}.{} has been created.".format(item_datas["name"], _file_format)
+        )
+
+    try:
+        if not _is_current():
+            current_app.logger.info(
+                "Export in {} has been cleared.".format(export_path))
+            return False
+        progress = checkpoint.get(item_type_id) or {}
+        if progress.get("done"):
+            return True
+        counter = progress.get("counter", 0)
+        file_part = progress.get("part", 1)
+        from_pid = progress.get("max") or fromid or "1"
+        current_app.logger.info(
+            "Start processing item type {}({}).".format(
+                item_type_name, item_type_id
+            )
+        )
+
+        item_datas = {}
+        for recid, record in iter_export_records(item_type_id, from_pid, toid):
+            if counter % WEKO_SEARCH_UI_BULK_EXPORT_LIMIT == 0 and item_datas:
                 # Create export info file
-                _write_files(item_datas, export_path)
-                reset_redis_cache(
-                    _run_msg_key,
-                    "The latest {} file was created on {}.".format(
-                        _file_format,
-                        datetime.now(pytz.timezone(timezone)).strftime("%Y/%m/%d %H:%M:%S"))
-                    + " Number of retries: {} times.".format(retrys)
+                item_datas["name"] = "{}.part{}".format(
+                    item_datas["name"], file_part
                 )
-                item_types.remove(it)
-                current_app.logger.info(
-                    "{}.{} has been created.".format(item_datas["name"], _file_format)
-                )
-                current_app.logger.info(
-                    "Processed {} items of item type {}.".format(
-                        counter, item_type_name
-                    )
+                _write_part(item_datas)
+                item_datas = {}
+                file_part += 1
+                _save_progress({
+                    "part": file_part,
+                    "counter": counter,
+                    "max": recid,
+                })
+
+            if not item_datas:
+                item_datas = {
+                    "item_type_id": item_type_id,
+                    "name": "{}({})".format(item_type_name, item_type_id),
+                    "root_url": root_url,
+                    "jsonschema": "items/jsonschema/" + item_type_id,
+                    "keys": [],
+                    "labels": [],
+                    "recids": [],
+                    "data": {},
+                }
+
+            item_datas["recids"].append(recid)
+            item_datas["data"][recid] = record
+            counter += 1
+
+        if item_datas:
+            if file_part != 1:
+                item_datas["name"] = "{}.part{}".format(
+                    item_datas["name"], file_part
                 )
-            return True
-        except SQLAlchemyError as ex:
-            current_app.logger.error(ex)
-            _num_retry = current_app.config["WEKO_SEARCH_UI_BULK_EXPORT_RETRY"]
-            if retrys < _num_retry:
-                retrys += 1
-                current_app.logger.info("retry count: {}".format(retrys))
-                db.session.rollback()
-                sleep(5)
-                result = _get_export_data(
-                    export_path, item_types, retrys, fromid, toid, retry_info
+            # Create export info file
+            _write_part(item_datas)
+            current_app.logger.info(
+                "Processed {} items of item type {}.".format(
+                    counter, item_type_name
                 )
-                return result
-            else:
-                return False
+            )
+        _save_progress({
+            "part": file_part,
+            "counter": counter,
+            "done": True,
+        })
+        return True
+    except FileNotFoundError:
+        current_app.logger.info(
+            "Export in {} has been cleared.".format(export_path))
+        return False
+    except SQLAlchemyError as ex:
+        current_app.logger.error(ex)
+        _num_retry = current_app.config["WEKO_SEARCH_UI_BULK_EXPORT_RETRY"]
+        if retrys < _num_retry:
+            retrys += 1
+            current_app.logger.info("retry count: {}".format(retrys))
+            db.session.rollback()
+            sleep(5)
+            return export_item_type(root_url, user_id, export_path, item_type,
+                                    timezone, fromid, toid, retrys)
+        else:
+            return False
 
-    reset_redis_cache(_msg_key, "")
-    reset_redis_cache(_run_msg_key, "")
-    temp_path = tempfile.TemporaryDirectory(
-        prefix=current_app.config["WEKO_ITEMS_UI_EXPORT_TMP_PREFIX"]
-    )
-    try:
-        # Delete old file
-        _task_config = current_app.config["WEKO_SEARCH_UI_BULK_EXPORT_URI"]
-        _uri_key = _cache_prefix.format(
-            name=_task_config,
-            user_id=user_id
-        )
-        prev_uri = get_redis_cache(_uri_key)
-        if prev_uri:
-            delete_exported(prev_uri, _uri_key)
 
-        export_path = temp_path.name + "/" + datetime.utcnow().strftime("%Y%m%d%H%M%S")
-        os.makedirs(export_path, exist_ok=True)
+def finish_export_all(user_id, export_path, result):
+    """Package the exported files and store the archive.
 
-        item_type_id = data.get('item_type_id', "-1")
-        item_types = _get_item_type_list(item_type_id)
-        fromid = ""
-        toid = ""
-        item_id_range = data.get('item_id_range', "")
-        if item_id_range:
-            if "-" in item_id_range:
-                item_id_split = item_id_range.split("-")
-                fromid = item_id_split[0]
-                toid = item_id_split[1]
-            else:
-                fromid = item_id_range
-                toid = item_id_range
-        
-        result = None
-        if not fromid or not toid or (fromid and toid and int(fromid) <= int(toid)):
-            result = _get_export_data(export_path, item_types, 0, fromid, toid)
-
-            if result:
-                # Create bag
-                bagit.make_bag(export_path)
-                shutil.make_archive(export_path, "zip", export_path)
-                with open(export_path + ".zip", "rb") as file:
-                    src = FileInstance.create()
-                    src.set_contents(file, default_location=Location.get_default().uri)
-                db.session.commit()
-            else:
-                reset_redis_cache(_msg_key, "Export failed.")
+    :param user_id: Id of the user running the export.
+    :param export_path: Directory of the export.
+    :param result: True if every item type has been exported.
+    :return: Uri of the stored archive or "" on failure.
+    """
+    _msg_key = _export_cache_key("WEKO_SEARCH_UI_BULK_EXPORT_MSG", user_id)
+    _run_msg_key = _export_cache_key(
+        "WEKO_SEARCH_UI_BULK_EXPORT_RUN_MSG", user_id)
+    uri = ""
+    try:
+        if result:
+            # Create bag
+            bagit.make_bag(export_path)
+            shutil.make_archive(export_path, "zip", export_path)
+            with open(export_path + ".zip", "rb") as file:
+                src = FileInstance.create()
+                src.set_contents(file, default_location=Location.get_default().uri)
+            db.session.commit()
+            uri = src.uri
         else:
-            reset_redis_cache(_msg_key, "Export failed. Please check item id range.")
+            reset_redis_cache(_msg_key, "Export failed.")
+    except Exception as ex:
+        db.session.rollback()
+        current_app.logger.error(ex)
+        reset_redis_cache(_msg_key, "Export failed.")
+    finally:
+        clear_export_all(user_id, export_path)
         reset_redis_cache(_run_msg_key, "")
-        return src.uri if result and src else ""
+    return uri
+
+
+def export_all(root_url, user_id, data, timezone):
+    """Gather all the item data and export and return as a JSON or BIBTEX.
+
+    Parameter
+        path is the path if file temparory
+        post_data is the data items
+    :return: JSON, BIBTEX
+    """
+    _msg_key = _export_cache_key("WEKO_SEARCH_UI_BULK_EXPORT_MSG", user_id)
+    _run_msg_key = _export_cache_key(
+        "WEKO_SEARCH_UI_BULK_EXPORT_RUN_MSG", user_id)
+    try:
+        prepared = prepare_export_all(user_id, data)
+        if not prepared:
+            reset_redis_cache(_run_msg_key, "")
+            return ""
+        export_path, item_types, fromid, toid = prepared
+
+        result = True
+        for item_type in item_types:
+            if not export_item_type(root_url, user_id, export_path, item_type,
+                                    timezone, fromid, toid):
+                result = False
+                break
+        return finish_export_all(user_id, export_path, result)
     except Exception as ex:
         db.session.rollback()
         current_app.logger.error(ex)
+        clear_export_all(user_id)
         reset_redis_cache(_msg_key, "Export failed.")
         reset_redis_cache(_run_msg_key, "")
         return ""
@@ -3630,6 +3900,10 @@ def cancel_export_all():
 
         if export_status:
             revoke(task_id, terminate=True)
+            sub_task_ids = ExportCheckpoint(current_user.get_id()).get(
+                ExportCheckpoint.TASK_IDS) or []
+            for sub_task_id in sub_task_ids:
+                revoke(sub_task_id, terminate=True)
             delete_task_id_cache.apply_async(
                 args=(
                     task_id,
@@ -3736,21 +4010,24 @@ def handle_remove_es_metadata(item, bef_metadata, bef_last_ver_metadata):
             )
 
             # revert to previous data in ES
+            reverted = []
             if bef_metadata["_version"] < aft_metadata["_version"]:
-                indexer.upload_metadata(
-                    bef_metadata["_source"], bef_metadata["_id"], 0, True
+                reverted.append(
+                    (bef_metadata["_source"], bef_metadata["_id"], 0)
                 )
             if (
                 status == "keep"
                 and bef_last_ver_metadata["_version"]
                 < aft_last_ver_metadata["_version"]
             ):
-                indexer.upload_metadata(
-                    bef_last_ver_metadata["_source"],
-                    bef_last_ver_metadata["_id"],
-                    0,
-                    True,
+                reverted.append(
+                    (
+                        bef_last_ver_metadata["_source"],
+                        bef_last_ver_metadata["_id"],
+                        0,
+                    )
                 )
+            indexer.bulk_upload_metadata(reverted)
 
             # delete new version in ES
             if (
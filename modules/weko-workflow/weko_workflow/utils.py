@@ -2013,6 +2013,11 @@ def check_an_item_is_locked(item_id=None):
                 if task['name'] == 'weko_search_ui.tasks.import_item' \
                         and task['args'][0].get('id') == str(item_id):
                     return True
+                if task['name'] == \
+                        'weko_search_ui.tasks.import_items_chunk' \
+                        and any(item.get('id') == str(item_id)
+                                for item in task['args'][0]):
+                    return True
         return False
 
     if not item_id or not inspect().ping():